@@ -1,3 +1,6 @@
 from __future__ import absolute_import
 
-from .biodrone import BioDrone
\ No newline at end of file
+from .biodrone import BioDrone
+from .packed import PackedSequence
+from .video import VideoSequence
+from .cache import FrameCache
@@ -6,6 +6,10 @@ import numpy as np
 import six
 import json
 
+from .packed import PackedSequence, pack_file
+from .video import VideoSequence, video_file
+from .install import manifest_file, info_file
+
 
 class BioDrone(object):
     r"""BioDrone Dataset.
@@ -15,13 +19,19 @@ class BioDrone(object):
             ``val`` and ``test`` folders exist.
         subset (string, optional): Specify ``train``, ``val`` or ``test``
             subset of BioDrone.
+        frame_cache (FrameCache, optional): Opt-in persistent cache of the decoded frames,
+            the sequences are then returned as ``CachedSequence``.
+
+    The sequence lists are read from ``root_dir/biodrone_info.json`` when present (e.g. in
+    a synthetic dataset), from the one shipped with the toolkit otherwise.
     """
-    def __init__(self, root_dir, subset):
+    def __init__(self, root_dir, subset, frame_cache=None):
         super(BioDrone, self).__init__()
         self.root_dir = root_dir
         self.subset = subset
+        self.frame_cache = frame_cache
 
-        f = open(os.path.join(os.path.split(os.path.realpath(__file__))[0],'biodrone_info.json'),'r',encoding='utf-8')
+        f = open(info_file(root_dir),'r',encoding='utf-8')
         self.infos = json.load(f)['all']            
         f.close() 
 
@@ -30,6 +40,13 @@ class BioDrone(object):
         self.seq_dirs = [os.path.join(root_dir,'data',self.subset,'frame_{}'.format(s)) for s in self.seq_names]
         self.anno_files = [os.path.join(root_dir,'attribute','groundtruth','{}.txt'.format(s)) for s in self.seq_names]
         self.restart_files = [os.path.join(root_dir,'attribute', 'restart','{}.txt'.format(s)) for s in self.seq_names]
+        self.pack_files = [pack_file(root_dir, self.subset, s) for s in self.seq_names]
+
+        # frames and resolutions indexed by biodrone.datasets.install, if any
+        self.manifest = None
+        if os.path.isfile(manifest_file(root_dir, self.subset)):
+            with open(manifest_file(root_dir, self.subset), 'r') as f:
+                self.manifest = json.load(f)['sequences']
         
     
     def __getitem__(self, index):
@@ -40,21 +57,81 @@ class BioDrone(object):
         Returns:
             tuple:
                 (img_files, anno, restart_flag), where ``img_files`` is a list of
-                file names, ``anno`` is a N x 4 (rectangles) numpy array
+                file names (or a ``PackedSequence`` when the sequence has been packed
+                with ``biodrone.datasets.packed``, or a ``VideoSequence`` when it is only
+                available as a video under ``video/``), ``anno`` is a N x 4 (rectangles) numpy array
         """
         if isinstance(index, six.string_types):
             if not index in self.seq_names:
                 raise Exception('Sequence {} not found.'.format(index))
             index = self.seq_names.index(index)
 
-        img_files = sorted(glob.glob(os.path.join(
-            self.seq_dirs[index], '*.jpg')))
         anno = np.loadtxt(self.anno_files[index], delimiter=',')
+        if os.path.isfile(self.pack_files[index]):
+            img_files = PackedSequence(self.pack_files[index])
+        elif not os.path.isdir(self.seq_dirs[index]) and \
+                video_file(self.root_dir, self.subset, self.seq_names[index]) is not None:
+            img_files = VideoSequence(video_file(self.root_dir, self.subset, self.seq_names[index]), len(anno))
+        elif self.manifest is not None and self.seq_names[index] in self.manifest:
+            img_files = [os.path.join(self.seq_dirs[index], f)
+                         for f in self.manifest[self.seq_names[index]]['frames']]
+        else:
+            img_files = sorted(glob.glob(os.path.join(
+                self.seq_dirs[index], '*.jpg')))
         restart_flag = np.loadtxt(self.restart_files[index], delimiter=',', dtype=int)
 
+        if self.frame_cache is not None:
+            img_files = self.frame_cache.wrap(
+                self.frame_cache.key(self.root_dir, self.subset, self.seq_names[index]), img_files)
+
         return img_files, anno, restart_flag
         
 
     def __len__(self):
         return len(self.seq_names)
 
+    def resolution(self, index):
+        r"""Return the (width, height) of the frames of a sequence from the manifest, ``None`` if not indexed."""
+        if isinstance(index, six.string_types):
+            index = self.seq_names.index(index)
+        if self.manifest is None or not self.seq_names[index] in self.manifest:
+            return None
+        info = self.manifest[self.seq_names[index]]
+        return (info['width'], info['height'])
+
+    def select_representative(self, num):
+        r"""Select a representative subset of sequences from their attributes.
+
+        Every sequence is described by the ratio of frames with each attribute (the files
+        under ``attribute/`` except ``groundtruth`` and ``restart``) and its length, and the
+        sequences are picked greedily to cover this space (farthest point sampling, starting
+        from the most typical sequence).
+
+        Args:
+            num (integer): Number of sequences to select.
+
+        Returns:
+            list: Names of the selected sequences, in dataset order.
+        """
+        attribute_dir = os.path.join(self.root_dir, 'attribute')
+        attributes = sorted([a for a in os.listdir(attribute_dir)
+                             if os.path.isdir(os.path.join(attribute_dir, a)) and not a in ['groundtruth', 'restart']])
+
+        features = np.zeros((len(self.seq_names), len(attributes) + 1))
+        for s, seq_name in enumerate(self.seq_names):
+            for a, attribute in enumerate(attributes):
+                attribute_file = os.path.join(attribute_dir, attribute, '{}.txt'.format(seq_name))
+                if os.path.isfile(attribute_file):
+                    features[s, a] = np.mean(np.loadtxt(attribute_file, delimiter=',', ndmin=1))
+            features[s, -1] = np.log(len(np.loadtxt(self.anno_files[s], delimiter=',', ndmin=2)))
+        features = (features - features.mean(axis=0)) / (features.std(axis=0) + 1e-12)
+
+        num = min(num, len(self.seq_names))
+        selected = [int(np.argmin(np.sum(features ** 2, axis=1)))]
+        dists = np.sum((features - features[selected[0]]) ** 2, axis=1)
+        while len(selected) < num:
+            selected.append(int(np.argmax(dists)))
+            dists = np.minimum(dists, np.sum((features - features[selected[-1]]) ** 2, axis=1))
+
+        return [self.seq_names[s] for s in sorted(selected)]
+
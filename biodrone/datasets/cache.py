@@ -0,0 +1,194 @@
+from __future__ import absolute_import, division, print_function
+
+import os
+import json
+import hashlib
+import numpy as np
+
+from ..utils.ioutils import load_image
+
+
+class FrameCache(object):
+    r"""Persistent cache of decoded frames, shared across repetitions and trackers.
+
+    The frames of every cached sequence are stored as raw uint8 arrays in one memory-mapped
+    file under ``cache_dir`` (ideally on a local NVMe disk), so that later passes read them
+    zero-copy instead of decoding the JPEGs again. Whole sequences are evicted in least
+    recently used order when the cache exceeds ``max_bytes``.
+
+    Args:
+        cache_dir (string): Directory of the cache.
+        max_bytes (integer): Size budget of the cache in bytes.
+    """
+    def __init__(self, cache_dir, max_bytes):
+        super(FrameCache, self).__init__()
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+
+        # statistics, counted per sequence and per frame
+        self.hits = 0
+        self.misses = 0
+        self.frame_hits = 0
+        self.frame_misses = 0
+        self.evictions = 0
+
+    def key(self, root_dir, subset, seq_name):
+        r"""Cache key of a sequence of a dataset."""
+        digest = hashlib.md5(os.path.realpath(root_dir).encode('utf-8')).hexdigest()[:8]
+        return '{}_{}_{}'.format(digest, subset, seq_name)
+
+    def wrap(self, key, img_files):
+        r"""Return a ``CachedSequence`` serving the frames of ``img_files`` through the cache."""
+        return CachedSequence(self, key, img_files)
+
+    def stats(self):
+        r"""Return the hit/miss statistics and the current size of the cache."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'frame_hits': self.frame_hits,
+            'frame_misses': self.frame_misses,
+            'evictions': self.evictions,
+            'size_bytes': sum(meta['nbytes'] for _, meta in self._entries())}
+
+    def _paths(self, key):
+        return (os.path.join(self.cache_dir, key + '.frames'),
+                os.path.join(self.cache_dir, key + '.json'))
+
+    def _load_meta(self, key):
+        _, meta_file = self._paths(key)
+        if not os.path.isfile(meta_file):
+            return None
+        try:
+            with open(meta_file, 'r') as f:
+                return json.load(f)
+        except ValueError:
+            return None
+
+    def _entries(self):
+        # complete entries with their metadata, least recently used first
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith('.json'):
+                key = filename[:-len('.json')]
+                meta = self._load_meta(key)
+                if meta is not None:
+                    entries.append((os.path.getmtime(self._paths(key)[1]), key, meta))
+        return [(key, meta) for _, key, meta in sorted(entries)]
+
+    def _reserve(self, nbytes):
+        # evict least recently used sequences until nbytes fit in the budget
+        if nbytes > self.max_bytes:
+            return False
+        entries = self._entries()
+        size = sum(meta['nbytes'] for _, meta in entries)
+        for key, meta in entries:
+            if size + nbytes <= self.max_bytes:
+                break
+            self._remove(key)
+            size -= meta['nbytes']
+            self.evictions += 1
+        return size + nbytes <= self.max_bytes
+
+    def _remove(self, key):
+        for path in self._paths(key)[::-1]:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class CachedSequence(object):
+    r"""Frames of a sequence served through a ``FrameCache``.
+
+    On a hit, the frames are zero-copy (copy-on-write) views of the memory-mapped cache file.
+    On a miss, iterating decodes the frames of the source and fills the cache.
+
+    Args:
+        cache (FrameCache): The cache.
+        key (string): Cache key of the sequence.
+        img_files (list): Source frames (paths, ``PackedSequence``, ``VideoSequence``...).
+    """
+    def __init__(self, cache, key, img_files):
+        super(CachedSequence, self).__init__()
+        self.cache = cache
+        self.key = key
+        self.img_files = img_files
+        self._frames = None
+
+    def __reduce__(self):
+        # reopened when sent to another process (e.g. a tracker server)
+        return (CachedSequence, (self.cache, self.key, self.img_files))
+
+    def __len__(self):
+        return len(self.img_files)
+
+    def _open(self):
+        # memory-map the cached frames, None on a miss
+        if self._frames is None:
+            meta = self.cache._load_meta(self.key)
+            if meta is None or meta['frame_num'] != len(self.img_files):
+                return None
+            frame_file, meta_file = self.cache._paths(self.key)
+            self._frames = np.memmap(frame_file, dtype=np.uint8, mode='c',
+                                     shape=tuple([meta['frame_num']] + meta['shape']))
+            # mark the sequence as recently used
+            os.utime(meta_file, None)
+        return self._frames
+
+    def __getitem__(self, index):
+        frames = self._open()
+        if frames is not None:
+            self.cache.frame_hits += 1
+            return frames[index]
+        self.cache.frame_misses += 1
+        return load_image(self.img_files[index])
+
+    def __iter__(self):
+        frames = self._open()
+        if frames is not None:
+            self.cache.hits += 1
+            for frame in frames:
+                self.cache.frame_hits += 1
+                yield frame
+            return
+
+        self.cache.misses += 1
+        frame_file, meta_file = self.cache._paths(self.key)
+        tmp_file = '{}.{}.tmp'.format(frame_file, os.getpid())
+        writer = None
+        complete = False
+        try:
+            for f, img_file in enumerate(self.img_files):
+                image = load_image(img_file)
+                self.cache.frame_misses += 1
+                if f == 0:
+                    nbytes = len(self.img_files) * image.nbytes
+                    if self.cache._reserve(nbytes):
+                        writer = np.memmap(tmp_file, dtype=np.uint8, mode='w+',
+                                           shape=(len(self.img_files),) + image.shape)
+                if writer is not None:
+                    if image.shape != writer.shape[1:]:
+                        # frames of different sizes are not cached
+                        writer = None
+                        os.remove(tmp_file)
+                    else:
+                        writer[f] = image
+                yield image
+            complete = True
+        finally:
+            if writer is not None:
+                writer.flush()
+                del writer
+                if complete:
+                    os.replace(tmp_file, frame_file)
+                    meta = {
+                        'frame_num': len(self.img_files),
+                        'shape': list(image.shape),
+                        'nbytes': len(self.img_files) * image.nbytes}
+                    with open(meta_file + '.tmp', 'w') as f:
+                        json.dump(meta, f)
+                    os.replace(meta_file + '.tmp', meta_file)
+                else:
+                    # partially decoded sequences are not cached
+                    os.remove(tmp_file)
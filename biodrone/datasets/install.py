@@ -0,0 +1,157 @@
+from __future__ import absolute_import, print_function
+
+import os
+import sys
+import glob
+import json
+import argparse
+import concurrent.futures
+import numpy as np
+from PIL import Image
+
+from ..utils.ioutils import extract
+
+
+def manifest_file(root_dir, subset):
+    r"""Path of the frame manifest of a subset."""
+    return os.path.join(root_dir, 'index', '{}.json'.format(subset))
+
+
+def info_file(root_dir):
+    r"""Path of the sequence lists of a dataset, ``root_dir/biodrone_info.json`` when present
+    (e.g. in a synthetic dataset), the one shipped with the toolkit otherwise."""
+    filename = os.path.join(root_dir, 'biodrone_info.json')
+    if os.path.isfile(filename):
+        return filename
+    return os.path.join(os.path.dirname(os.path.realpath(__file__)), 'biodrone_info.json')
+
+
+def _marker_file(root_dir, subset, archive):
+    # written once an archive is completely extracted
+    return os.path.join(root_dir, 'index', 'extracted', subset, os.path.basename(archive) + '.done')
+
+
+def _extract_archive(archive, extract_dir, marker):
+    extract(archive, extract_dir, resume=True)
+    open(marker, 'w').close()
+    return archive
+
+
+def install(download_dir, root_dir, subset, num_workers=None):
+    r"""Extract the downloaded archives of a BioDrone subset in parallel.
+
+    The archives ``download_dir/*.zip`` (holding the ``frame_xxx/`` directories of the subset)
+    are extracted concurrently to ``root_dir/data/{subset}/``. Every completely extracted
+    archive is marked under ``root_dir/index/extracted/``, so that an interrupted install
+    skips them when run again, and resumes the partially extracted ones. ``attribute.zip``,
+    if present, is extracted to ``root_dir/attribute/``. The subset is then verified and
+    indexed with ``verify``.
+
+    Args:
+        download_dir (string): Directory of the downloaded archives.
+        root_dir (string): Root directory of the BioDrone dataset.
+        subset (string): ``train``, ``val`` or ``test``.
+        num_workers (integer, optional): Number of extraction processes, the number of
+            cores when ``None``.
+
+    Returns:
+        list: The errors found by ``verify``, empty if the subset is complete.
+    """
+    archives = sorted(glob.glob(os.path.join(download_dir, '*.zip')))
+    jobs = []
+    for archive in archives:
+        if os.path.basename(archive) == 'attribute.zip':
+            extract_dir = os.path.join(root_dir, 'attribute')
+        else:
+            extract_dir = os.path.join(root_dir, 'data', subset)
+        marker = _marker_file(root_dir, subset, archive)
+        if os.path.isfile(marker):
+            print('  Found extracted archive, skipping ', os.path.basename(archive))
+            continue
+        jobs.append((archive, extract_dir, marker))
+    if len(jobs) > 0 and not os.path.isdir(os.path.dirname(jobs[0][2])):
+        os.makedirs(os.path.dirname(jobs[0][2]))
+
+    print('Extracting %d/%d archives of BioDrone %s...' % (len(jobs), len(archives), subset))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=num_workers) as executor:
+        futures = [executor.submit(_extract_archive, *job) for job in jobs]
+        for a, future in enumerate(concurrent.futures.as_completed(futures)):
+            print('--Archive %d/%d: %s extracted' % (a + 1, len(jobs), os.path.basename(future.result())))
+
+    return verify(root_dir, subset)[1]
+
+
+def verify(root_dir, subset):
+    r"""Verify the frames of a BioDrone subset and write its manifest.
+
+    Every sequence of the subset listed in ``biodrone_info.json`` (see ``info_file``) must have a frame directory,
+    and as many frames as groundtruth rows (the groundtruth of the ``test`` subset, which only
+    annotates the first frame, is not checked). The manifest ``root_dir/index/{subset}.json``
+    lists the frames and the resolution of every complete sequence, and is read by
+    ``BioDrone`` instead of listing the frame directories.
+
+    Args:
+        root_dir (string): Root directory of the BioDrone dataset.
+        subset (string): ``train``, ``val`` or ``test``.
+
+    Returns:
+        tuple: (manifest, errors), where ``errors`` is a list of messages.
+    """
+    with open(info_file(root_dir), 'r', encoding='utf-8') as f:
+        seq_names = json.load(f)['all'][subset]
+
+    sequences = {}
+    errors = []
+    for seq_name in seq_names:
+        seq_dir = os.path.join(root_dir, 'data', subset, 'frame_{}'.format(seq_name))
+        frames = sorted([f for f in os.listdir(seq_dir) if f.endswith('.jpg')]) if os.path.isdir(seq_dir) else []
+        if len(frames) == 0:
+            errors.append('Sequence {}: no frames in {}.'.format(seq_name, seq_dir))
+            continue
+
+        anno_file = os.path.join(root_dir, 'attribute', 'groundtruth', '{}.txt'.format(seq_name))
+        if not os.path.isfile(anno_file):
+            errors.append('Sequence {}: missing groundtruth {}.'.format(seq_name, anno_file))
+            continue
+        rows = len(np.loadtxt(anno_file, delimiter=',', ndmin=2))
+        if rows > 1 and rows != len(frames):
+            errors.append('Sequence {}: {} frames, {} groundtruth rows.'.format(seq_name, len(frames), rows))
+            continue
+
+        # the resolution is read from the header of the first frame
+        width, height = Image.open(os.path.join(seq_dir, frames[0])).size
+        sequences[seq_name] = {
+            'frame_num': len(frames),
+            'width': width,
+            'height': height,
+            'frames': frames}
+
+    manifest = {'subset': subset, 'sequences': sequences}
+    filename = manifest_file(root_dir, subset)
+    if not os.path.isdir(os.path.dirname(filename)):
+        os.makedirs(os.path.dirname(filename))
+    with open(filename + '.tmp', 'w') as f:
+        json.dump(manifest, f)
+    os.replace(filename + '.tmp', filename)
+
+    print('%d/%d sequences of BioDrone %s verified, manifest written to %s' % (
+        len(sequences), len(seq_names), subset, filename))
+    for error in errors:
+        print('  ' + error)
+    return manifest, errors
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Extract, verify and index a BioDrone subset.')
+    parser.add_argument('--download_dir', type=str, help='the directory of the downloaded archives of the subset')
+    parser.add_argument('--root_dir', type=str, help='the root directory of BioDrone', required=True)
+    parser.add_argument('--subset', type=str, help='the subset to install', default='train')
+    parser.add_argument('--num_workers', type=int, help='the number of extraction processes', default=None)
+    parser.add_argument('--verify_only', action='store_true', help='only verify and index the extracted subset')
+    args = parser.parse_args()
+
+    if args.verify_only:
+        errors = verify(args.root_dir, args.subset)[1]
+    else:
+        errors = install(args.download_dir, args.root_dir, args.subset, args.num_workers)
+    sys.exit(1 if len(errors) > 0 else 0)
@@ -0,0 +1,130 @@
+from __future__ import absolute_import, print_function
+
+import os
+import glob
+import mmap
+import struct
+import argparse
+import numpy as np
+
+
+MAGIC = b'BDPK'
+VERSION = 1
+HEADER = struct.Struct('<4sIQ') # magic, version, frame number
+
+
+def pack_file(root_dir, subset, seq_name):
+    r"""Path of the packed container of a sequence."""
+    return os.path.join(root_dir, 'packed', subset, 'frame_{}.pack'.format(seq_name))
+
+
+def pack_sequence(img_files, filename):
+    r"""Store the frames of a sequence in one contiguous container file.
+
+    The container holds a small header, an offset table of ``frame_num + 1`` uint64 values
+    and the concatenated JPEG bytes of the frames, which are not re-encoded.
+
+    Args:
+        img_files (list): Paths of the frames, in order.
+        filename (string): Path of the container file.
+    """
+    sizes = [os.path.getsize(img_file) for img_file in img_files]
+    offsets = np.concatenate(([0], np.cumsum(sizes))).astype('<u8')
+
+    dirname = os.path.dirname(filename)
+    if dirname and not os.path.isdir(dirname):
+        os.makedirs(dirname)
+
+    # write to a temporary file first, so that a container is either complete or absent
+    tmp_file = filename + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(img_files)))
+        f.write(offsets.tobytes())
+        for img_file in img_files:
+            with open(img_file, 'rb') as img:
+                f.write(img.read())
+    os.replace(tmp_file, filename)
+
+
+class PackedSequence(object):
+    r"""Frames of a sequence read from a packed container.
+
+    The container is opened once and memory-mapped. Each item is a zero-copy 1-D uint8
+    array holding the encoded JPEG bytes of the frame, decoded with ``load_image``.
+
+    Args:
+        filename (string): Path of the container file.
+    """
+    def __init__(self, filename):
+        super(PackedSequence, self).__init__()
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(self._mmap, 'madvise'):
+            self._mmap.madvise(mmap.MADV_SEQUENTIAL)
+
+        magic, version, frame_num = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise Exception('Invalid packed sequence {}.'.format(filename))
+        self.offsets = np.frombuffer(self._mmap, dtype='<u8', count=frame_num + 1, offset=HEADER.size)
+        self.data_offset = HEADER.size + self.offsets.nbytes
+
+    def __reduce__(self):
+        # reopened when sent to another process (e.g. a tracker server)
+        return (PackedSequence, (self.filename,))
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError('Frame {} out of range.'.format(index))
+        start = int(self.offsets[index])
+        size = int(self.offsets[index + 1]) - start
+        return np.frombuffer(self._mmap, dtype=np.uint8, count=size, offset=self.data_offset + start)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    @property
+    def nbytes(self):
+        return int(self.offsets[-1])
+
+
+def repack(root_dir, subset, overwrite=False):
+    r"""Pack every sequence of a BioDrone subset into a container file.
+
+    The containers are written to ``root_dir/packed/{subset}/``, where ``BioDrone`` reads
+    them instead of the JPEG directories.
+
+    Args:
+        root_dir (string): Root directory of the BioDrone dataset.
+        subset (string): ``train``, ``val`` or ``test``.
+        overwrite (boolean): Repack the sequences that are already packed.
+    """
+    seq_dirs = sorted(glob.glob(os.path.join(root_dir, 'data', subset, 'frame_*')))
+    for s, seq_dir in enumerate(seq_dirs):
+        seq_name = os.path.basename(seq_dir)[len('frame_'):]
+        filename = pack_file(root_dir, subset, seq_name)
+        if os.path.isfile(filename) and not overwrite:
+            print('  Found packed sequence, skipping ', seq_name)
+            continue
+        img_files = sorted(glob.glob(os.path.join(seq_dir, '*.jpg')))
+        pack_sequence(img_files, filename)
+
+        # check the container against the directory
+        assert len(PackedSequence(filename)) == len(img_files)
+        print('--Sequence %d/%d: %s packed (%d frames)' % (s + 1, len(seq_dirs), seq_name, len(img_files)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pack the BioDrone sequences into container files.')
+    parser.add_argument('--root_dir', type=str, help='the root directory of BioDrone', required=True)
+    parser.add_argument('--subset', type=str, help='the subset to pack', default='train')
+    parser.add_argument('--overwrite', action='store_true', help='repack the packed sequences')
+    args = parser.parse_args()
+
+    repack(args.root_dir, args.subset, args.overwrite)
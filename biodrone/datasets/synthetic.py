@@ -0,0 +1,189 @@
+from __future__ import absolute_import, division, print_function
+
+import os
+import json
+import argparse
+import concurrent.futures
+import numpy as np
+import cv2 as cv
+
+from ..utils.help import makedir
+from .install import verify
+
+
+def _texture(rng, height, width, grain):
+    # smooth random texture, drawn at a low resolution and upsampled
+    small = rng.randint(0, 256, (max(1, height // grain), max(1, width // grain), 3)).astype(np.uint8)
+    return cv.resize(small, (width, height), interpolation=cv.INTER_CUBIC)
+
+
+def synthetic_motion(rng, frame_num, width, height, target_size=(16, 64), speed=4., scale_change=0.01,
+                     absent_ratio=0.05):
+    r"""Simulate the box of a target moving over a frame.
+
+    The target follows a random walk of its velocity (``speed`` pixels per frame on average),
+    bouncing on the borders of the frame, while its size follows a random walk of its
+    logarithm (``scale_change`` per frame). It is hidden during occlusions covering about
+    ``absent_ratio`` of the frames (never the first one).
+
+    Returns:
+        tuple: (anno, absent), the N x 4 [x, y, w, h] boxes (0-indexed, zeros when the target
+            is absent) and the N absent flags.
+    """
+    size = rng.uniform(target_size[0], target_size[1]) * np.array([rng.uniform(0.7, 1.4), 1.])
+    center = np.array([rng.uniform(size[0], width - size[0]), rng.uniform(size[1], height - size[1])])
+    velocity = rng.randn(2) * speed
+
+    anno = np.zeros((frame_num, 4))
+    for f in range(frame_num):
+        if f > 0:
+            # AR(1) velocity whose stationary standard deviation is ``speed``
+            velocity = 0.9 * velocity + np.sqrt(1 - 0.9 ** 2) * rng.randn(2) * speed
+            size = np.clip(size * np.exp(rng.randn() * scale_change), 4, [width / 2, height / 2])
+            center = center + velocity
+            # bounce on the borders
+            low, high = size / 2, np.array([width, height]) - size / 2
+            velocity = np.where((center < low) | (center > high), -velocity, velocity)
+            center = np.clip(center, low, high)
+        anno[f] = np.concatenate((center - size / 2, size))
+    anno = np.round(anno)
+
+    absent = np.zeros(frame_num, dtype=int)
+    occluded = 0
+    while occluded < absent_ratio * (frame_num - 1):
+        length = min(rng.randint(5, 30), frame_num - 1)
+        start = rng.randint(1, frame_num - length + 1)
+        absent[start:start + length] = 1
+        occluded = absent.sum()
+    anno[absent == 1] = 0
+    return anno, absent
+
+
+def _write_sequence(root_dir, subset, seq_name, frame_num, width, height, motion, restart_interval,
+                    quality, seed):
+    rng = np.random.RandomState(seed)
+    anno, absent = synthetic_motion(rng, frame_num, width, height, **motion)
+    background = _texture(rng, height, width, 16)
+    target = _texture(rng, 256, 256, 8)
+
+    seq_dir = os.path.join(root_dir, 'data', subset, 'frame_{}'.format(seq_name))
+    makedir(seq_dir)
+    for f in range(frame_num):
+        frame = background.copy()
+        if absent[f] == 0:
+            x, y, w, h = anno[f].astype(int)
+            region = frame[y:y + h, x:x + w]
+            region[...] = cv.resize(target, (region.shape[1], region.shape[0]))
+        cv.imwrite(os.path.join(seq_dir, '%08d.jpg' % (f + 1)), frame, [cv.IMWRITE_JPEG_QUALITY, quality])
+
+    # per-frame attributes, as in attribute/{name}/
+    speeds = np.zeros(frame_num)
+    speeds[1:] = np.hypot(*(anno[1:, :2] + anno[1:, 2:] / 2 - anno[:-1, :2] - anno[:-1, 2:] / 2).T)
+    visible = (absent == 0) & np.concatenate(([True], absent[:-1] == 0))
+    attributes = {
+        'absent': absent,
+        'fast_motion': ((speeds > 2 * motion.get('speed', 4.)) & visible).astype(int),
+        'small_target': ((anno[:, 2] * anno[:, 3] < 400) & (absent == 0)).astype(int)}
+    attribute_dir = os.path.join(root_dir, 'attribute')
+    np.savetxt(os.path.join(attribute_dir, 'groundtruth', '{}.txt'.format(seq_name)), anno, fmt='%d', delimiter=',')
+    np.savetxt(os.path.join(attribute_dir, 'restart', '{}.txt'.format(seq_name)),
+               np.arange(0, frame_num, restart_interval), fmt='%d')
+    for name, flags in attributes.items():
+        np.savetxt(os.path.join(attribute_dir, name, '{}.txt'.format(seq_name)), flags, fmt='%d')
+    return seq_name
+
+
+def generate(root_dir, subset='val', num_seqs=10, frame_num=(100, 300), width=640, height=360,
+             target_size=(16, 64), speed=4., scale_change=0.01, absent_ratio=0.05, restart_interval=50,
+             quality=90, num_workers=None, seed=0):
+    r"""Write a synthetic dataset in the BioDrone format, to run and evaluate trackers without the real data.
+
+    Every sequence shows a textured target moving over a textured background (see
+    ``synthetic_motion``). The frames are written to ``data/{subset}/frame_{name}/``, the
+    groundtruth, restart, absent and a few other attribute files to ``attribute/``, the
+    sequence lists to ``root_dir/biodrone_info.json`` (read by ``BioDrone`` instead of the
+    shipped one) and the manifest to ``index/{subset}.json``. Subsets generated in the same
+    ``root_dir`` are added to the sequence lists, with new sequence names.
+
+    Args:
+        root_dir (string): Root directory of the synthetic dataset.
+        subset (string, optional): ``train``, ``val`` or ``test``.
+        num_seqs (integer, optional): Number of sequences.
+        frame_num (integer or tuple, optional): Number of frames of every sequence, or the
+            (min, max) range of a random number of frames.
+        width (integer, optional): Width of the frames.
+        height (integer, optional): Height of the frames.
+        target_size (tuple, optional): (min, max) range of the initial target size.
+        speed (float, optional): Mean speed of the target in pixels per frame.
+        scale_change (float, optional): Standard deviation of the relative size change per frame.
+        absent_ratio (float, optional): Ratio of frames where the target is occluded.
+        restart_interval (integer, optional): Interval of the frames where trackers can be
+            restarted in the ``restart`` mode.
+        quality (integer, optional): JPEG quality of the frames.
+        num_workers (integer, optional): Number of writing processes, the number of cores
+            when ``None``.
+        seed (integer, optional): Random seed, the same arguments give the same dataset.
+
+    Returns:
+        list: Names of the generated sequences.
+    """
+    rng = np.random.RandomState(seed)
+    if np.isscalar(frame_num):
+        frame_nums = np.full(num_seqs, frame_num, dtype=int)
+    else:
+        frame_nums = rng.randint(frame_num[0], frame_num[1] + 1, num_seqs)
+    motion = {'target_size': target_size, 'speed': speed, 'scale_change': scale_change, 'absent_ratio': absent_ratio}
+
+    info_path = os.path.join(root_dir, 'biodrone_info.json')
+    if os.path.isfile(info_path):
+        with open(info_path, 'r', encoding='utf-8') as f:
+            info = json.load(f)
+    else:
+        info = {key: {'train': [], 'val': [], 'test': []} for key in ['competition', 'all']}
+    first = sum(len(seq_names) for seq_names in info['all'].values()) + 1
+    digits = max(3, len(str(first + num_seqs - 1)))
+    seq_names = [str(first + s).zfill(digits) for s in range(num_seqs)]
+
+    for dirname in ['groundtruth', 'restart', 'absent', 'fast_motion', 'small_target']:
+        makedir(os.path.join(root_dir, 'attribute', dirname))
+    makedir(os.path.join(root_dir, 'data', subset))
+
+    print('Generating %d synthetic sequences (%d frames, %dx%d) in %s...' % (
+        num_seqs, frame_nums.sum(), width, height, root_dir))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=num_workers) as executor:
+        futures = [executor.submit(_write_sequence, root_dir, subset, seq_name, int(frame_nums[s]), width, height,
+                                   motion, restart_interval, quality, seed * 100003 + first + s)
+                   for s, seq_name in enumerate(seq_names)]
+        for s, future in enumerate(concurrent.futures.as_completed(futures)):
+            print('--Sequence %d/%d: %s written' % (s + 1, num_seqs, future.result()))
+
+    for key in ['competition', 'all']:
+        info[key][subset] = info[key][subset] + seq_names
+    with open(info_path, 'w', encoding='utf-8') as f:
+        json.dump(info, f)
+
+    verify(root_dir, subset)
+    return seq_names
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate a synthetic dataset in the BioDrone format.')
+    parser.add_argument('--root_dir', type=str, help='the root directory of the synthetic dataset', required=True)
+    parser.add_argument('--subset', type=str, nargs='+', help='the subsets to generate', default=['val'])
+    parser.add_argument('--num_seqs', type=int, help='the number of sequences per subset', default=10)
+    parser.add_argument('--frame_num', type=int, nargs='+', help='the number of frames, or its min and max', default=[100, 300])
+    parser.add_argument('--resolution', type=int, nargs=2, help='the width and height of the frames', default=[640, 360])
+    parser.add_argument('--target_size', type=int, nargs=2, help='the min and max initial target size', default=[16, 64])
+    parser.add_argument('--speed', type=float, help='the mean target speed in pixels per frame', default=4.)
+    parser.add_argument('--scale_change', type=float, help='the relative size change per frame', default=0.01)
+    parser.add_argument('--absent_ratio', type=float, help='the ratio of occluded frames', default=0.05)
+    parser.add_argument('--restart_interval', type=int, help='the interval of the restart frames', default=50)
+    parser.add_argument('--num_workers', type=int, help='the number of writing processes', default=None)
+    parser.add_argument('--seed', type=int, help='the random seed', default=0)
+    args = parser.parse_args()
+
+    frame_num = args.frame_num[0] if len(args.frame_num) == 1 else tuple(args.frame_num)
+    for k, subset in enumerate(args.subset):
+        generate(args.root_dir, subset, args.num_seqs, frame_num, args.resolution[0], args.resolution[1],
+                 tuple(args.target_size), args.speed, args.scale_change, args.absent_ratio,
+                 args.restart_interval, num_workers=args.num_workers, seed=args.seed + k)
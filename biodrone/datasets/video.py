@@ -0,0 +1,249 @@
+from __future__ import absolute_import, print_function
+
+import os
+import glob
+import time
+import threading
+import argparse
+import cv2 as cv
+import six
+
+from six.moves import queue
+
+
+VIDEO_EXTENSIONS = ['.mp4', '.avi', '.mkv']
+
+
+def video_file(root_dir, subset, seq_name):
+    r"""Path of the video of a sequence, ``None`` if there is no video."""
+    for ext in VIDEO_EXTENSIONS:
+        filename = os.path.join(root_dir, 'video', subset, 'frame_{}{}'.format(seq_name, ext))
+        if os.path.isfile(filename):
+            return filename
+    return None
+
+
+class VideoSequence(object):
+    r"""Frames of a sequence decoded from a video file.
+
+    Iterating over the sequence decodes the frames sequentially in a background thread,
+    and checks that the video holds exactly ``frame_num`` frames. Indexing reads forward
+    from the current position, and only seeks when going backward.
+
+    Args:
+        filename (string): Path of the video file.
+        frame_num (integer, optional): Expected number of frames, i.e. the number of
+            groundtruth rows. The frame count of the container is used when ``None``.
+        prefetch (integer): Number of frames decoded ahead while iterating.
+    """
+    def __init__(self, filename, frame_num=None, prefetch=16):
+        super(VideoSequence, self).__init__()
+        self.filename = filename
+        self.prefetch = prefetch
+
+        cap = cv.VideoCapture(filename)
+        if not cap.isOpened():
+            raise Exception('Cannot open video {}.'.format(filename))
+        container_num = int(cap.get(cv.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        if frame_num is not None and container_num > 0 and container_num != frame_num:
+            raise Exception('Video {} has {} frames, expected {}.'.format(filename, container_num, frame_num))
+        self.frame_num = frame_num if frame_num is not None else container_num
+
+        self._cap = None # capture used for indexing
+        self._pos = 0 # index of the next frame of self._cap
+
+    def __reduce__(self):
+        # reopened when sent to another process (e.g. a tracker server)
+        return (VideoSequence, (self.filename, self.frame_num, self.prefetch))
+
+    def __len__(self):
+        return self.frame_num
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError('Frame {} out of range.'.format(index))
+        if self._cap is None or index < self._pos:
+            if self._cap is not None:
+                self._cap.release()
+            self._cap = cv.VideoCapture(self.filename)
+            self._pos = 0
+            if index > 0:
+                self._cap.set(cv.CAP_PROP_POS_FRAMES, index)
+                self._pos = int(self._cap.get(cv.CAP_PROP_POS_FRAMES))
+        while self._pos < index:
+            self._cap.grab()
+            self._pos += 1
+        ret, frame = self._cap.read()
+        if not ret:
+            raise Exception('Cannot decode frame {} of video {}.'.format(index, self.filename))
+        self._pos += 1
+        return frame
+
+    def __iter__(self):
+        frames = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    frames.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+
+        def decode():
+            cap = cv.VideoCapture(self.filename)
+            count = 0
+            try:
+                while not stop.is_set():
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    count += 1
+                    put(frame)
+            finally:
+                cap.release()
+                # the number of decoded frames marks the end of the video
+                put(count)
+
+        thread = threading.Thread(target=decode)
+        thread.daemon = True
+        thread.start()
+        try:
+            while True:
+                frame = frames.get()
+                if isinstance(frame, six.integer_types):
+                    count = frame
+                    break
+                yield frame
+        finally:
+            stop.set()
+            thread.join()
+
+        if count != self.frame_num:
+            raise Exception('Decoded {} frames from video {}, expected {}.'.format(count, self.filename, self.frame_num))
+
+    def close(self):
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+
+def convert(root_dir, subset, fourcc='MJPG', ext='.avi', fps=30, overwrite=False):
+    r"""Convert the JPEG directories of a BioDrone subset to one video per sequence.
+
+    The videos are written to ``root_dir/video/{subset}/``, where ``BioDrone`` reads
+    them when a sequence is neither packed nor extracted.
+
+    Args:
+        root_dir (string): Root directory of the BioDrone dataset.
+        subset (string): ``train``, ``val`` or ``test``.
+        fourcc (string): Codec of the videos, e.g. ``MJPG`` or ``avc1`` (H.264, depending
+            on the OpenCV build).
+        ext (string): Extension of the videos.
+        fps (float): Frame rate stored in the videos.
+        overwrite (boolean): Convert the sequences that already have a video.
+    """
+    seq_dirs = sorted(glob.glob(os.path.join(root_dir, 'data', subset, 'frame_*')))
+    video_dir = os.path.join(root_dir, 'video', subset)
+    if not os.path.isdir(video_dir):
+        os.makedirs(video_dir)
+
+    for s, seq_dir in enumerate(seq_dirs):
+        seq_name = os.path.basename(seq_dir)[len('frame_'):]
+        filename = os.path.join(video_dir, 'frame_{}{}'.format(seq_name, ext))
+        if os.path.isfile(filename) and not overwrite:
+            print('  Found video, skipping ', seq_name)
+            continue
+        img_files = sorted(glob.glob(os.path.join(seq_dir, '*.jpg')))
+        height, width = cv.imread(img_files[0]).shape[:2]
+
+        # write to a temporary file first, so that a video is either complete or absent
+        tmp_file = os.path.join(video_dir, 'tmp_frame_{}{}'.format(seq_name, ext))
+        writer = cv.VideoWriter(tmp_file, cv.VideoWriter_fourcc(*fourcc), fps, (width, height))
+        for img_file in img_files:
+            writer.write(cv.imread(img_file))
+        writer.release()
+
+        # exact frame count check
+        VideoSequence(tmp_file, len(img_files))
+        os.replace(tmp_file, filename)
+        print('--Sequence %d/%d: %s converted (%d frames)' % (s + 1, len(seq_dirs), seq_name, len(img_files)))
+
+
+def _read_bytes():
+    # bytes read by the process so far (Linux only)
+    try:
+        with open('/proc/self/io') as f:
+            for line in f:
+                if line.startswith('rchar'):
+                    return int(line.split()[1])
+    except IOError:
+        pass
+    return None
+
+
+def benchmark(root_dir, subset, seq_names=None):
+    r"""Compare the frames/s and the bytes read of the JPEG and video backends.
+
+    Args:
+        root_dir (string): Root directory of the BioDrone dataset.
+        subset (string): ``train``, ``val`` or ``test``.
+        seq_names (list, optional): Sequences to read, all converted sequences when ``None``.
+
+    Returns:
+        dict: ``{'jpeg': {...}, 'video': {...}}`` with the frames, seconds, frames/s and
+            bytes read (``None`` when unavailable) of each backend.
+    """
+    if seq_names is None:
+        seq_names = sorted([os.path.splitext(f)[0][len('frame_'):]
+                            for f in os.listdir(os.path.join(root_dir, 'video', subset))
+                            if f.startswith('frame_')])
+
+    def measure(read_frames):
+        frames = 0
+        start_bytes = _read_bytes()
+        start = time.time()
+        for seq_name in seq_names:
+            for frame in read_frames(seq_name):
+                frames += 1
+        duration = time.time() - start
+        end_bytes = _read_bytes()
+        return {
+            'frames': frames,
+            'seconds': duration,
+            'fps': frames / duration if duration > 0 else -1,
+            'bytes_read': end_bytes - start_bytes if start_bytes is not None else None}
+
+    def read_jpeg(seq_name):
+        for img_file in sorted(glob.glob(os.path.join(root_dir, 'data', subset, 'frame_{}'.format(seq_name), '*.jpg'))):
+            yield cv.imread(img_file)
+
+    def read_video(seq_name):
+        return VideoSequence(video_file(root_dir, subset, seq_name))
+
+    results = {'jpeg': measure(read_jpeg), 'video': measure(read_video)}
+    for backend, result in results.items():
+        print('%-6s %8d frames %8.2f s %8.1f frames/s %s bytes read' % (
+            backend, result['frames'], result['seconds'], result['fps'], result['bytes_read']))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert BioDrone sequences to videos and benchmark the video backend.')
+    parser.add_argument('command', type=str, choices=['convert', 'benchmark'])
+    parser.add_argument('--root_dir', type=str, help='the root directory of BioDrone', required=True)
+    parser.add_argument('--subset', type=str, help='the subset to convert or read', default='train')
+    parser.add_argument('--fourcc', type=str, help='the codec of the videos', default='MJPG')
+    parser.add_argument('--ext', type=str, help='the extension of the videos', default='.avi')
+    parser.add_argument('--fps', type=float, help='the frame rate of the videos', default=30)
+    parser.add_argument('--overwrite', action='store_true', help='convert the converted sequences')
+    args = parser.parse_args()
+
+    if args.command == 'convert':
+        convert(args.root_dir, args.subset, args.fourcc, args.ext, args.fps, args.overwrite)
+    else:
+        benchmark(args.root_dir, args.subset)
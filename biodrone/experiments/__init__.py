@@ -1,3 +1,5 @@
 from __future__ import absolute_import
 
 from .biodrone import ExperimentBioDrone
+from .online import CurveAccumulator
+from .multi import MultiTrackerRunner
@@ -0,0 +1,175 @@
+from __future__ import absolute_import, division, print_function
+
+import os
+import json
+import time
+import argparse
+import traceback
+import multiprocessing
+import numpy as np
+
+from six.moves.queue import Empty
+
+from .benchmark import synthetic_sequence, dataset_sequence, _load_tracker, _environment
+from .scheduler import apply_profile
+
+
+def _sequence(sequence):
+    # ('synthetic', frame_num, width, height) or ('dataset', root_dir, subset, seq_name)
+    if sequence[0] == 'dataset':
+        return dataset_sequence(*sequence[1:])
+    return synthetic_sequence(*sequence[1:])
+
+
+def _calibration_worker(spec, net_path, sequence, num_frames, warmup, torch_threads, cv_threads, barrier, results):
+    try:
+        apply_profile({'torch_threads': torch_threads, 'cv_threads': cv_threads})
+        frames, box = _sequence(sequence)
+        tracker = _load_tracker(spec, net_path)
+        tracker.init(frames[0], box)
+        for f in range(warmup):
+            tracker.update(frames[1 + f % (len(frames) - 1)])
+
+        # all the processes are measured at the same time
+        barrier.wait()
+        start = time.time()
+        for f in range(num_frames):
+            tracker.update(frames[1 + (warmup + f) % (len(frames) - 1)])
+        results.put((start, time.time(), None))
+    except Exception:
+        results.put((None, None, traceback.format_exc()))
+
+
+def measure(spec, net_path, sequence, num_workers, torch_threads, cv_threads, num_frames=100, warmup=10):
+    r"""Measure the total throughput of ``num_workers`` tracker processes running at the same time.
+
+    Every process sets its torch and OpenCV thread counts, creates the tracker and decodes the
+    sequence, then all of them update their tracker on ``num_frames`` frames after ``warmup``
+    frames. The processes are spawned, so that the thread pools of the parent are not inherited.
+
+    Returns:
+        float: The total frames/s of the processes, from the first start to the last end.
+    """
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(num_workers)
+    results = context.Queue()
+    workers = [context.Process(target=_calibration_worker, args=(
+        spec, net_path, sequence, num_frames, warmup, torch_threads, cv_threads, barrier, results))
+        for _ in range(num_workers)]
+    for worker in workers:
+        worker.start()
+
+    spans = []
+    while len(spans) < num_workers:
+        try:
+            start, end, error = results.get(timeout=1)
+        except Empty:
+            if not any(worker.is_alive() for worker in workers):
+                break
+            continue
+        if error is not None:
+            for worker in workers:
+                worker.terminate()
+            raise Exception('Calibration failed:\n{}'.format(error))
+        spans.append((start, end))
+    for worker in workers:
+        worker.join()
+    if len(spans) < num_workers:
+        raise Exception('Calibration failed, {} processes did not finish.'.format(num_workers - len(spans)))
+
+    duration = max(end for _, end in spans) - min(start for start, _ in spans)
+    return num_workers * num_frames / duration
+
+
+def _powers_of_two(n):
+    values = [1]
+    while values[-1] * 2 <= n:
+        values.append(values[-1] * 2)
+    if values[-1] != n:
+        values.append(n)
+    return values
+
+
+def autotune(spec, net_path=None, sequence=('synthetic', 60, 1280, 720), worker_counts=None, thread_counts=None,
+             num_frames=100, warmup=10):
+    r"""Find the process count and thread counts giving the best total throughput of a tracker on this node.
+
+    Every configuration (process count, torch threads, OpenCV threads) is measured with
+    ``measure``. By default, the process counts and torch thread counts are the powers of two
+    up to the number of cores, without more busy threads than cores, and the OpenCV thread count
+    is either 1 or the torch thread count. All the given counts are tried.
+
+    Args:
+        spec (string): The tracker, as ``module:Class``.
+        net_path (string, optional): The weights of the tracker.
+        sequence (tuple, optional): ``('synthetic', frame_num, width, height)`` or
+            ``('dataset', root_dir, subset, seq_name)``.
+        worker_counts (list, optional): Process counts to try.
+        thread_counts (list, optional): Torch thread counts to try.
+
+    Returns:
+        dict: The profile, with the best ``num_workers``, ``torch_threads`` and ``cv_threads``,
+            its ``throughput_fps``, the environment and the results of all the configurations.
+    """
+    cpu_count = os.cpu_count()
+    # the oversubscribed configurations are only tried when asked for
+    oversubscribe = worker_counts is not None or thread_counts is not None
+    if worker_counts is None:
+        worker_counts = _powers_of_two(cpu_count)
+    if thread_counts is None:
+        thread_counts = _powers_of_two(cpu_count)
+
+    configs = []
+    for num_workers in worker_counts:
+        for torch_threads in thread_counts:
+            if num_workers * torch_threads > cpu_count and not oversubscribe:
+                continue
+            for cv_threads in sorted(set([1, torch_threads])):
+                configs.append((num_workers, torch_threads, cv_threads))
+
+    results = []
+    for c, (num_workers, torch_threads, cv_threads) in enumerate(configs):
+        fps = measure(spec, net_path, sequence, num_workers, torch_threads, cv_threads, num_frames, warmup)
+        results.append({
+            'num_workers': num_workers,
+            'torch_threads': torch_threads,
+            'cv_threads': cv_threads,
+            'throughput_fps': fps})
+        print('--Configuration %d/%d: %d processes x %d torch threads, %d OpenCV threads: %.1f frames/s' % (
+            c + 1, len(configs), num_workers, torch_threads, cv_threads, fps))
+
+    best = results[int(np.argmax([r['throughput_fps'] for r in results]))]
+    profile = dict(best)
+    profile.update({
+        'tracker': spec,
+        'sequence': list(sequence),
+        'environment': _environment(),
+        'results': results})
+    print('Best configuration: %d processes x %d torch threads, %d OpenCV threads, %.1f frames/s' % (
+        best['num_workers'], best['torch_threads'], best['cv_threads'], best['throughput_fps']))
+    return profile
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Find the process and thread counts giving the best throughput of a tracker on this node.')
+    parser.add_argument('--tracker', type=str, help='the tracker, as module:Class', required=True)
+    parser.add_argument('--net_path', type=str, help='the weights of the tracker', default=None)
+    parser.add_argument('--output', type=str, help='the JSON file of the profile', required=True)
+    parser.add_argument('--workers', type=int, nargs='+', help='the process counts to try', default=None)
+    parser.add_argument('--threads', type=int, nargs='+', help='the torch thread counts to try', default=None)
+    parser.add_argument('--num_frames', type=int, help='the number of measured frames per process', default=100)
+    parser.add_argument('--warmup', type=int, help='the number of warm-up frames', default=10)
+    parser.add_argument('--resolution', type=int, nargs=2, help='the width and height of the synthetic frames', default=[1280, 720])
+    parser.add_argument('--root_dir', type=str, help='the root directory of BioDrone, to use a real sequence', default=None)
+    parser.add_argument('--subset', type=str, help='the subset of the real sequence', default='val')
+    parser.add_argument('--seq_name', type=str, help='the name of the real sequence', default=None)
+    args = parser.parse_args()
+
+    if args.root_dir is not None:
+        sequence = ('dataset', args.root_dir, args.subset, args.seq_name)
+    else:
+        sequence = ('synthetic', 60, args.resolution[0], args.resolution[1])
+    profile = autotune(args.tracker, args.net_path, sequence, args.workers, args.threads, args.num_frames, args.warmup)
+    with open(args.output, 'w') as f:
+        json.dump(profile, f, indent=4)
+    print('Profile saved at', args.output)
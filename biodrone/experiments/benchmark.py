@@ -0,0 +1,567 @@
+from __future__ import absolute_import, division, print_function
+
+import os
+import sys
+import json
+import time
+import socket
+import platform
+import argparse
+import importlib
+import traceback
+import subprocess
+import multiprocessing
+import numpy as np
+import cv2 as cv
+import torch
+
+from ..utils.telemetry import ResourceMonitor, process_stats
+
+
+def synthetic_sequence(frame_num=300, width=1280, height=720, target_size=40, seed=0):
+    r"""Generate an in-memory sequence with a textured target moving over a textured background.
+
+    Returns:
+        tuple: (frames, box), the list of BGR frames and the 1-indexed [x, y, w, h] box of the
+            target in the first frame.
+    """
+    rng = np.random.RandomState(seed)
+    background = cv.GaussianBlur(rng.randint(0, 256, (height, width, 3)).astype(np.uint8), (0, 0), 3)
+    target = rng.randint(0, 256, (target_size, target_size, 3)).astype(np.uint8)
+
+    # smooth random walk of the target
+    steps = np.cumsum(rng.randn(frame_num, 2) * 3, axis=0)
+    steps -= steps.min(axis=0)
+    span = np.maximum(steps.max(axis=0), 1)
+    xs = (steps[:, 0] / span[0] * (width - target_size - 1)).astype(int)
+    ys = (steps[:, 1] / span[1] * (height - target_size - 1)).astype(int)
+
+    frames = []
+    for x, y in zip(xs, ys):
+        frame = background.copy()
+        frame[y:y + target_size, x:x + target_size] = target
+        frames.append(frame)
+    return frames, np.array([xs[0] + 1, ys[0] + 1, target_size, target_size], dtype=float)
+
+
+def dataset_sequence(root_dir, subset, seq_name):
+    r"""Load a BioDrone sequence in memory, so that disk I/O and decoding are not measured."""
+    from ..datasets import BioDrone
+    from ..utils.ioutils import load_image
+
+    img_files, anno, _ = BioDrone(root_dir, subset)[seq_name]
+    return [load_image(img_file) for img_file in img_files], anno[0]
+
+
+def _environment():
+    env = {
+        'hostname': socket.gethostname(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'torch': torch.__version__,
+        'opencv': cv.__version__,
+        'torch_threads': torch.get_num_threads(),
+        'opencv_threads': cv.getNumThreads(),
+        'cuda': torch.cuda.get_device_name(0) if torch.cuda.is_available() else None}
+    try:
+        env['commit'] = subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+            cwd=os.path.dirname(os.path.realpath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        env['commit'] = None
+    return env
+
+
+def benchmark_tracker(tracker, frames, box, num_frames=500, warmup=50, num_threads=1):
+    r"""Measure the per-frame latency of a tracker on in-memory frames.
+
+    The tracker is initialized on the first frame and updated on ``warmup`` frames that are not
+    measured, then on ``num_frames`` measured frames (cycling over the sequence). The torch and
+    OpenCV thread counts are fixed to ``num_threads``, and CUDA is synchronized after every frame.
+    The memory of the tracker is the peak RSS sampled by a ``ResourceMonitor`` during the benchmark,
+    minus the RSS before it (so the frames and the trackers benchmarked before are not counted).
+
+    Args:
+        tracker (Tracker or callable): The tracker, or a function creating it, whose construction
+            is then included in the memory.
+        frames (list): Decoded frames, e.g. from ``synthetic_sequence`` or ``dataset_sequence``.
+        box (numpy.ndarray): Initial [x, y, w, h] box of the target.
+
+    Returns:
+        dict: The latency percentiles (ms), throughput (frames/s), initialization time (ms),
+            resident memory added by the tracker (MB) and the environment of the benchmark.
+    """
+    torch.set_num_threads(num_threads)
+    cv.setNumThreads(num_threads)
+    cuda = torch.cuda.is_available()
+
+    def timed(func, *args):
+        start = time.perf_counter()
+        func(*args)
+        if cuda:
+            torch.cuda.synchronize()
+        return time.perf_counter() - start
+
+    rss = process_stats()['rss']
+    monitor = ResourceMonitor(0.2)
+    monitor.start()
+    if callable(tracker):
+        tracker = tracker()
+
+    init_time = timed(tracker.init, frames[0], box)
+    for f in range(warmup):
+        tracker.update(frames[1 + f % (len(frames) - 1)])
+
+    latencies = np.zeros(num_frames)
+    start = time.perf_counter()
+    for f in range(num_frames):
+        latencies[f] = timed(tracker.update, frames[1 + (warmup + f) % (len(frames) - 1)])
+    duration = time.perf_counter() - start
+    resources = monitor.stop()
+
+    latencies_ms = latencies * 1000
+    result = {
+        'tracker': tracker.name,
+        'config': {
+            'num_frames': num_frames,
+            'warmup': warmup,
+            'num_threads': num_threads,
+            'resolution': list(frames[0].shape[:2][::-1])},
+        'environment': _environment(),
+        'init_ms': init_time * 1000,
+        'latency_ms': {
+            'mean': float(latencies_ms.mean()),
+            'p50': float(np.percentile(latencies_ms, 50)),
+            'p90': float(np.percentile(latencies_ms, 90)),
+            'p99': float(np.percentile(latencies_ms, 99)),
+            'max': float(latencies_ms.max())},
+        'throughput_fps': num_frames / duration,
+        'rss_mb': resources['peak_rss_mb'] - rss / 2. ** 20 if rss is not None and resources['peak_rss_mb'] is not None else None}
+    if cuda:
+        result['peak_cuda_mb'] = resources['torch_peak_mb']
+
+    print('%-12s p50 %7.2f ms  p90 %7.2f ms  p99 %7.2f ms  %7.1f frames/s  RSS %s MB' % (
+        tracker.name, result['latency_ms']['p50'], result['latency_ms']['p90'], result['latency_ms']['p99'],
+        result['throughput_fps'], '%.0f' % result['rss_mb'] if result['rss_mb'] is not None else '-'))
+    return result
+
+
+# metrics compared against a baseline, and whether larger values are better
+COMPARED_METRICS = [
+    (('latency_ms', 'p50'), False),
+    (('latency_ms', 'p90'), False),
+    (('latency_ms', 'p99'), False),
+    (('throughput_fps',), True),
+    (('rss_mb',), False)]
+
+
+def compare(baseline, results, threshold=0.1):
+    r"""Compare benchmark results with a baseline.
+
+    Args:
+        baseline (dict): Baseline results, by tracker name.
+        results (dict): New results, by tracker name.
+        threshold (float): Relative change flagged as a regression.
+
+    Returns:
+        list: The regressions, as (tracker, metric, baseline value, new value) tuples.
+    """
+    regressions = []
+    for name in sorted(results):
+        if not name in baseline:
+            print('%s: no baseline' % name)
+            continue
+        old, new = baseline[name], results[name]
+        for key in ['hostname', 'processor', 'torch_threads', 'opencv_threads', 'cuda']:
+            if old['environment'].get(key) != new['environment'].get(key):
+                print('%s: warning, %s differs from the baseline (%s, %s)' % (
+                    name, key, old['environment'].get(key), new['environment'].get(key)))
+        for keys, larger_is_better in COMPARED_METRICS:
+            old_value, new_value = old, new
+            for key in keys:
+                # metrics missing from older results are skipped
+                old_value = old_value.get(key) if old_value is not None else None
+                new_value = new_value.get(key) if new_value is not None else None
+            if old_value is None or new_value is None or old_value == 0:
+                continue
+            change = (new_value - old_value) / old_value
+            regression = change < -threshold if larger_is_better else change > threshold
+            print('%-12s %-18s %10.2f -> %10.2f (%+6.1f%%)%s' % (
+                name, '.'.join(keys), old_value, new_value, 100 * change, '  REGRESSION' if regression else ''))
+            if regression:
+                regressions.append((name, '.'.join(keys), old_value, new_value))
+    return regressions
+
+
+def synthetic_results(root_dir, save_dir, num_seqs=50, frame_num=1000, num_trackers=5, subset='val',
+                      width=1280, height=720, seed=0):
+    r"""Write synthetic annotations and tracking results to evaluate at any scale.
+
+    ``root_dir`` gets a ``biodrone_info.json`` listing ``num_seqs`` sequences, their groundtruth,
+    absent and restart files, and a manifest with their resolution, but no frames since the
+    evaluation does not read them. ``save_dir`` gets the results and times of ``num_trackers``
+    trackers of increasing noise, with drifts and empty boxes.
+
+    Returns:
+        list: The names of the trackers.
+    """
+    rng = np.random.RandomState(seed)
+    seq_names = ['%04d' % (s + 1) for s in range(num_seqs)]
+    tracker_names = ['Synthetic%03d' % k for k in range(num_trackers)]
+
+    info = {'all': {'train': [], 'val': [], 'test': []}}
+    info['all'][subset] = seq_names
+    for dirname in ['groundtruth', 'absent', 'restart']:
+        if not os.path.isdir(os.path.join(root_dir, 'attribute', dirname)):
+            os.makedirs(os.path.join(root_dir, 'attribute', dirname))
+    for name in tracker_names:
+        for dirname in [os.path.join(save_dir, 'results', name, subset), os.path.join(save_dir, 'time', name, subset)]:
+            if not os.path.isdir(dirname):
+                os.makedirs(dirname)
+    with open(os.path.join(root_dir, 'biodrone_info.json'), 'w') as f:
+        json.dump(info, f)
+
+    sequences = {}
+    for seq_name in seq_names:
+        # groundtruth moving smoothly in the frame
+        sizes = np.clip(20 + np.cumsum(rng.randn(frame_num, 2), axis=0), 4, 120)
+        centers = np.cumsum(rng.randn(frame_num, 2) * 4, axis=0)
+        centers = np.abs(np.mod(centers + [width / 2, height / 2], 2 * np.array([width, height])) - [width, height])
+        anno = np.round(np.concatenate((centers - sizes / 2, sizes), axis=1))
+        anno[:, :2] = np.clip(anno[:, :2], 0, [width - 1, height - 1])
+        absent = (rng.rand(frame_num) < 0.05).astype(int)
+        anno[absent == 1] = 0
+        np.savetxt(os.path.join(root_dir, 'attribute', 'groundtruth', '{}.txt'.format(seq_name)), anno, fmt='%d', delimiter=',')
+        np.savetxt(os.path.join(root_dir, 'attribute', 'absent', '{}.txt'.format(seq_name)), absent, fmt='%d')
+        np.savetxt(os.path.join(root_dir, 'attribute', 'restart', '{}.txt'.format(seq_name)), np.arange(0, frame_num, 50), fmt='%d')
+        sequences[seq_name] = {
+            'frame_num': frame_num,
+            'width': width,
+            'height': height,
+            'frames': ['%08d.jpg' % (f + 1) for f in range(frame_num)]}
+
+        for k, name in enumerate(tracker_names):
+            boxes = anno + rng.randn(frame_num, 4) * (2 + 2 * k)
+            # drifts to random boxes and empty boxes
+            drift = rng.rand(frame_num) < 0.02 * (1 + k % 5)
+            boxes[drift] = rng.rand(np.count_nonzero(drift), 4) * [width, height, 100, 100]
+            boxes[rng.rand(frame_num) < 0.01] = 0
+            record = '{}_{}_1.txt'.format(name, seq_name)
+            np.savetxt(os.path.join(save_dir, 'results', name, subset, record), np.rint(boxes), fmt='%d', delimiter=',')
+            np.savetxt(os.path.join(save_dir, 'time', name, subset, record), 0.01 + 0.005 * rng.rand(frame_num), fmt='%.8f')
+
+    if not os.path.isdir(os.path.join(root_dir, 'index')):
+        os.makedirs(os.path.join(root_dir, 'index'))
+    with open(os.path.join(root_dir, 'index', '{}.json'.format(subset)), 'w') as f:
+        json.dump({'subset': subset, 'sequences': sequences}, f)
+    return tracker_names
+
+
+# evaluation stages timed by benchmark_evaluation
+EVALUATION_STAGES = ['_load_times', '_load_record', '_sequence_info', '_calc_metrics', '_calc_curves', 'plot_curves_']
+
+
+def benchmark_evaluation(root_dir, save_dir, tracker_names, subset='val', check_seqs=3):
+    r"""Time the stages of ``ExperimentBioDrone.report`` and check its metrics against the reference.
+
+    The methods of every stage are wrapped with timers for one ``report`` call (the per-sequence
+    prints are discarded), after removing the analysis and performance files of a previous run. The seq-wise scores of the first ``check_seqs`` sequences of the first
+    tracker are then recomputed with the reference implementations (per-frame normalized center
+    error, and the curves accumulated frame by frame by ``CurveAccumulator``), and must be equal.
+
+    Returns:
+        dict: The seconds, frames/s and share of every stage, the total seconds and the trackers/s.
+    """
+    from .biodrone import ExperimentBioDrone
+
+    experiment = ExperimentBioDrone(root_dir, save_dir, subset, 1)
+    seconds = dict((stage, 0.) for stage in EVALUATION_STAGES)
+
+    # report reuses the analysis files of a previous run, which would skip every stage
+    for name in tracker_names:
+        analysis_file = os.path.join(experiment.analysis_dir, subset, '{}_{}_{}.json'.format(name, subset, experiment.repetition))
+        if os.path.isfile(analysis_file):
+            os.remove(analysis_file)
+    report_file = os.path.join(experiment.report_dir, subset, tracker_names[0], 'performance_{}.json'.format(experiment.repetition))
+    if os.path.isfile(report_file):
+        os.remove(report_file)
+
+    def timed(stage, func):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                seconds[stage] += time.perf_counter() - start
+        return wrapper
+
+    for stage in EVALUATION_STAGES:
+        setattr(experiment, stage, timed(stage, getattr(experiment, stage)))
+
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            performance = experiment.report(tracker_names)
+        finally:
+            sys.stdout = stdout
+    total = time.perf_counter() - start
+
+    frame_num = sum(len(experiment._sequence_info(s)[0]) for s in range(len(experiment.dataset)))
+    # frames evaluated by every stage (the annotations are loaded once for all the trackers)
+    stage_frames = {stage: frame_num * len(tracker_names) for stage in EVALUATION_STAGES}
+    stage_frames['_sequence_info'] = frame_num
+    result = {
+        'sequences': len(experiment.dataset),
+        'frames': frame_num,
+        'trackers': len(tracker_names),
+        'total_seconds': total,
+        'trackers_per_s': len(tracker_names) / total,
+        'frames_per_s': frame_num * len(tracker_names) / total,
+        'stages': {}}
+    seconds['other'] = total - sum(seconds.values())
+    for stage in EVALUATION_STAGES + ['other']:
+        result['stages'][stage.strip('_')] = {
+            'seconds': seconds[stage],
+            'share': seconds[stage] / total,
+            'frames_per_s': stage_frames[stage] / seconds[stage] if stage in stage_frames and seconds[stage] > 0 else None}
+
+    _check_reference(experiment, performance[tracker_names[0]], tracker_names[0], range(min(check_seqs, len(experiment.dataset))))
+
+    print('%d trackers x %d sequences x %d frames evaluated in %.2f s: %.2f trackers/s, %.0f frames/s' % (
+        len(tracker_names), len(experiment.dataset), frame_num, total, result['trackers_per_s'], result['frames_per_s']))
+    for stage, stage_result in result['stages'].items():
+        print('  %-14s %8.2f s %5.1f%% %s' % (stage, stage_result['seconds'], 100 * stage_result['share'],
+              '%12.0f frames/s' % stage_result['frames_per_s'] if stage_result['frames_per_s'] else ''))
+    return result
+
+
+def _check_reference(experiment, performance, tracker_name, seq_indices):
+    # recompute the seq-wise scores with the reference implementations
+    from ..utils.metrics import iou, diou, giou, center_error, _normalized_center_error_loop
+    from .online import CurveAccumulator, correct_boxes
+
+    for s in seq_indices:
+        seq_name = experiment.dataset.seq_names[s]
+        anno, absent, bound = experiment._sequence_info(s)
+        record_file = os.path.join(experiment.result_dir, tracker_name, experiment.subset,
+                                   '{}_{}_{}.txt'.format(tracker_name, seq_name, experiment.repetition))
+        boxes = correct_boxes(np.loadtxt(record_file, delimiter=',', ndmin=2), bound)
+
+        keep = absent == 0
+        norm_center_errors, flags = _normalized_center_error_loop(boxes, anno, bound)
+        curves = experiment._calc_curves(
+            iou(boxes, anno)[keep], diou(boxes, anno)[keep], giou(boxes, anno)[keep],
+            center_error(boxes, anno)[keep], norm_center_errors[keep])
+
+        accumulator = CurveAccumulator(anno, absent, bound, experiment.nbins_iou, experiment.nbins_ce)
+        for box in boxes:
+            accumulator.update(box)
+        online_curves = accumulator.curves()
+
+        scores = performance['seq_wise'][seq_name]
+        expected = {
+            'success_score_iou': np.nanmean(curves[0]),
+            'success_score_diou': np.nanmean(curves[1]),
+            'success_score_giou': np.nanmean(curves[2]),
+            'precision_score': curves[3][experiment.ce_threshold],
+            'norm_prec_score': np.nansum(flags[keep]) / len(flags[keep])}
+        for key, value in expected.items():
+            if not scores[key] == value:
+                raise Exception('Sequence {}: {} is {}, the reference gives {}.'.format(seq_name, key, scores[key], value))
+        for k, (curve, online_curve) in enumerate(zip(curves, online_curves[0])):
+            # the online curves are counts divided by the frame number instead of means
+            if not np.allclose(curve, online_curve, rtol=1e-12, atol=1e-12, equal_nan=True):
+                raise Exception('Sequence {}: curve {} accumulated online differs from the reference.'.format(seq_name, k))
+
+
+def _load_tracker(spec, net_path=None, shared_weights=False):
+    # "module:Class" of a tracker, e.g. tracker.siamfc:TrackerSiamFC
+    module_name, class_name = spec.split(':')
+    tracker_class = getattr(importlib.import_module(module_name), class_name)
+    if net_path is None:
+        return tracker_class()
+    if shared_weights:
+        return tracker_class(net_path=net_path, shared_weights=True)
+    return tracker_class(net_path=net_path)
+
+
+def _weights_worker(spec, net_path, shared, barrier, results):
+    from ..utils.telemetry import memory_stats
+
+    try:
+        torch.set_num_threads(1)
+        frames, box = synthetic_sequence(2, 640, 360)
+        # the tracker module is imported before measuring
+        importlib.import_module(spec.split(':')[0])
+        before = memory_stats()
+        start = time.perf_counter()
+        tracker = _load_tracker(spec, net_path, shared)
+        load_time = time.perf_counter() - start
+        # the first frames read all the weights
+        tracker.init(frames[0], box)
+        tracker.update(frames[1])
+        startup = time.perf_counter() - start
+
+        # the memory is measured while all the processes hold their tracker, the shared pages
+        # are then split between all of them in the PSS
+        barrier.wait()
+        after = memory_stats()
+        results.put(({'load_s': load_time, 'startup_s': startup,
+                      'memory': {k: after[k] - before[k] if after[k] is not None and before[k] is not None else None
+                                 for k in after}}, None))
+        barrier.wait()
+    except Exception:
+        results.put((None, traceback.format_exc()))
+
+
+def benchmark_weights(spec, net_path, num_workers=4, context=None):
+    r"""Measure the startup time and memory of tracker processes with private and shared weights.
+
+    ``num_workers`` processes create the tracker at the same time, first loading the weights
+    with ``torch.load`` in every process, then sharing them (see ``load_weights``, the weights
+    are loaded in this process before starting the workers). Every process measures the time
+    to create the tracker and to track its first two frames, and the memory it added, while all
+    of them are alive.
+
+    Args:
+        spec (string): The tracker, as ``module:Class``, with a ``shared_weights`` argument.
+        net_path (string): The weights of the tracker.
+        num_workers (integer, optional): Number of processes.
+        context (string, optional): ``fork``, ``spawn`` or ``forkserver``, the default
+            multiprocessing start method when ``None``.
+
+    Returns:
+        dict: For the ``private`` and ``shared`` weights, the mean and max startup seconds and
+            the total RSS, PSS and USS added by the processes in MB, then the PSS and startup
+            time ``saved``.
+    """
+    from ..utils.weights import share_weights
+
+    context = multiprocessing.get_context(context)
+    result = {
+        'tracker': spec,
+        'num_workers': num_workers,
+        'start_method': context.get_start_method(),
+        'weights_mb': os.path.getsize(net_path) / 2. ** 20}
+    for mode in ['private', 'shared']:
+        if mode == 'shared':
+            share_weights(net_path)
+        barrier = context.Barrier(num_workers)
+        results = context.Queue()
+        workers = [context.Process(target=_weights_worker, args=(spec, net_path, mode == 'shared', barrier, results))
+                   for _ in range(num_workers)]
+        for worker in workers:
+            worker.start()
+        stats = []
+        for _ in range(num_workers):
+            stat, error = results.get()
+            if error is not None:
+                barrier.abort()
+                for worker in workers:
+                    worker.terminate()
+                raise Exception('Worker failed:\n{}'.format(error))
+            stats.append(stat)
+        for worker in workers:
+            worker.join()
+
+        def total_mb(key):
+            values = [stat['memory'][key] for stat in stats]
+            return None if any([v is None for v in values]) else sum(values) / 2. ** 20
+
+        result[mode] = {
+            'load_s': float(np.mean([stat['load_s'] for stat in stats])),
+            'startup_s': float(np.mean([stat['startup_s'] for stat in stats])),
+            'startup_max_s': float(np.max([stat['startup_s'] for stat in stats])),
+            'rss_mb': total_mb('rss'),
+            'pss_mb': total_mb('pss'),
+            'uss_mb': total_mb('uss')}
+        print('%-8s weights: startup %.3f s (max %.3f s, load %.3f s), %d processes added RSS %s MB, PSS %s MB' % (
+            mode, result[mode]['startup_s'], result[mode]['startup_max_s'], result[mode]['load_s'], num_workers,
+            '%.1f' % result[mode]['rss_mb'] if result[mode]['rss_mb'] is not None else '-',
+            '%.1f' % result[mode]['pss_mb'] if result[mode]['pss_mb'] is not None else '-'))
+
+    private, shared = result['private'], result['shared']
+    result['saved'] = {
+        'startup_s': private['startup_s'] - shared['startup_s'],
+        'pss_mb': private['pss_mb'] - shared['pss_mb'] if private['pss_mb'] is not None and shared['pss_mb'] is not None else None}
+    print('Shared weights save %.3f s of startup per process and %s MB of memory over %d processes (weights %.1f MB)' % (
+        result['saved']['startup_s'], '%.1f' % result['saved']['pss_mb'] if result['saved']['pss_mb'] is not None else '-',
+        num_workers, result['weights_mb']))
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the speed of trackers and compare it with a baseline.')
+    subparsers = parser.add_subparsers(dest='command')
+    run_parser = subparsers.add_parser('run', help='benchmark trackers')
+    run_parser.add_argument('--tracker', type=str, nargs='+', help='the trackers, as module:Class', required=True)
+    run_parser.add_argument('--net_path', type=str, nargs='*', help='the weights of every tracker', default=None)
+    run_parser.add_argument('--output', type=str, help='the JSON file of the results', required=True)
+    run_parser.add_argument('--num_frames', type=int, help='the number of measured frames', default=500)
+    run_parser.add_argument('--warmup', type=int, help='the number of warm-up frames', default=50)
+    run_parser.add_argument('--num_threads', type=int, help='the torch and OpenCV threads', default=1)
+    run_parser.add_argument('--resolution', type=int, nargs=2, help='the width and height of the synthetic frames', default=[1280, 720])
+    run_parser.add_argument('--root_dir', type=str, help='the root directory of BioDrone, to use a real sequence', default=None)
+    run_parser.add_argument('--subset', type=str, help='the subset of the real sequence', default='val')
+    run_parser.add_argument('--seq_name', type=str, help='the name of the real sequence', default=None)
+    evaluate_parser = subparsers.add_parser('evaluate', help='benchmark the evaluation of synthetic results')
+    evaluate_parser.add_argument('--root_dir', type=str, help='the directory of the synthetic annotations', required=True)
+    evaluate_parser.add_argument('--save_dir', type=str, help='the directory of the synthetic results', required=True)
+    evaluate_parser.add_argument('--num_seqs', type=int, help='the number of sequences', default=50)
+    evaluate_parser.add_argument('--frame_num', type=int, help='the number of frames per sequence', default=1000)
+    evaluate_parser.add_argument('--num_trackers', type=int, help='the number of trackers', default=5)
+    evaluate_parser.add_argument('--output', type=str, help='the JSON file of the results', default=None)
+    weights_parser = subparsers.add_parser('weights', help='benchmark the startup and memory of workers with shared weights')
+    weights_parser.add_argument('--tracker', type=str, help='the tracker, as module:Class', required=True)
+    weights_parser.add_argument('--net_path', type=str, help='the weights of the tracker', required=True)
+    weights_parser.add_argument('--num_workers', type=int, help='the number of processes', default=4)
+    weights_parser.add_argument('--start_method', type=str, help='the multiprocessing start method', default=None)
+    weights_parser.add_argument('--output', type=str, help='the JSON file of the results', default=None)
+    compare_parser = subparsers.add_parser('compare', help='compare results with a baseline')
+    compare_parser.add_argument('baseline', type=str, help='the JSON file of the baseline')
+    compare_parser.add_argument('results', type=str, help='the JSON file of the results')
+    compare_parser.add_argument('--threshold', type=float, help='the relative change flagged as a regression', default=0.1)
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        if args.root_dir is not None:
+            frames, box = dataset_sequence(args.root_dir, args.subset, args.seq_name)
+        else:
+            frames, box = synthetic_sequence(width=args.resolution[0], height=args.resolution[1])
+        results = {}
+        for t, spec in enumerate(args.tracker):
+            net_path = args.net_path[t] if args.net_path else None
+            result = benchmark_tracker(lambda: _load_tracker(spec, net_path), frames, box,
+                                       args.num_frames, args.warmup, args.num_threads)
+            results[result['tracker']] = result
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+        print('Results saved at', args.output)
+    elif args.command == 'evaluate':
+        tracker_names = synthetic_results(args.root_dir, args.save_dir, args.num_seqs, args.frame_num, args.num_trackers)
+        result = benchmark_evaluation(args.root_dir, args.save_dir, tracker_names)
+        result['environment'] = _environment()
+        if args.output is not None:
+            with open(args.output, 'w') as f:
+                json.dump(result, f, indent=4)
+            print('Results saved at', args.output)
+    elif args.command == 'weights':
+        result = benchmark_weights(args.tracker, args.net_path, args.num_workers, args.start_method)
+        result['environment'] = _environment()
+        if args.output is not None:
+            with open(args.output, 'w') as f:
+                json.dump(result, f, indent=4)
+            print('Results saved at', args.output)
+    elif args.command == 'compare':
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        with open(args.results, 'r') as f:
+            results = json.load(f)
+        regressions = compare(baseline, results, args.threshold)
+        print('%d regression(s)' % len(regressions))
+        sys.exit(1 if len(regressions) > 0 else 0)
+    else:
+        parser.print_help()
@@ -1,20 +1,30 @@
 from __future__ import absolute_import, division, print_function
 
 import os
+import io
 import time
 import shutil
+import filecmp
+import glob
+import multiprocessing
+import zipfile
 import numpy as np
+from six.moves.queue import Empty
 
 import json
 import matplotlib.pyplot as plt
 import matplotlib
 
 from ..datasets import BioDrone
-from ..utils.metrics import center_error,normalized_center_error, iou, diou, giou
-from ..utils.ioutils import compress
+from ..utils.metrics import center_error,normalized_center_error, iou, diou, giou, latency_stats
+from ..utils.ioutils import compress, load_image
 from ..utils.help import makedir
-import cv2 as cv
-import pandas as pd
+from ..utils.workqueue import WorkQueue
+from ..utils.telemetry import ResourceMonitor
+from ..utils.weights import share_weights
+from .online import CurveAccumulator, correct_boxes, load_curves
+from .multi import MultiTrackerRunner
+from .scheduler import predict_costs, lpt_schedule, _schedule_worker, apply_profile, load_profile
 import seaborn as sns
 from collections import defaultdict
 
@@ -25,29 +35,42 @@ class ExperimentBioDrone(object):
         root_dir (string): 
             Root directory of BioDrone dataset where ``train``, ``val`` and ``test`` folders exist.
         save_dir (string): 
-            Save directory of BioDrone dataset to save the experiment results.
+            Save directory of BioDrone dataset to save the experiment results. When ``None``, nothing
+            is written to disk and only the in-memory ``evaluate`` API is available.
         subset (string): 
             Specify ``train``, ``val`` or ``test`` subset of BioDrone.
         repetition (int): 
             The num of repetition. To ensure the accuracy of the experimental results, it is generally repeated three times.
+        frame_cache (FrameCache, optional):
+            Persistent cache of the decoded frames, shared across repetitions and trackers.
     """
-    def __init__(self, root_dir, save_dir, subset, repetition):
+    def __init__(self, root_dir, save_dir, subset, repetition, frame_cache=None):
         super(ExperimentBioDrone, self).__init__()
         self.root_dir = root_dir
         self.subset = subset
-        self.dataset = BioDrone(root_dir, subset)
-        self.result_dir = os.path.join(save_dir, 'results') 
-        self.report_dir = os.path.join(save_dir, 'reports') 
-        self.time_dir = os.path.join(save_dir, 'time')
-        self.analysis_dir = os.path.join(save_dir, 'analysis')
-        self.img_dir = os.path.join(save_dir, 'image')
+        self.dataset = BioDrone(root_dir, subset, frame_cache)
         
         self.nbins_iou = 101 # set 101 points in drawing success plot
         self.nbins_ce = 401 # set 401 points in drawing original precision plot (the 401 is the top threshold value in calculating the PRE)
 
         self.ce_threshold = 20 # original precision plot selects 20 pixels as threshold
 
+        self.latency_budget = 1. / 30 # real-time budget of a frame in seconds (30 fps)
+        self.latency_bins = np.logspace(-5, 1, 61) # edges of the latency histograms in seconds (10 us to 10 s)
+
         self.repetition = repetition 
+        self._seq_infos = {} # cached annotations of the evaluated sequences
+
+        if save_dir is None:
+            return
+        self.result_dir = os.path.join(save_dir, 'results') 
+        self.report_dir = os.path.join(save_dir, 'reports') 
+        self.time_dir = os.path.join(save_dir, 'time')
+        self.telemetry_dir = os.path.join(save_dir, 'telemetry')
+        self.analysis_dir = os.path.join(save_dir, 'analysis')
+        self.img_dir = os.path.join(save_dir, 'image')
+        self.checkpoint_dir = os.path.join(save_dir, 'checkpoint')
+        self.queue_dir = os.path.join(save_dir, 'queue')
         makedir(save_dir)
         makedir(self.result_dir)
         makedir(self.report_dir)
@@ -56,71 +79,353 @@ class ExperimentBioDrone(object):
         makedir(self.img_dir)
         
 
-    def run(self, tracker, visualize, save_img, method):
+    def run(self, tracker, visualize, save_img, method, online_eval=False, fps=30, policy='drop', latency=None,
+            stride=1, seq_names=None, lazy_frames=False, checkpoint_interval=None, reuse_deterministic=True,
+            retime=False, distributed=False, poll_interval=30, warmup=0, telemetry=None, profile=None):
         """
         Run the tracker on BioDrone subset.
+        With ``online_eval``, the evaluation curves are accumulated while tracking and saved next to
+        the result file (not available on the ``test`` subset), so that ``report`` only aggregates them.
+        With ``method='realtime'``, frames are released at ``fps`` and the tracker is evaluated under
+        the real-time budget (see ``Tracker.track_realtime``) with the frame ``policy`` (``drop`` or ``queue``).
+        The ``latency`` is measured when ``None``, simulated when it is a number of seconds per frame,
+        or replayed from the time files of the OPE run when it is ``'offline'``.
+        With ``stride`` > 1, the tracker is only updated on every ``stride``-th frame and the other boxes are
+        interpolated (results saved under ``{tracker}_stride{stride}``), for cheap screening runs.
+        ``seq_names`` restricts the run to the given sequences.
+        With ``lazy_frames``, the tracker receives ``LazyFrame`` objects and trackers sampling a search
+        region (e.g. SiamFC, SiamRPN) decode the frames at reduced resolution when the region is downsampled.
+        With ``checkpoint_interval``, the tracking of a sequence is checkpointed every ``checkpoint_interval`` frames
+        under ``checkpoint/`` (the tracker must implement ``state_dict`` and ``load_state_dict``), and an interrupted
+        sequence resumes from its last checkpoint.
+        For a tracker with ``is_deterministic`` and a repetition other than the first, the first sequence with results
+        in repetition 1 is tracked again and compared with them. If they match, the results of repetition 1 are then
+        hard-linked (or copied) instead of tracking the other sequences again, unless ``reuse_deterministic`` is False.
+        With ``retime``, every sequence is still tracked to measure its times, and the boxes are checked against
+        repetition 1.
+        With ``distributed``, the sequences are claimed through lease files under ``save_dir/queue/`` (see ``WorkQueue``),
+        so that the same run can be launched on several nodes sharing ``save_dir``. Every worker returns once all the
+        sequences are tracked, polling every ``poll_interval`` seconds for those claimed by others, and takes over the
+        sequences of crashed workers once their leases are stale.
+        The update times are recorded in the time files, and the init times (first frame and restarts) in the
+        ``init_`` time files next to them. The times of the first ``warmup`` updates of every sequence are
+        recorded negated, to mark them as warm-up, and are excluded from the speed.
+        With ``telemetry`` (a sampling interval in seconds), the resource usage of the process while tracking every
+        sequence (CPU utilization, RSS, threads, disk reads, and the torch memory allocated on the CUDA device after
+        every frame) is recorded under ``telemetry/`` (see ``ResourceMonitor``), and summarized by ``report``.
+        With ``profile`` (a profile saved by ``autotune``, or its path), the torch and OpenCV thread counts of the profile
+        are set first.
+        ``tracker`` may also be a ``RemoteTracker``, which sends every sequence to the warm trackers of a long-lived
+        ``TrackerServer`` (see ``biodrone.experiments.server``).
         """
         print('Running tracker %s on BioDrone...' % tracker.name)
-
-        for s, (img_files, anno, restart_flag) in enumerate(self.dataset):
-            seq_name = self.dataset.seq_names[s] 
-            print('--Sequence %d/%d: %s' % (s + 1, len(self.dataset), seq_name))
-
-            print('  Repetition: %d'%self.repetition)
-            if method == None:
-                # tracking in OPE mechanism
-                record_name = tracker.name
-            else:
-                # tracking in R-OPE mechanism
-                record_name = '{}_{}'.format(tracker.name, method)
-
-            makedir(os.path.join(self.result_dir, record_name))
-            makedir(os.path.join(self.time_dir, record_name))
-
-            tracker_result_dir = os.path.join(self.result_dir, record_name, self.subset)
-            tracker_time_dir = os.path.join(self.time_dir, record_name, self.subset)
-
-            makedir(tracker_result_dir)                
-            makedir(tracker_time_dir)
-
-            # setting the dir for saving tracking result images
-            makedir( os.path.join(self.img_dir, record_name))
-            tracker_img_dir = os.path.join(self.img_dir, record_name, self.subset)
-            makedir(tracker_img_dir)
-            seq_result_dir = os.path.join(tracker_img_dir, seq_name)
-            makedir(seq_result_dir)
-
-            # setting the path for saving tracking result
-            record_file = os.path.join(tracker_result_dir, '%s_%s_%s.txt'%(record_name , seq_name , str(self.repetition)))
-
-            # setting the path for saving tracking result (restart position in R-OPE mechanism)
-            init_positions_file = os.path.join(tracker_result_dir, 'init_%s_%s_%s.txt'%(record_name , seq_name , str(self.repetition)))
-
-            # setting the path for saving tracking time 
-            time_file = os.path.join(tracker_time_dir, '%s_%s_%s.txt'%(record_name , seq_name , str(self.repetition)))
+        if profile is not None:
+            apply_profile(load_profile(profile))
+        frame_cache = self.dataset.frame_cache
+        if frame_cache is not None:
+            cache_stats = frame_cache.stats()
+
+        # results of repetition 1 reused for a deterministic tracker, once verified on a sequence
+        reuse = reuse_deterministic and tracker.is_deterministic and self.repetition != 1 and method != 'realtime'
+        verified = False
+
+        # sequences to track, claimed through lease files shared with the other workers when distributed
+        queue = WorkQueue(os.path.join(self.queue_dir, 'run')) if distributed else None
+        todo = [(s, seq_name) for s, seq_name in enumerate(self.dataset.seq_names)
+                if seq_names is None or seq_name in seq_names]
+        lease = None
+        try:
+            while len(todo) > 0:
+                waiting = [] # sequences claimed by other workers
+                for s, seq_name in todo:
+                    img_files, anno, restart_flag = self.dataset[s]
+                    print('--Sequence %d/%d: %s' % (s + 1, len(self.dataset), seq_name))
+
+                    print('  Repetition: %d'%self.repetition)
+                    record_name = self._record_name(tracker.name, method, stride, policy)
+                    record_file, init_positions_file, time_file, curve_file = self._record_files(record_name, seq_name)
+
+                    # setting the dir for saving tracking result images
+                    makedir( os.path.join(self.img_dir, record_name))
+                    tracker_img_dir = os.path.join(self.img_dir, record_name, self.subset)
+                    makedir(tracker_img_dir)
+                    seq_result_dir = os.path.join(tracker_img_dir, seq_name)
+                    makedir(seq_result_dir)
             
-            if os.path.exists(record_file):
-                print('  Found results, skipping ', seq_name)
+                    if os.path.exists(record_file):
+                        print('  Found results, skipping ', seq_name)
+                        continue
+
+                    if queue is not None:
+                        lease = queue.claim('%s_%s_%s_%s' % (record_name, self.subset, seq_name, self.repetition))
+                        if lease is None:
+                            print('  Claimed by another worker, skipping ', seq_name)
+                            waiting.append((s, seq_name))
+                            continue
+                        if os.path.exists(record_file):
+                            # completed by another worker in the meantime
+                            lease.release()
+                            lease = None
+                            continue
+
+                    source_files = None
+                    if reuse:
+                        source_files = self._record_files(record_name, seq_name, repetition=1)
+                        if not os.path.exists(source_files[0]):
+                            source_files = None
+                    if source_files is not None and verified and not retime:
+                        self._link_record(source_files + (self._init_time_file(source_files[2]),),
+                                          (record_file, init_positions_file, time_file, curve_file, self._init_time_file(time_file)))
+                        print('  Deterministic tracker, results of repetition 1 reused for', seq_name)
+                        if lease is not None:
+                            lease.release()
+                            lease = None
+                        continue
+
+                    checkpoint_file = None
+                    if checkpoint_interval is not None and method != 'realtime':
+                        checkpoint_dir = os.path.join(self.checkpoint_dir, record_name, self.subset)
+                        makedir(os.path.join(self.checkpoint_dir, record_name))
+                        makedir(checkpoint_dir)
+                        checkpoint_file = os.path.join(checkpoint_dir, '%s_%s_%s.pkl'%(record_name , seq_name , str(self.repetition)))
+
+                    accumulator = None
+                    if online_eval and self.subset != 'test':
+                        seq_anno, absent, bound = self._sequence_info(s)
+                        accumulator = CurveAccumulator(seq_anno, absent, bound, self.nbins_iou, self.nbins_ce)
+
+                    monitor = None
+                    if telemetry is not None:
+                        monitor = ResourceMonitor(telemetry)
+                        monitor.start()
+
+                    if method == None:
+                        # tracking in original OPE mechanism
+                        boxes, times = tracker.track(seq_name, img_files, anno, restart_flag, visualize, seq_result_dir, save_img, method, accumulator=accumulator, stride=stride, lazy=lazy_frames,
+                                                     checkpoint_file=checkpoint_file, checkpoint_interval=checkpoint_interval, warmup=warmup,
+                                                     record_memory=monitor is not None)
+                    elif method == 'realtime':
+                        # tracking under the real-time budget
+                        seq_latency = latency
+                        if latency == 'offline':
+                            offline_time_file = os.path.join(self.time_dir, tracker.name, self.subset, '%s_%s_%s.txt'%(tracker.name , seq_name , str(self.repetition)))
+                            # warm-up times are recorded negated
+                            seq_latency = np.abs(np.loadtxt(offline_time_file, ndmin=1)) if os.path.isfile(offline_time_file) else None
+                            if seq_latency is None:
+                                print('  No offline time found, measuring the latency')
+                            elif os.path.isfile(self._init_time_file(offline_time_file)):
+                                # the init time of the first frame is recorded apart from its update time
+                                seq_latency[0] += abs(np.loadtxt(self._init_time_file(offline_time_file), ndmin=1)[0])
+                        boxes, times = tracker.track_realtime(seq_name, img_files, anno, fps, policy, seq_latency)
+                        if accumulator is not None:
+                            for box in boxes:
+                                accumulator.update(box)
+                    elif method == 'restart':
+                        # tracking in novel R-OPE mechanism
+                        boxes, times, init_positions = tracker.track(seq_name, img_files, anno,  restart_flag, visualize, seq_result_dir, save_img, method, accumulator=accumulator, stride=stride, lazy=lazy_frames,
+                                                     checkpoint_file=checkpoint_file, checkpoint_interval=checkpoint_interval, warmup=warmup,
+                                                     record_memory=monitor is not None)
+                        # save the restart locations
+                        self._record_init_positions(init_positions_file, init_positions)
+
+                    if monitor is not None:
+                        self._record_telemetry(record_name, seq_name, monitor.stop(),
+                                               tracker.frame_memory if method != 'realtime' else None)
+                    self._record(record_file, time_file, boxes, times, tracker.init_times if method != 'realtime' else None)
+                    if accumulator is not None:
+                        accumulator.save(curve_file)
+                    if checkpoint_file is not None and os.path.isfile(checkpoint_file):
+                        os.remove(checkpoint_file)
+
+                    if source_files is not None:
+                        # check the determinism of the tracker against repetition 1
+                        same = filecmp.cmp(record_file, source_files[0], shallow=False)
+                        if method == 'restart':
+                            same = same and filecmp.cmp(init_positions_file, source_files[1], shallow=False)
+                        if same:
+                            verified = True
+                        else:
+                            print('  Results differ from repetition 1, the tracker is not deterministic')
+                            reuse = False
+
+                    if lease is not None:
+                        lease.release()
+                        lease = None
+
+                todo = waiting
+                if len(todo) > 0:
+                    # wait for the other workers, or for their leases to become stale
+                    print('Waiting for %d sequences claimed by other workers...' % len(todo))
+                    time.sleep(poll_interval)
+        finally:
+            if lease is not None:
+                lease.release()
+
+        if frame_cache is not None:
+            # hit/miss statistics of this run
+            stats = frame_cache.stats()
+            print('Frame cache: %d sequence hits, %d sequence misses, %d frame hits, %d frame misses, %d evictions, %.1f MB cached' % (
+                stats['hits'] - cache_stats['hits'], stats['misses'] - cache_stats['misses'],
+                stats['frame_hits'] - cache_stats['frame_hits'], stats['frame_misses'] - cache_stats['frame_misses'],
+                stats['evictions'] - cache_stats['evictions'], stats['size_bytes'] / 2. ** 20))
+
+
+    def run_multi(self, trackers, method, parallel=None, stride=1, seq_names=None):
+        """
+        Run several trackers on BioDrone subset, decoding every frame once for all of them.
+        The trackers are driven in lockstep (see ``MultiTrackerRunner``), one after another on each frame,
+        or concurrently on threads (``parallel='thread'``) or processes fed from shared memory (``parallel='process'``),
+        and the usual result, time and init files are written for each tracker.
+        """
+        print('Running trackers %s on BioDrone...' % ', '.join([tracker.name for tracker in trackers]))
+        runner = MultiTrackerRunner(trackers, parallel)
+        try:
+            for s, seq_name in enumerate(self.dataset.seq_names):
+                if seq_names is not None and not seq_name in seq_names:
+                    continue
+                print('--Sequence %d/%d: %s' % (s + 1, len(self.dataset), seq_name))
+                print('  Repetition: %d'%self.repetition)
+
+                files = [self._record_files(self._record_name(tracker.name, method, stride), seq_name) for tracker in trackers]
+                indices = [k for k in range(len(trackers)) if not os.path.exists(files[k][0])]
+                if len(indices) == 0:
+                    print('  Found results, skipping ', seq_name)
+                    continue
+
+                img_files, anno, restart_flag = self.dataset[s]
+                states = runner.track(seq_name, img_files, anno, restart_flag, method, stride, indices)
+
+                for k in indices:
+                    record_file, init_positions_file, time_file, _ = files[k]
+                    if method == 'restart':
+                        # save the restart locations
+                        self._record_init_positions(init_positions_file, states[k]['init_positions'])
+                    self._record(record_file, time_file, states[k]['boxes'], states[k]['times'], states[k]['init_times'])
+        finally:
+            runner.close()
+
+
+    def run_parallel(self, tracker_factory, num_workers, method, seq_names=None, tracker_name=None, stride=1, profile=None,
+                     weights=None):
+        r"""Run a tracker on the sequences in parallel processes, longest predicted sequences first.
+
+        The cost of every sequence without results is predicted from its number of frames, refined
+        with the time files of the previous runs of the tracker (see ``predict_costs``). The workers
+        pull the sequences in decreasing order of cost from a shared queue, so that the longest
+        sequences do not end up last. The predicted makespan is printed before the run, and the
+        utilization of the workers after it, and both are saved under ``reports/{subset}/``.
+
+        Args:
+            tracker_factory (callable): Function creating the tracker, called in every worker.
+            num_workers (integer): Number of worker processes, the one of ``profile`` when ``None``.
+            method (string): ``None`` or ``restart``.
+            seq_names (list, optional): Sequences to run, all when ``None``.
+            tracker_name (string, optional): Name of the tracker, to avoid creating one in the
+                main process to find its previous runs.
+            profile (dict or string, optional): Profile saved by ``autotune`` (or its path), whose
+                torch and OpenCV thread counts are set in every worker.
+            weights (string or list, optional): Weights loaded once in the main process before starting
+                the workers (see ``share_weights``), for a ``tracker_factory`` creating the tracker with
+                ``shared_weights=True``, so that the workers share them instead of loading private copies.
+
+        Returns:
+            dict: The schedule, with the predicted and measured costs, makespans and utilization.
+        """
+        if profile is not None:
+            profile = load_profile(profile)
+            if num_workers is None:
+                num_workers = profile['num_workers']
+        if weights is not None:
+            share_weights(weights)
+        if tracker_name is None:
+            tracker_name = tracker_factory().name
+        record_name = self._record_name(tracker_name, method, stride)
+
+        frame_nums = {}
+        time_files = {}
+        for s, seq_name in enumerate(self.dataset.seq_names):
+            if seq_names is not None and not seq_name in seq_names:
+                continue
+            if os.path.exists(self._record_files(record_name, seq_name)[0]):
+                continue
+            frame_nums[seq_name] = len(self.dataset[s][0])
+            time_files[seq_name] = []
+            for name in set([record_name, self._record_name(tracker_name, None, stride), self._record_name(tracker_name, 'restart', stride)]):
+                time_files[seq_name] += sorted(glob.glob(os.path.join(
+                    self.time_dir, name, self.subset, '%s_%s_*.txt' % (name, seq_name))))
+
+        costs, unit = predict_costs(frame_nums, time_files)
+        order, assignments, makespan = lpt_schedule(costs, num_workers)
+        print('Scheduling %d sequences of %s on %d workers, predicted makespan %.1f %s (%.1f %s in total)' % (
+            len(order), record_name, num_workers, makespan, unit, sum(costs.values()), unit))
+
+        tasks = multiprocessing.Queue()
+        results = multiprocessing.Queue()
+        for seq_name in order:
+            tasks.put(seq_name)
+        for _ in range(num_workers):
+            tasks.put(None)
+
+        start = time.time()
+        workers = []
+        for w in range(num_workers):
+            worker = multiprocessing.Process(target=_schedule_worker, args=(
+                self, tracker_factory, method, {'stride': stride}, w, tasks, results, profile))
+            worker.start()
+            workers.append(worker)
+
+        spans = {}
+        errors = []
+        while len(spans) < len(order):
+            try:
+                w, seq_name, seq_start, seq_end = results.get(timeout=1)
+            except Empty:
+                if not any(worker.is_alive() for worker in workers):
+                    break
+                continue
+            if seq_name is None:
+                errors.append(seq_start)
                 continue
+            spans[seq_name] = (w, seq_start - start, seq_end - start)
+        for worker in workers:
+            worker.join()
+        if len(spans) < len(order):
+            raise Exception('{} sequences not tracked, failed workers:\n{}'.format(len(order) - len(spans), '\n'.join(errors)))
+
+        duration = time.time() - start
+        busy = [sum(end - begin for k, begin, end in spans.values() if k == w) for w in range(num_workers)]
+        utilization = sum(busy) / (num_workers * duration) if duration > 0 else 0.
+        schedule = {
+            'record_name': record_name,
+            'num_workers': num_workers,
+            'unit': unit,
+            'predicted_costs': costs,
+            'predicted_makespan': makespan,
+            'sequences': {seq_name: {'worker': w, 'start': begin, 'end': end} for seq_name, (w, begin, end) in spans.items()},
+            'makespan': duration,
+            'busy': busy,
+            'utilization': utilization}
 
-            if method == None:
-                # tracking in original OPE mechanism
-                boxes, times = tracker.track(seq_name, img_files, anno, restart_flag, visualize, seq_result_dir, save_img, method)
-            elif method == 'restart':
-                # tracking in novel R-OPE mechanism
-                boxes, times, init_positions = tracker.track(seq_name, img_files, anno,  restart_flag, visualize, seq_result_dir, save_img, method)
-                # save the restart locations
-                f_init = open(init_positions_file, 'w')
-                for num in init_positions:
-                    f_init.writelines(str(num)+'\n')
-                f_init.close()
+        subset_report_dir = os.path.join(self.report_dir, self.subset)
+        makedir(subset_report_dir)
+        schedule_file = os.path.join(subset_report_dir, 'schedule_{}_{}.json'.format(record_name, self.repetition))
+        with open(schedule_file, 'w') as f:
+            json.dump(schedule, f, indent=4)
 
-            self._record(record_file, time_file, boxes, times)
+        print('Makespan %.1f s (predicted %.1f %s), utilization %.1f%%' % (duration, makespan, unit, 100 * utilization))
+        for w in range(num_workers):
+            print('  Worker %d: %d sequences, busy %.1f s (%.1f%%)' % (
+                w, sum(1 for k, _, _ in spans.values() if k == w), busy[w], 100 * busy[w] / duration if duration > 0 else 0))
+        print('Schedule saved at', schedule_file)
+        return schedule
 
 
-    def report(self, tracker_names):
+    def report(self, tracker_names, distributed=False, poll_interval=30):
         """
         Evaluate the tracker on BioDrone subset.
+        With ``distributed``, the trackers are claimed through lease files under ``save_dir/queue/`` so that several
+        workers sharing ``save_dir`` evaluate different trackers, and the performance file and plots are merged by one of
+        them once all the trackers are evaluated (the other workers poll every ``poll_interval`` seconds meanwhile).
         """
         assert isinstance(tracker_names, (list, tuple))
 
@@ -146,10 +451,10 @@ class ExperimentBioDrone(object):
                         dst_path = os.path.join(submission_dir, 'result',result[:-6]+'.txt')
                         print('Copy result to {}'.format(dst_path))
                         shutil.copyfile(src_path, dst_path)
-                for time in sorted(os.listdir(time_dir)):
-                    if time.endswith('_%s.txt'%self.repetition):
-                        src_path = os.path.join(time_dir, time)
-                        dst_path = os.path.join(submission_dir, 'time', time[:-6]+'.txt')
+                for time_file in sorted(os.listdir(time_dir)):
+                    if time_file.endswith('_%s.txt'%self.repetition) and not time_file.startswith('init_'):
+                        src_path = os.path.join(time_dir, time_file)
+                        dst_path = os.path.join(submission_dir, 'time', time_file[:-6]+'.txt')
                         print('Copy result to {}'.format(dst_path))
                         shutil.copyfile(src_path, dst_path)    
 
@@ -175,169 +480,69 @@ class ExperimentBioDrone(object):
         report_dir = os.path.join(subset_report_dir, tracker_names[0])
         makedir(report_dir)
 
+        # trackers evaluated by this worker, or claimed through lease files by the other workers when distributed
+        queue = WorkQueue(os.path.join(self.queue_dir, 'report')) if distributed else None
         performance = {}
-        for name in tracker_names:
-
-            single_report_file = os.path.join(subset_analysis_dir, '{}_{}_{}.json'.format(name, self.subset, str(self.repetition)))
-            
-            if os.path.exists(single_report_file):
-                f = open(single_report_file,'r',encoding='utf-8')
-                single_performance = json.load(f)            
-                performance.update({name:single_performance})
-                f.close()
-                print('Existing result in {}'.format(name))
-                continue
-            else:
-                performance.update({name: {
-                    'overall': {},
-                    'seq_wise': {}}})
-            
-            seq_num = len(self.dataset)
-
-            # save the ious, dious and gious for success plot
-            succ_curve = np.zeros((seq_num, self.nbins_iou))
-            succ_dcurve = np.zeros((seq_num, self.nbins_iou))
-            succ_gcurve = np.zeros((seq_num, self.nbins_iou))
-
-            # save the original precision value for original precision plot
-            prec_curve = np.zeros((seq_num, self.nbins_ce))
-            # save the novel precision value for normalized precision plot
-            norm_prec_curve = np.zeros((seq_num, self.nbins_ce))
-
-            # save average speed for each video
-            speeds = np.zeros(seq_num)
-
-            # save the normalize precision score
-            norm_prec_score  = np.zeros(seq_num)
-            
-            for s in range(len(self.dataset.seq_names)):
-                num = self.dataset.seq_names[s]
-                # get the information of selected video
-                img_files, anno, _ = self.dataset[s]
-
-                print('repetition {}: Evaluate tracker {} in video num {}'.format(self.repetition, name, num))
-                
-                # read absent info
-                absent_path = os.path.join(self.root_dir, 'attribute', 'absent','{}.txt'.format(num))
-                absent = pd.read_csv(absent_path,header=None,names=['absent'])
-                
-                # frame resolution
-                img_height = cv.imread(img_files[0]).shape[0]
-                img_width = cv.imread(img_files[0]).shape[1]
-                img_resolution = (img_width,img_height)
-                bound = img_resolution
-
-                # read tracking results
-                boxes = np.loadtxt(os.path.join(self.result_dir, name, self.subset, '{}_{}_{}.txt'.format(name, num, self.repetition)), delimiter=',')
-
-                anno = np.array(anno)
-                boxes = np.array(boxes)
-
-                for box in boxes:
-                    # correction of out-of-range coordinates
-                    box[0] = box[0] if box[0] > 0 else 0
-                    box[2] = box[2] if box[2] < img_width - box[0] else img_width - box[0]
-                    box[1] = box[1] if box[1] > 0 else 0
-                    box[3] = box[3] if box[3] < img_height - box[1] else img_height - box[1]
-
-                assert boxes.shape == anno.shape
-                
-                # calculate ious, gious, dious for success plot
-                # calculate center errors and normalized center errors for precision plot
-                seq_ious, seq_dious, seq_gious, seq_center_errors, seq_norm_center_errors, flags = self._calc_metrics(boxes, anno, bound)
-                
-                seq_ious = pd.DataFrame(seq_ious, columns = ['seq_ious'])
-                seq_dious = pd.DataFrame(seq_dious, columns = ['seq_dious'])
-                seq_gious = pd.DataFrame(seq_gious, columns = ['seq_gious'])
-                seq_center_errors = pd.DataFrame(seq_center_errors, columns = ['seq_center_errors'])
-                seq_norm_center_errors = pd.DataFrame(seq_norm_center_errors, columns= ['seq_norm_center_errors'])
-                flags = pd.DataFrame(flags, columns = ['flags'])
-
-                data = pd.concat([seq_ious,seq_dious, seq_gious,seq_center_errors,seq_norm_center_errors,flags, absent],axis=1) 
-
-                # Frames without target and transition frames are not included in the evaluation
-                data = data[data.apply(lambda x: x['absent'] == 0, axis=1)]
-                
-                data = data.drop(labels=['absent'],axis = 1)
-
-                seq_ious = data['seq_ious']
-                seq_dious = data['seq_dious']
-                seq_gious = data['seq_gious']
-                seq_center_errors = data['seq_center_errors']
-                seq_norm_center_errors = data['seq_norm_center_errors']   
-                flags = data['flags']  
-                
-                # Calculate the proportion of all the frames that fall into area 5 (groundtruth area)
-                norm_prec_score[s] = np.nansum(flags)/len(flags)
-
-                # Save the 5 curves of the tracker on the current video
-                succ_curve[s], succ_dcurve[s], succ_gcurve[s],prec_curve[s], norm_prec_curve[s] = self._calc_curves(seq_ious, seq_dious, seq_gious,seq_center_errors, seq_norm_center_errors)
-
-                # calculate average speed
-                time_file = os.path.join(
-                    self.time_dir, name, '{}_{}_{}.txt'.format(name, num, self.repetition)) 
-                
-                if os.path.isfile(time_file):
-                    times = np.loadtxt(time_file)
-                    
-                    times = times[times > 0]
-                    if len(times) > 0:
-                        speeds[s] = np.nanmean(1. / times)
-
-                # Update the results in current video (Only save scores)
-                performance[name]['seq_wise'].update({num: {
-                    'success_score_iou': np.nanmean(succ_curve[s]),
-                    'success_score_diou': np.nanmean(succ_dcurve[s]),                    
-                    'success_score_giou': np.nanmean(succ_gcurve[s]),
-                    'precision_score': prec_curve[s][self.ce_threshold],
-                    'norm_prec_score':norm_prec_score[s],
-                    'success_rate_iou': succ_curve[s][self.nbins_iou // 2],
-                    'success_rate_diou': succ_dcurve[s][self.nbins_iou // 2],
-                    'success_rate_giou': succ_gcurve[s][self.nbins_iou // 2],
-                    'speed_fps': speeds[s] if speeds[s] > 0 else -1}})
-
-            # Average each curve
-            succ_curve = np.nanmean(succ_curve, axis=0)
-            succ_dcurve = np.nanmean(succ_dcurve, axis=0)
-            succ_gcurve = np.nanmean(succ_gcurve, axis=0)
-            prec_curve = np.nanmean(prec_curve, axis=0)
-            norm_prec_curve = np.nanmean(norm_prec_curve, axis=0)
-
-            # Generate average score
-            succ_score = np.nanmean(succ_curve)
-            succ_dscore = np.nanmean(succ_dcurve)
-            succ_gscore = np.nanmean(succ_gcurve)
-            succ_rate = succ_curve[self.nbins_iou // 2]
-            succ_drate = succ_dcurve[self.nbins_iou // 2]
-            succ_grate = succ_gcurve[self.nbins_iou // 2]
-
-            prec_score = prec_curve[self.ce_threshold]
-            norm_prec_score = np.nansum(norm_prec_score) / np.count_nonzero(norm_prec_score)
-
-            if np.count_nonzero(speeds) > 0:
-                avg_speed = np.nansum(speeds) / np.count_nonzero(speeds)
-            else:
-                avg_speed = -1
-
-            # store overall performance
-            performance[name]['overall'].update({
-                'success_curve_iou': succ_curve.tolist(),
-                'success_curve_diou': succ_dcurve.tolist(),
-                'success_curve_giou': succ_gcurve.tolist(),
-                'precision_curve': prec_curve.tolist(),
-                'normalized_precision_curve': norm_prec_curve.tolist(),
-                'success_score_iou': succ_score,
-                'success_score_diou': succ_dscore,
-                'success_score_giou': succ_gscore,
-                'precision_score': prec_score,
-                'norm_prec_score':norm_prec_score,
-                'success_rate_iou': succ_rate,
-                'success_rate_diou': succ_drate,
-                'success_rate_giou': succ_grate,
-                'speed_fps': avg_speed})
-
-            with open(single_report_file, 'w') as f:
-                json.dump(performance[name], f, indent=4)
+        todo = list(tracker_names)
+        while len(todo) > 0:
+            waiting = [] # trackers claimed by other workers
+            for name in todo:
+
+                single_report_file = os.path.join(subset_analysis_dir, '{}_{}_{}.json'.format(name, self.subset, str(self.repetition)))
+
+                lease = None
+                if queue is not None and not os.path.exists(single_report_file):
+                    lease = queue.claim('%s_%s_%s' % (name, self.subset, self.repetition))
+                    if lease is None:
+                        print('Tracker {} claimed by another worker'.format(name))
+                        waiting.append(name)
+                        continue
+
+                if os.path.exists(single_report_file):
+                    if lease is not None:
+                        lease.release()
+                    f = open(single_report_file,'r',encoding='utf-8')
+                    single_performance = json.load(f)            
+                    performance.update({name:single_performance})
+                    f.close()
+                    print('Existing result in {}'.format(name))
+                    continue
+
+                # the times of all the sequences are loaded at once
+                bulk_times = self._load_times(name)
+
+                def load_result(s, num):
+                    print('repetition {}: Evaluate tracker {} in video num {}'.format(self.repetition, name, num))
+                    return self._load_record(name, num, bulk_times)
+
+                try:
+                    performance[name] = self._evaluate(load_result)
+                    resources = self._summarize_telemetry(name)
+                    if resources is not None:
+                        performance[name]['overall']['resources'] = resources
+                        print('Resources of {}: {} sequences, {} % CPU, {} MB peak RSS, {} threads, {} MB read, {} MB torch peak'.format(
+                            name, resources['sequences'], *['-' if resources[k] is None else '%.1f' % resources[k] for k in
+                            ['cpu_percent', 'peak_rss_mb', 'threads', 'read_mb', 'torch_peak_mb']]))
+
+                    with open(single_report_file + '.tmp', 'w') as f:
+                        json.dump(performance[name], f, indent=4)
+                    os.replace(single_report_file + '.tmp', single_report_file)
+                finally:
+                    if lease is not None:
+                        lease.release()
+
+            todo = waiting
+            if len(todo) > 0:
+                # wait for the other workers, or for their leases to become stale
+                print('Waiting for %d trackers claimed by other workers...' % len(todo))
+                time.sleep(poll_interval)
+        performance = {name: performance[name] for name in tracker_names}
+
+        # merge the performance of the trackers, once
+        lease = queue.claim('merge_%s_%s' % (self.subset, self.repetition)) if queue is not None else None
+        if queue is not None and lease is None:
+            print('Performance merged by another worker')
+            return performance
 
         # save performance
         report_file = os.path.join(report_dir, 'performance_{}.json'.format(str(self.repetition)))
@@ -345,10 +550,523 @@ class ExperimentBioDrone(object):
             json.dump(performance, f, indent=4)
 
         self.plot_curves_([report_file], tracker_names, self.repetition)
+        if lease is not None:
+            lease.release()
 
         return performance
     
 
+    def watch(self, tracker_names=None, poll_interval=10, plot_interval=60, max_idle=None):
+        """
+        Evaluate the results continuously while the trackers run.
+        Every ``poll_interval`` seconds, the result directories ``results/{tracker}/{subset}/`` are listed, and only the
+        sequences whose result (or time, or curve) file is new or changed since the previous poll are evaluated. Their curves
+        are kept, so that the overall performance of every tracker on its evaluated sequences is updated at the cost of the
+        new results only, and printed as a leaderboard. The performance and the plots of the trackers are saved under
+        ``reports/{subset}/watch/`` at most every ``plot_interval`` seconds, and the analysis file of a tracker (reused by
+        ``report``) is written once all its sequences are evaluated.
+        ``tracker_names`` restricts the evaluation to the given trackers, all the trackers with results by default.
+        Return the latest performance once no result has changed for ``max_idle`` seconds (never when ``None``), or on Ctrl-C.
+        """
+        if self.subset == 'test':
+            raise Exception('The test subset is evaluated by the BioDrone server, its results cannot be watched.')
+        subset_report_dir = os.path.join(self.report_dir, self.subset)
+        makedir(subset_report_dir)
+        watch_dir = os.path.join(subset_report_dir, 'watch')
+        makedir(watch_dir)
+        subset_analysis_dir = os.path.join(self.analysis_dir, self.subset)
+        makedir(subset_analysis_dir)
+
+        seq_indices = dict((num, s) for s, num in enumerate(self.dataset.seq_names))
+        states = {} # state of the files of every evaluated (tracker, sequence)
+        sequences = {} # curves, normalized precision score and times of the evaluated sequences of every tracker
+        performance = {}
+        saved = True
+        last_change = time.time()
+        last_save = None
+        print('Watching the results of repetition %d in %s...' % (self.repetition, self.result_dir))
+        try:
+            while True:
+                names = tracker_names
+                if names is None:
+                    names = sorted(name for name in os.listdir(self.result_dir)
+                                   if os.path.isdir(os.path.join(self.result_dir, name, self.subset)))
+                updated = []
+                for name in names:
+                    files = self._watch_files(name, seq_indices)
+                    evaluated = sequences.setdefault(name, {})
+                    changed = False
+                    for num in [num for num in evaluated if not num in files]:
+                        # removed result
+                        del evaluated[num]
+                        del states[(name, num)]
+                        changed = True
+                    for num in sorted(files, key=lambda num: seq_indices[num]):
+                        if states.get((name, num)) == files[num]:
+                            continue
+                        states[(name, num)] = files[num]
+                        changed = True
+                        try:
+                            boxes, times = self._load_record(name, num)
+                            if not isinstance(boxes, tuple):
+                                boxes = self._evaluate_sequence(seq_indices[num], boxes)
+                        except Exception as e:
+                            print('  Cannot evaluate tracker {} in video num {}: {}'.format(name, num, e))
+                            evaluated.pop(num, None)
+                            continue
+                        evaluated[num] = (boxes, times)
+                    if changed:
+                        updated.append(name)
+
+                for name in updated:
+                    evaluated = sequences[name]
+                    if len(evaluated) == 0:
+                        performance.pop(name, None)
+                        continue
+                    indices = sorted(seq_indices[num] for num in evaluated)
+                    performance[name] = self._evaluate(lambda s, num: evaluated[num], indices)
+                    if len(evaluated) == len(self.dataset):
+                        # all the sequences are evaluated, as by report
+                        resources = self._summarize_telemetry(name)
+                        if resources is not None:
+                            performance[name]['overall']['resources'] = resources
+                        single_report_file = os.path.join(subset_analysis_dir, '{}_{}_{}.json'.format(name, self.subset, str(self.repetition)))
+                        with open(single_report_file + '.tmp', 'w') as f:
+                            json.dump(performance[name], f, indent=4)
+                        os.replace(single_report_file + '.tmp', single_report_file)
+
+                if len(updated) > 0:
+                    saved = False
+                    last_change = time.time()
+                    print('Leaderboard at %s (%s updated):' % (time.strftime('%H:%M:%S'), ', '.join(updated)))
+                    for name in sorted(performance, key=lambda name: -performance[name]['overall']['success_score_iou']):
+                        overall = performance[name]['overall']
+                        print('  %-24s %4d/%d videos  SUC %.3f  PRE %.3f  NPRE %.3f  %.1f fps' % (
+                            name, len(sequences[name]), len(self.dataset), overall['success_score_iou'],
+                            overall['precision_score'], overall['norm_prec_score'], overall['speed_fps']))
+
+                if not saved and (last_save is None or time.time() - last_save >= plot_interval):
+                    self._save_watch(performance, watch_dir)
+                    saved = True
+                    last_save = time.time()
+                if max_idle is not None and time.time() - last_change >= max_idle:
+                    break
+                time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            print('Interrupted')
+        if not saved:
+            self._save_watch(performance, watch_dir)
+        return performance
+
+
+    def _watch_files(self, name, seq_indices):
+        """
+        Return the modification times and sizes of the result, curve and time files of the sequences of a tracker
+        with results, from a single listing of its result and time directories.
+        """
+        def listing(directory):
+            entries = {}
+            if os.path.isdir(directory):
+                for entry in os.scandir(directory):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        # removed in the meantime
+                        continue
+                    entries[entry.name] = (stat.st_mtime_ns, stat.st_size)
+            return entries
+
+        results = listing(os.path.join(self.result_dir, name, self.subset))
+        times = listing(os.path.join(self.time_dir, name, self.subset))
+        prefix = '{}_'.format(name)
+        suffix = '_{}.txt'.format(self.repetition)
+        files = {}
+        for filename, state in results.items():
+            if filename.startswith(prefix) and filename.endswith(suffix):
+                num = filename[len(prefix):-len(suffix)]
+                if num in seq_indices:
+                    files[num] = (state, results.get('curve_{}.json'.format(filename[:-len('.txt')])), times.get(filename))
+        return files
+
+
+    def _save_watch(self, performance, watch_dir):
+        """
+        Save the performance of the watched trackers and plot it.
+        """
+        if len(performance) == 0:
+            return
+        report_file = os.path.join(watch_dir, 'performance_{}.json'.format(str(self.repetition)))
+        with open(report_file + '.tmp', 'w') as f:
+            json.dump(performance, f, indent=4)
+        os.replace(report_file + '.tmp', report_file)
+        self.plot_curves_([report_file], sorted(performance), self.repetition, watch_dir)
+        print('Performance and plots saved at', watch_dir)
+
+
+    def screen(self, tracker, stride=5, num_seqs=None, method=None, confidence=0.95, num_bootstrap=1000):
+        r"""Cheap screening run of a tracker.
+
+        The tracker is only updated on every ``stride``-th frame (the other boxes are linearly
+        interpolated), optionally on a representative subset of ``num_seqs`` sequences chosen
+        from the attributes, and the scores are estimated with bootstrap confidence bounds over
+        the sequences.
+
+        Args:
+            tracker (Tracker): The tracker to screen.
+            stride (int): Frame stride of the updates.
+            num_seqs (int, optional): Number of representative sequences, all when ``None``.
+            method (string, optional): ``None`` (OPE) or ``restart`` (R-OPE).
+            confidence (float): Level of the confidence bounds.
+            num_bootstrap (int): Number of bootstrap resamplings.
+
+        Returns:
+            dict: ``{score: (estimate, lower bound, upper bound)}`` for the success, precision
+                and normalized precision scores.
+        """
+        assert self.subset != 'test', 'Screening needs the annotations of the train or val subset'
+        seq_names = None if num_seqs is None else self.dataset.select_representative(num_seqs)
+        self.run(tracker, False, False, method, stride=stride, seq_names=seq_names)
+
+        record_name = self._record_name(tracker.name, method, stride)
+        seq_indices = [s for s, num in enumerate(self.dataset.seq_names) if seq_names is None or num in seq_names]
+        performance = self._evaluate(lambda s, num: self._load_record(record_name, num), seq_indices)
+
+        # bootstrap over the sequences
+        rng = np.random.RandomState(0)
+        samples = rng.randint(0, len(seq_indices), size=(num_bootstrap, len(seq_indices)))
+        alpha = (1 - confidence) / 2
+        estimates = {}
+        for key in ['success_score_iou', 'precision_score', 'norm_prec_score']:
+            scores = np.array([v[key] for v in performance['seq_wise'].values()])
+            means = np.nanmean(scores[samples], axis=1)
+            estimates[key] = (float(performance['overall'][key]), float(np.nanquantile(means, alpha)), float(np.nanquantile(means, 1 - alpha)))
+            print('%s (stride %d, %d sequences): %.3f [%.3f, %.3f]' % ((key, stride, len(seq_indices)) + estimates[key]))
+
+        return estimates
+
+
+    def evaluate(self, results, times=None):
+        r"""Evaluate tracking results held in memory.
+
+        This is a pure function of its inputs and the cached annotations: it reads no result
+        files, writes nothing to disk and draws no plots, which makes it cheap enough for
+        periodic validation during training.
+
+        Args:
+            results (dict): Mapping of sequence name to an N x 4 array of boxes
+                (left, top, width, height), one row per frame. Only the given sequences
+                of the subset are evaluated.
+            times (dict, optional): Mapping of sequence name to the per-frame tracking times
+                in seconds, used for ``speed_fps``.
+
+        Returns:
+            dict: ``{'overall': ..., 'seq_wise': ...}``, the same structure ``report`` stores
+                for each tracker.
+        """
+        times = times if times is not None else {}
+        for num in results.keys():
+            if not num in self.dataset.seq_names:
+                raise Exception('Sequence {} not found.'.format(num))
+        seq_indices = [s for s, num in enumerate(self.dataset.seq_names) if num in results]
+
+        return self._evaluate(lambda s, num: (results[num], times.get(num)), seq_indices)
+
+
+    def report_zip(self, zip_file, tracker_name=None):
+        r"""Evaluate a submission archive in memory, without extracting it.
+
+        Args:
+            zip_file (string, bytes or file object): The submission zip, shaped like the
+                one generated by ``report`` on the ``test`` subset, i.e. with
+                ``result/{tracker}_{seq}.txt`` and ``time/{tracker}_{seq}.txt`` entries. The
+                submissions of R-OPE runs also hold the restart positions of the tracker as
+                ``result/init_{tracker}_{seq}.txt``, which are not evaluated.
+            tracker_name (string, optional): Name of the tracker to evaluate. It is
+                inferred from the archive when ``None``.
+
+        Returns:
+            dict: ``{'overall': ..., 'seq_wise': ...}``, the same structure ``report`` stores
+                for each tracker. Nothing is written to disk.
+        """
+        if isinstance(zip_file, bytes):
+            zip_file = io.BytesIO(zip_file)
+
+        results = {}
+        times = {}
+        with zipfile.ZipFile(zip_file) as z:
+            entries = {}
+            for info in z.infolist():
+                parts = info.filename.replace('\\', '/').split('/')
+                if len(parts) < 2 or parts[-2] not in ('result', 'time') \
+                        or not parts[-1].endswith('.txt') or not '_' in parts[-1]:
+                    continue
+                record_name, num = parts[-1][:-len('.txt')].rsplit('_', 1)
+                entries.setdefault(record_name, {})[(parts[-2], num)] = info
+            # restart positions copied next to the results of R-OPE runs
+            for record_name in list(entries.keys()):
+                if record_name.startswith('init_') and record_name[len('init_'):] in entries:
+                    del entries[record_name]
+
+            if tracker_name is None:
+                if len(entries) != 1:
+                    raise Exception('Expected results of exactly one tracker in the submission, '
+                                    'but got {}.'.format(sorted(entries.keys())))
+                tracker_name = list(entries.keys())[0]
+            if not tracker_name in entries:
+                raise Exception('Tracker {} not found in the submission.'.format(tracker_name))
+            entries = entries[tracker_name]
+
+            # check that every sequence has a result with one row per frame
+            errors = []
+            for s, num in enumerate(self.dataset.seq_names):
+                anno, _, _ = self._sequence_info(s)
+                if not ('result', num) in entries:
+                    errors.append('missing result of sequence {}'.format(num))
+                    continue
+                boxes = np.loadtxt(io.BytesIO(z.read(entries[('result', num)])), delimiter=',', ndmin=2)
+                if boxes.shape != anno.shape:
+                    errors.append('sequence {} has {} rows of {} values, expected {} rows of 4 values'.format(
+                        num, boxes.shape[0], boxes.shape[1], anno.shape[0]))
+                    continue
+                results[num] = boxes
+                if ('time', num) in entries:
+                    times[num] = np.loadtxt(io.BytesIO(z.read(entries[('time', num)])), delimiter=',', ndmin=1)
+            if len(errors) > 0:
+                raise Exception('Invalid submission of {}:\n  {}'.format(tracker_name, '\n  '.join(errors)))
+
+        return self._evaluate(lambda s, num: (results[num], times.get(num)))
+
+
+    def _evaluate(self, load_result, seq_indices=None):
+        """
+        Evaluate the tracking results of the given sequences (all sequences by default).
+        ``load_result(s, seq_name)`` returns the boxes and the times (or None) of the s-th sequence,
+        the boxes can be replaced by the (curves, norm_prec_score) already accumulated while tracking.
+        """
+        if seq_indices is None:
+            seq_indices = range(len(self.dataset))
+        seq_indices = list(seq_indices)
+        seq_num = len(seq_indices)
+
+        # save the ious, dious and gious for success plot
+        succ_curve = np.zeros((seq_num, self.nbins_iou))
+        succ_dcurve = np.zeros((seq_num, self.nbins_iou))
+        succ_gcurve = np.zeros((seq_num, self.nbins_iou))
+
+        # save the original precision value for original precision plot
+        prec_curve = np.zeros((seq_num, self.nbins_ce))
+        # save the novel precision value for normalized precision plot
+        norm_prec_curve = np.zeros((seq_num, self.nbins_ce))
+
+        # save average speed for each video
+        speeds = np.zeros(seq_num)
+
+        # save the normalize precision score
+        norm_prec_score  = np.zeros(seq_num)
+
+        # save the times of all the frames for the overall latency distribution
+        all_times = []
+
+        performance = {
+            'overall': {},
+            'seq_wise': {}}
+
+        for s, index in enumerate(seq_indices):
+            num = self.dataset.seq_names[index]
+            boxes, times = load_result(index, num)
+
+            # Save the 5 curves of the tracker on the current video
+            if isinstance(boxes, tuple):
+                # curves already accumulated while tracking
+                curves, norm_prec_score[s] = boxes
+            else:
+                curves, norm_prec_score[s] = self._evaluate_sequence(index, boxes)
+            succ_curve[s], succ_dcurve[s], succ_gcurve[s], prec_curve[s], norm_prec_curve[s] = curves
+
+            # calculate average speed and latency distribution
+            speeds[s] = self._calc_speed(times)
+            if times is not None:
+                all_times.append(np.asarray(times, float).ravel())
+            latency = latency_stats(times if times is not None else [], self.latency_budget, self.latency_bins)
+
+            # Update the results in current video (Only save scores)
+            performance['seq_wise'].update({num: {
+                'success_score_iou': np.nanmean(succ_curve[s]),
+                'success_score_diou': np.nanmean(succ_dcurve[s]),                    
+                'success_score_giou': np.nanmean(succ_gcurve[s]),
+                'precision_score': prec_curve[s][self.ce_threshold],
+                'norm_prec_score':norm_prec_score[s],
+                'success_rate_iou': succ_curve[s][self.nbins_iou // 2],
+                'success_rate_diou': succ_dcurve[s][self.nbins_iou // 2],
+                'success_rate_giou': succ_gcurve[s][self.nbins_iou // 2],
+                'speed_fps': speeds[s] if speeds[s] > 0 else -1}})
+            performance['seq_wise'][num].update(latency)
+
+        # Average each curve
+        succ_curve = np.nanmean(succ_curve, axis=0)
+        succ_dcurve = np.nanmean(succ_dcurve, axis=0)
+        succ_gcurve = np.nanmean(succ_gcurve, axis=0)
+        prec_curve = np.nanmean(prec_curve, axis=0)
+        norm_prec_curve = np.nanmean(norm_prec_curve, axis=0)
+
+        # Generate average score
+        succ_score = np.nanmean(succ_curve)
+        succ_dscore = np.nanmean(succ_dcurve)
+        succ_gscore = np.nanmean(succ_gcurve)
+        succ_rate = succ_curve[self.nbins_iou // 2]
+        succ_drate = succ_dcurve[self.nbins_iou // 2]
+        succ_grate = succ_gcurve[self.nbins_iou // 2]
+
+        prec_score = prec_curve[self.ce_threshold]
+        norm_prec_score = np.nansum(norm_prec_score) / np.count_nonzero(norm_prec_score)
+
+        if np.count_nonzero(speeds) > 0:
+            avg_speed = np.nansum(speeds) / np.count_nonzero(speeds)
+        else:
+            avg_speed = -1
+
+        # store overall performance
+        performance['overall'].update({
+            'success_curve_iou': succ_curve.tolist(),
+            'success_curve_diou': succ_dcurve.tolist(),
+            'success_curve_giou': succ_gcurve.tolist(),
+            'precision_curve': prec_curve.tolist(),
+            'normalized_precision_curve': norm_prec_curve.tolist(),
+            'success_score_iou': succ_score,
+            'success_score_diou': succ_dscore,
+            'success_score_giou': succ_gscore,
+            'precision_score': prec_score,
+            'norm_prec_score':norm_prec_score,
+            'success_rate_iou': succ_rate,
+            'success_rate_diou': succ_drate,
+            'success_rate_giou': succ_grate,
+            'speed_fps': avg_speed})
+        performance['overall'].update(latency_stats(
+            np.concatenate(all_times) if len(all_times) > 0 else [], self.latency_budget, self.latency_bins))
+        performance['overall'].update({
+            'latency_budget': self.latency_budget,
+            'latency_bins': self.latency_bins.tolist()})
+
+        return performance
+
+
+    def _evaluate_sequence(self, s, boxes):
+        """
+        Calculate the 5 curves and the normalized precision score of the s-th sequence.
+        """
+        anno, absent, bound = self._sequence_info(s)
+
+        # correction of out-of-range coordinates
+        boxes = correct_boxes(boxes, bound)
+
+        assert boxes.shape == anno.shape
+
+        # calculate ious, gious, dious for success plot
+        # calculate center errors and normalized center errors for precision plot
+        seq_ious, seq_dious, seq_gious, seq_center_errors, seq_norm_center_errors, flags = self._calc_metrics(boxes, anno, bound)
+
+        # Frames without target and transition frames are not included in the evaluation
+        # (the metrics only cover the frames with a valid annotation)
+        if len(absent) != len(anno):
+            raise Exception('Sequence {}: {} absent flags for {} annotated frames.'.format(
+                self.dataset.seq_names[s], len(absent), len(anno)))
+        valid = ~np.any(np.isnan(anno), axis=1)
+        keep = (absent == 0)[valid]
+        seq_ious = seq_ious[keep]
+        seq_dious = seq_dious[keep]
+        seq_gious = seq_gious[keep]
+        seq_center_errors = seq_center_errors[keep]
+        seq_norm_center_errors = seq_norm_center_errors[keep]
+        flags = flags[keep]
+
+        # Calculate the proportion of all the frames that fall into area 5 (groundtruth area)
+        norm_prec_score = np.nansum(flags)/len(flags)
+
+        curves = self._calc_curves(seq_ious, seq_dious, seq_gious, seq_center_errors, seq_norm_center_errors)
+
+        return curves, norm_prec_score
+
+
+    def _load_times(self, name):
+        """
+        Load the times of all the sequences of a tracker at once, from a single listing of its time directory.
+        """
+        time_dir = os.path.join(self.time_dir, name, self.subset)
+        prefix = '{}_'.format(name)
+        suffix = '_{}.txt'.format(self.repetition)
+        times = {}
+        if not os.path.isdir(time_dir):
+            return times
+        for entry in os.scandir(time_dir):
+            if entry.name.startswith(prefix) and entry.name.endswith(suffix):
+                # one time per line, parsed without the overhead of np.loadtxt
+                with open(entry.path, 'r') as f:
+                    times[entry.name[len(prefix):-len(suffix)]] = np.array(f.read().split(), dtype=float)
+        return times
+
+
+    def _load_record(self, name, num, bulk_times=None):
+        """
+        Load the boxes (or the curves accumulated while tracking) and the times of a sequence.
+        The times are taken from ``bulk_times`` (see ``_load_times``) when given.
+        """
+        # read tracking results
+        record_file = os.path.join(self.result_dir, name, self.subset, '{}_{}_{}.txt'.format(name, num, self.repetition))
+        curve_file = os.path.join(self.result_dir, name, self.subset, 'curve_{}_{}_{}.json'.format(name, num, self.repetition))
+        boxes = None
+        if os.path.isfile(curve_file) and os.path.getmtime(curve_file) >= os.path.getmtime(record_file):
+            # use the curves accumulated while tracking
+            record, curves, norm_prec_score = load_curves(curve_file)
+            if record['nbins_iou'] == self.nbins_iou and record['nbins_ce'] == self.nbins_ce:
+                boxes = (curves, norm_prec_score)
+        if boxes is None:
+            boxes = np.loadtxt(record_file, delimiter=',', ndmin=2)
+
+        # read tracking time
+        if bulk_times is not None:
+            return boxes, bulk_times.get(num)
+        time_file = os.path.join(
+            self.time_dir, name, self.subset, '{}_{}_{}.txt'.format(name, num, self.repetition)) 
+        times = np.loadtxt(time_file, ndmin=1) if os.path.isfile(time_file) else None
+
+        return boxes, times
+
+
+    def _sequence_info(self, s):
+        """
+        Return the (cached) annotation, absent flags and frame resolution of the s-th sequence.
+        """
+        if not s in self._seq_infos:
+            num = self.dataset.seq_names[s]
+            img_files, anno, _ = self.dataset[s]
+
+            # read absent info
+            absent_path = os.path.join(self.root_dir, 'attribute', 'absent','{}.txt'.format(num))
+            absent = np.loadtxt(absent_path, ndmin=1)
+
+            # frame resolution, from the manifest when the subset is indexed
+            img_resolution = self.dataset.resolution(s)
+            if img_resolution is None:
+                image = load_image(img_files[0])
+                img_resolution = (image.shape[1], image.shape[0])
+
+            self._seq_infos[s] = (np.array(anno), absent, img_resolution)
+        return self._seq_infos[s]
+
+
+    def _calc_speed(self, times):
+        """
+        Calculate the average speed (fps) from the per-frame times, 0 if unavailable.
+        """
+        if times is None:
+            return 0
+        times = np.asarray(times, float)
+        times = times[times > 0]
+        if len(times) > 0:
+            return np.nanmean(1. / times)
+        return 0
+
+
     def _calc_metrics(self, boxes, anno, bound):
         """
         Calculate the evaluation metrics.
@@ -400,15 +1118,17 @@ class ExperimentBioDrone(object):
         return succ_curve, succ_dcurve, succ_gcurve, prec_curve, norm_prec_curve
         
 
-    def plot_curves_(self, report_files, tracker_names, rep):
+    def plot_curves_(self, report_files, tracker_names, rep, report_dir=None):
         """
         Drow Plot
+        The plots are saved to ``report_dir``, ``reports/{subset}/{first tracker}/`` by default.
         """
         assert isinstance(report_files, list), \
             'Expected "report_files" to be a list, ' \
             'but got %s instead' % type(report_files)
         
-        report_dir = os.path.join(self.report_dir, self.subset,  tracker_names[0])
+        if report_dir is None:
+            report_dir = os.path.join(self.report_dir, self.subset,  tracker_names[0])
         if not os.path.exists(report_dir):
             os.makedirs(report_dir)
         
@@ -469,6 +1189,7 @@ class ExperimentBioDrone(object):
                     bbox_extra_artists=(legend,),
                     bbox_inches='tight',
                     dpi=300)
+        plt.close(fig)
         
         # sort trackers by success score diou
         tracker_names = list(performance.keys())
@@ -507,6 +1228,7 @@ class ExperimentBioDrone(object):
                     bbox_extra_artists=(legend,),
                     bbox_inches='tight',
                     dpi=300)
+        plt.close(fig)
 
           # sort trackers by success score giou
         tracker_names = list(performance.keys())
@@ -545,6 +1267,7 @@ class ExperimentBioDrone(object):
                     bbox_extra_artists=(legend,),
                     bbox_inches='tight',
                     dpi=300)
+        plt.close(fig)
 
         # sort trackers by precision score
         tracker_names = list(performance.keys())
@@ -581,6 +1304,7 @@ class ExperimentBioDrone(object):
 
         print('Saving precision plots to', prec_file)
         fig.savefig(prec_file, dpi=300)
+        plt.close(fig)
 
         # plot normalized precision curves
         tracker_names = list(performance.keys())
@@ -616,9 +1340,233 @@ class ExperimentBioDrone(object):
 
         print('Saving normalized precision plots to', norm_prec_file)
         fig.savefig(norm_prec_file, dpi=300)
+        plt.close(fig)
+
+        # plot speed and latency
+        self._plot_speed(performance, report_dir, rep)
+
+
+    def _plot_speed(self, performance, report_dir, rep):
+        """
+        Draw the speed-accuracy Pareto plots and the latency histograms of the trackers with times.
+        """
+        key = 'overall'
+        tracker_names = [name for name, t in performance.items()
+                         if t[key]['speed_fps'] > 0 and t[key].get('latency_p95', -1) > 0]
+        if len(tracker_names) == 0:
+            print('No tracking times, skipping the speed plots')
+            return
+        succ = np.array([performance[name][key]['success_score_iou'] for name in tracker_names])
+        budget = performance[tracker_names[0]][key]['latency_budget']
+
+        pareto_files = {
+            'speed_fps': os.path.join(report_dir, 'overall_speed_pareto_plot_{}.png'.format(rep)),
+            'latency_p95': os.path.join(report_dir, 'overall_latency_pareto_plot_{}.png'.format(rep))}
+        for speed_key, pareto_file in pareto_files.items():
+            speeds = np.array([performance[name][key][speed_key] for name in tracker_names])
+            if speed_key == 'latency_p95':
+                # lower is faster, in milliseconds
+                speeds = speeds * 1000
+                faster = -speeds
+            else:
+                faster = speeds
+
+            # trackers that no other tracker beats on both speed and accuracy
+            front = [i for i in range(len(tracker_names))
+                     if not np.any((faster >= faster[i]) & (succ >= succ[i]) & ((faster > faster[i]) | (succ > succ[i])))]
+            front = sorted(front, key=lambda i: speeds[i])
+
+            fig, ax = plt.subplots()
+            for i, name in enumerate(tracker_names):
+                ax.scatter(speeds[i], succ[i], marker='o' if i in front else 'x', label=name)
+            ax.plot(speeds[front], succ[front], 'k--', linewidth=1)
+            if speed_key == 'latency_p95':
+                ax.axvline(budget * 1000, color='r', linestyle=':', linewidth=1)
+                xlabel = 'Latency p95 (ms)'
+            else:
+                ax.axvline(1. / budget, color='r', linestyle=':', linewidth=1)
+                xlabel = 'Speed (fps)'
+            matplotlib.rcParams.update({'font.size': 7.4})
+            legend = ax.legend(loc='lower right', bbox_to_anchor=(1., 0.))
+
+            matplotlib.rcParams.update({'font.size': 9})
+            ax.set_xscale('log')
+            ax.set(xlabel=xlabel,
+                   ylabel='Success score',
+                   ylim=(0, 1),
+                   title='Speed-accuracy trade-off on BioDrone')
+            ax.grid(True)
+            fig.tight_layout()
+
+            print('Saving speed plots to', pareto_file)
+            fig.savefig(pareto_file,
+                        bbox_extra_artists=(legend,),
+                        bbox_inches='tight',
+                        dpi=300)
+            plt.close(fig)
+
+        # plot latency histograms
+        hist_file = os.path.join(report_dir, 'overall_latency_histogram_{}.png'.format(rep))
+        fig, ax = plt.subplots()
+        for name in tracker_names:
+            bins = np.array(performance[name][key]['latency_bins']) * 1000
+            counts = np.array(performance[name][key]['latency_histogram'], float)
+            # outline of the histogram (ax.stairs needs matplotlib >= 3.4)
+            ax.hist(bins[:-1], bins, weights=counts / counts.sum(), histtype='step',
+                    label='%s: [p50 %.2f, p99 %.2f ms, %.1f%% over budget]' % (
+                        name, performance[name][key]['latency_p50'] * 1000,
+                        performance[name][key]['latency_p99'] * 1000, performance[name][key]['over_budget'] * 100))
+        ax.axvline(budget * 1000, color='r', linestyle=':', linewidth=1)
+        matplotlib.rcParams.update({'font.size': 7.4})
+        legend = ax.legend(loc='upper right', bbox_to_anchor=(1., 1.))
+
+        matplotlib.rcParams.update({'font.size': 9})
+        ax.set_xscale('log')
+        ax.set(xlabel='Latency (ms)',
+               ylabel='Fraction of frames',
+               title='Latency histograms on BioDrone')
+        ax.grid(True)
+        fig.tight_layout()
+
+        print('Saving latency histograms to', hist_file)
+        fig.savefig(hist_file,
+                    bbox_extra_artists=(legend,),
+                    bbox_inches='tight',
+                    dpi=300)
+        plt.close(fig)
     
 
-    def _record(self, record_file, time_file, boxes, times):
-        np.savetxt(record_file, boxes, fmt='%d', delimiter=',')
+    def _record_name(self, tracker_name, method, stride=1, policy='drop'):
+        """
+        Name under which the results of a tracker and an evaluation mechanism are recorded.
+        """
+        if method == None:
+            # tracking in OPE mechanism
+            record_name = tracker_name
+        elif method == 'realtime':
+            # tracking under the real-time budget
+            record_name = '{}_{}_{}'.format(tracker_name, method, policy)
+        else:
+            # tracking in R-OPE mechanism
+            record_name = '{}_{}'.format(tracker_name, method)
+        if stride > 1 and method != 'realtime':
+            # screening run with frame stride
+            record_name = '{}_stride{}'.format(record_name, stride)
+        return record_name
+
+
+    def _record_files(self, record_name, seq_name, repetition=None):
+        """
+        Create the result directories and return the (record, init positions, time, curve) files of a sequence,
+        for the current repetition or the given one.
+        """
+        if repetition is None:
+            repetition = self.repetition
+        makedir(os.path.join(self.result_dir, record_name))
+        makedir(os.path.join(self.time_dir, record_name))
+
+        tracker_result_dir = os.path.join(self.result_dir, record_name, self.subset)
+        tracker_time_dir = os.path.join(self.time_dir, record_name, self.subset)
+
+        makedir(tracker_result_dir)                
+        makedir(tracker_time_dir)
+
+        # setting the path for saving tracking result
+        record_file = os.path.join(tracker_result_dir, '%s_%s_%s.txt'%(record_name , seq_name , str(repetition)))
+
+        # setting the path for saving tracking result (restart position in R-OPE mechanism)
+        init_positions_file = os.path.join(tracker_result_dir, 'init_%s_%s_%s.txt'%(record_name , seq_name , str(repetition)))
+
+        # setting the path for saving tracking time 
+        time_file = os.path.join(tracker_time_dir, '%s_%s_%s.txt'%(record_name , seq_name , str(repetition)))
+
+        # setting the path for saving the curves evaluated while tracking
+        curve_file = os.path.join(tracker_result_dir, 'curve_%s_%s_%s.json'%(record_name , seq_name , str(repetition)))
+
+        return record_file, init_positions_file, time_file, curve_file
+
+
+    def _link_record(self, source_files, record_files):
+        # hard link the existing files of another repetition, or copy them across file systems
+        for source, target in zip(source_files, record_files):
+            if not os.path.exists(source):
+                continue
+            if os.path.exists(target):
+                os.remove(target)
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copy2(source, target)
+
+
+    def _record_init_positions(self, init_positions_file, init_positions):
+        f_init = open(init_positions_file, 'w')
+        for num in init_positions:
+            f_init.writelines(str(num)+'\n')
+        f_init.close()
+
+
+    def _telemetry_file(self, record_name, seq_name):
+        """
+        Return the telemetry file of a sequence, next to the time files.
+        """
+        return os.path.join(self.telemetry_dir, record_name, self.subset, '%s_%s_%s.json'%(record_name , seq_name , str(self.repetition)))
+
+    def _record_telemetry(self, record_name, seq_name, summary, frame_memory=None):
+        telemetry_file = self._telemetry_file(record_name, seq_name)
+        makedir(os.path.dirname(os.path.dirname(telemetry_file)))
+        makedir(os.path.dirname(telemetry_file))
+        summary['frame_torch_allocated_mb'] = (np.asarray(frame_memory) / 2. ** 20).tolist() if frame_memory is not None else None
+        with open(telemetry_file, 'w') as f:
+            json.dump(summary, f)
+        print('Resource usage: %s%% CPU, %s MB peak RSS, %s threads, %s MB read' % tuple(
+            '-' if summary[k] is None else '%.1f' % summary[k] for k in ['cpu_percent', 'peak_rss_mb', 'threads', 'read_mb']))
+
+    def _summarize_telemetry(self, name):
+        """
+        Summarize the resource usage recorded for the sequences of a tracker, None if there is none.
+        """
+        summaries = []
+        for num in self.dataset.seq_names:
+            telemetry_file = self._telemetry_file(name, num)
+            if os.path.isfile(telemetry_file):
+                with open(telemetry_file, 'r') as f:
+                    summaries.append(json.load(f))
+        if len(summaries) == 0:
+            return None
+
+        def values(key):
+            return [t[key] for t in summaries if t.get(key) is not None]
+
+        def reduce(func, key):
+            v = values(key)
+            return float(func(v)) if len(v) > 0 else None
+
+        durations = values('duration')
+        cpu = [(t['cpu_percent'], t['duration']) for t in summaries if t.get('cpu_percent') is not None]
+        return {
+            'sequences': len(summaries),
+            'duration': float(np.sum(durations)),
+            # weighted by the duration of the sequences
+            'cpu_percent': float(np.sum([c * d for c, d in cpu]) / np.sum([d for _, d in cpu])) if len(cpu) > 0 else None,
+            'cpu_percent_max': reduce(np.max, 'cpu_percent_max'),
+            'rss_mb': reduce(np.mean, 'rss_mb'),
+            'peak_rss_mb': reduce(np.max, 'peak_rss_mb'),
+            'threads': reduce(np.max, 'threads'),
+            'read_mb': reduce(np.sum, 'read_mb'),
+            'torch_peak_mb': reduce(np.max, 'torch_peak_mb')}
+
+    def _init_time_file(self, time_file):
+        """
+        Return the file of the init times recorded next to a time file.
+        """
+        return os.path.join(os.path.dirname(time_file), 'init_' + os.path.basename(time_file))
+
+    def _record(self, record_file, time_file, boxes, times, init_times=None):
         np.savetxt(time_file, times, fmt='%.8f', delimiter=',')
+        if init_times is not None:
+            np.savetxt(self._init_time_file(time_file), init_times, fmt='%.8f', delimiter=',')
+        # the record file marks the sequence as done, it is written atomically last
+        np.savetxt(record_file + '.tmp', boxes, fmt='%d', delimiter=',')
+        os.replace(record_file + '.tmp', record_file)
         print('Results recorded at', record_file)
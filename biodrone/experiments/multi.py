@@ -0,0 +1,165 @@
+from __future__ import absolute_import, print_function
+
+import numpy as np
+import multiprocessing
+import concurrent.futures
+
+from ..utils.ioutils import load_image
+
+
+def _lockstep_worker(tracker, conn):
+    # track the frames written by the runner into shared memory
+    from multiprocessing import shared_memory, resource_tracker
+
+    shm = None
+    state = None
+    while True:
+        msg = conn.recv()
+        try:
+            if msg[0] == 'seq':
+                _, seq_name, frame_num, anno, restart_flag, method = msg
+                state = tracker._new_state(seq_name, frame_num, anno)
+            elif msg[0] == 'frame':
+                _, f, shm_name, shape = msg
+                if shm is None or shm.name != shm_name:
+                    if shm is not None:
+                        shm.close()
+                    shm = shared_memory.SharedMemory(name=shm_name)
+                    # the runner owns (and unlinks) the shared memory
+                    resource_tracker.unregister(shm._name, 'shared_memory')
+                image = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+                image.flags.writeable = False
+                tracker._track_frame(state, f, image, anno, restart_flag, method)
+                del image
+                conn.send(True)
+            elif msg[0] == 'end':
+                tracker._finish_state(state, msg[1])
+                conn.send(state)
+            elif msg[0] == 'close':
+                break
+        except Exception as e:
+            conn.send(e)
+    if shm is not None:
+        shm.close()
+
+
+class MultiTrackerRunner(object):
+    r"""Drive several trackers over the same decoded frames in lockstep.
+
+    Every frame is decoded once and fed to all the trackers, each keeping its own timing,
+    R-OPE failure counter and restart positions.
+
+    Args:
+        trackers (list): The trackers.
+        parallel (string, optional): ``None`` to run the trackers one after another on each frame,
+            ``thread`` to run them on separate threads, or ``process`` to run them in separate
+            processes reading the frames from shared memory.
+    """
+    def __init__(self, trackers, parallel=None):
+        super(MultiTrackerRunner, self).__init__()
+        assert parallel in [None, 'thread', 'process'], 'Unknown parallel mode %s' % parallel
+        self.trackers = trackers
+        self.parallel = parallel
+
+        self._executor = None
+        self._workers = []
+        if parallel == 'thread':
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(trackers))
+        elif parallel == 'process':
+            for tracker in trackers:
+                conn, worker_conn = multiprocessing.Pipe()
+                process = multiprocessing.Process(target=_lockstep_worker, args=(tracker, worker_conn))
+                process.daemon = True
+                process.start()
+                self._workers.append((process, conn))
+        self._shm = None
+
+    def track(self, seq_name, img_files, anno, restart_flag, method, stride=1, indices=None):
+        r"""Track a sequence with the trackers.
+
+        Args:
+            indices (list, optional): Indices of the trackers to run, all when ``None``.
+
+        Returns:
+            dict: The tracking state of every tracker index, with its ``boxes``,
+                ``times`` and ``init_positions``.
+        """
+        if indices is None:
+            indices = list(range(len(self.trackers)))
+        frame_num = len(img_files)
+
+        # every tracker gets its own copy of the annotations, which are clipped while tracking
+        annos = {k: np.array(anno) for k in indices}
+        if self.parallel == 'process':
+            for k in indices:
+                self._workers[k][1].send(('seq', seq_name, frame_num, annos[k], restart_flag, method))
+        else:
+            states = {k: self.trackers[k]._new_state(seq_name, frame_num, annos[k]) for k in indices}
+
+        def track_frame(k, f, image):
+            return self.trackers[k]._track_frame(states[k], f, image, annos[k], restart_flag, method)
+
+        pending = False
+        for f, img_file in enumerate(img_files):
+            if stride > 1 and f % stride != 0 and f != frame_num - 1:
+                # skipped frame, interpolated afterwards
+                continue
+
+            # decoded once for all the trackers
+            image = load_image(img_file)
+
+            if self.parallel == 'process':
+                # the next frame is decoded while the workers track the current one
+                if pending:
+                    self._wait(indices)
+                shm_name = self._write_shared(image)
+                for k in indices:
+                    self._workers[k][1].send(('frame', f, shm_name, image.shape))
+                pending = True
+            elif self.parallel == 'thread':
+                list(self._executor.map(lambda k: track_frame(k, f, image), indices))
+            else:
+                for k in indices:
+                    track_frame(k, f, image)
+
+        if self.parallel == 'process':
+            if pending:
+                self._wait(indices)
+            for k in indices:
+                self._workers[k][1].send(('end', stride))
+            return dict(zip(indices, self._wait(indices)))
+
+        for k in indices:
+            self.trackers[k]._finish_state(states[k], stride)
+        return states
+
+    def _wait(self, indices):
+        replies = [self._workers[k][1].recv() for k in indices]
+        for reply in replies:
+            if isinstance(reply, Exception):
+                raise reply
+        return replies
+
+    def _write_shared(self, image):
+        from multiprocessing import shared_memory
+
+        if self._shm is None or self._shm.size < image.nbytes:
+            self._close_shared()
+            self._shm = shared_memory.SharedMemory(create=True, size=image.nbytes)
+        np.ndarray(image.shape, dtype=np.uint8, buffer=self._shm.buf)[...] = image
+        return self._shm.name
+
+    def _close_shared(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+        for process, conn in self._workers:
+            conn.send(('close',))
+            process.join()
+        self._workers = []
+        self._close_shared()
@@ -0,0 +1,126 @@
+from __future__ import absolute_import, division
+
+import json
+import numpy as np
+
+from ..utils.metrics import center_error, normalized_center_error, iou, diou, giou
+
+
+CURVE_KEYS = ['success_curve_iou', 'success_curve_diou', 'success_curve_giou',
+              'precision_curve', 'normalized_precision_curve']
+
+
+def correct_boxes(boxes, bound):
+    r"""Correction of out-of-range coordinates, as done before the evaluation.
+
+    Args:
+        boxes (numpy.ndarray): An N x 4 numpy array, each line represent a rectangle
+            (left, top, width, height).
+        bound (tuple): The frame resolution (width, height).
+
+    Returns:
+        numpy.ndarray: A corrected copy of ``boxes``.
+    """
+    img_width, img_height = bound
+    boxes = np.array(boxes, dtype=float).reshape((-1, 4))
+    boxes[:, 0] = np.where(boxes[:, 0] > 0, boxes[:, 0], 0)
+    boxes[:, 2] = np.where(boxes[:, 2] < img_width - boxes[:, 0], boxes[:, 2], img_width - boxes[:, 0])
+    boxes[:, 1] = np.where(boxes[:, 1] > 0, boxes[:, 1], 0)
+    boxes[:, 3] = np.where(boxes[:, 3] < img_height - boxes[:, 1], boxes[:, 3], img_height - boxes[:, 1])
+    return boxes
+
+
+class CurveAccumulator(object):
+    r"""Online accumulator of the evaluation curves of one sequence.
+
+    The boxes are fed frame by frame while tracking, and the success (IoU, DIoU, GIoU),
+    precision and normalized precision histograms are updated incrementally. The resulting
+    curves are identical to those ``ExperimentBioDrone.report`` computes from the result file.
+
+    Args:
+        anno (numpy.ndarray): An N x 4 numpy array of groundtruth boxes.
+        absent (numpy.ndarray): The N absent flags, frames with non-zero flags are not evaluated.
+        bound (tuple): The frame resolution (width, height).
+        nbins_iou (int): Number of thresholds of the success curves.
+        nbins_ce (int): Number of thresholds of the precision curves.
+    """
+    def __init__(self, anno, absent, bound, nbins_iou=101, nbins_ce=401):
+        super(CurveAccumulator, self).__init__()
+        self.anno = np.array(anno, dtype=float)
+        self.absent = np.asarray(absent)
+        self.bound = bound
+        self.nbins_iou = nbins_iou
+        self.nbins_ce = nbins_ce
+
+        self.thr_iou = np.linspace(0, 1, nbins_iou)
+        self.thr_ce = np.arange(0, nbins_ce)
+        self.thr_nce = np.linspace(0, 1, nbins_ce)
+
+        # number of frames above / below each threshold
+        self.succ_counts = np.zeros((3, nbins_iou))
+        self.prec_counts = np.zeros(nbins_ce)
+        self.norm_prec_counts = np.zeros(nbins_ce)
+        # number of frames whose predicted center lies in the groundtruth box
+        self.flag_count = 0
+
+        self.frame_num = 0 # number of frames fed so far
+        self.valid_num = 0 # number of frames taken into account
+
+    def update(self, box):
+        r"""Feed the box of the next frame.
+
+        Args:
+            box (numpy.ndarray): The (left, top, width, height) box recorded for the frame.
+        """
+        f = self.frame_num
+        self.frame_num += 1
+
+        gt = self.anno[f:f + 1, :]
+        if np.any(np.isnan(gt)) or self.absent[f] != 0:
+            # frames without target and transition frames are not included in the evaluation
+            return
+        box = correct_boxes(box, self.bound)
+
+        self.succ_counts[0] += np.greater(iou(box, gt), self.thr_iou)
+        self.succ_counts[1] += np.greater(diou(box, gt), self.thr_iou)
+        self.succ_counts[2] += np.greater(giou(box, gt), self.thr_iou)
+        self.prec_counts += np.less(center_error(box, gt), self.thr_ce)
+        norm_center_errors, flags = normalized_center_error(box, gt, self.bound)
+        self.norm_prec_counts += np.less(norm_center_errors, self.thr_nce)
+        self.flag_count += flags[0]
+        self.valid_num += 1
+
+    def curves(self):
+        r"""Return the 5 curves and the normalized precision score accumulated so far."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            curves = (self.succ_counts[0] / self.valid_num,
+                      self.succ_counts[1] / self.valid_num,
+                      self.succ_counts[2] / self.valid_num,
+                      self.prec_counts / self.valid_num,
+                      self.norm_prec_counts / self.valid_num)
+            norm_prec_score = np.float64(self.flag_count) / self.valid_num
+        return curves, norm_prec_score
+
+    def save(self, filename):
+        r"""Save the accumulated curves to a json file."""
+        curves, norm_prec_score = self.curves()
+        record = {
+            'nbins_iou': self.nbins_iou,
+            'nbins_ce': self.nbins_ce,
+            'frame_num': self.frame_num,
+            'norm_prec_score': norm_prec_score}
+        record.update({k: c.tolist() for k, c in zip(CURVE_KEYS, curves)})
+        with open(filename, 'w') as f:
+            json.dump(record, f)
+
+
+def load_curves(filename):
+    r"""Load the curves saved by ``CurveAccumulator.save``.
+
+    Returns:
+        tuple: (record, curves, norm_prec_score), where ``record`` is the raw json content.
+    """
+    with open(filename, 'r') as f:
+        record = json.load(f)
+    curves = tuple(np.array(record[k], dtype=float) for k in CURVE_KEYS)
+    return record, curves, record['norm_prec_score']
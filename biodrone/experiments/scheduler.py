@@ -0,0 +1,102 @@
+from __future__ import absolute_import, division, print_function
+
+import json
+import heapq
+import time
+import traceback
+import numpy as np
+import cv2 as cv
+import torch
+
+
+def predict_costs(frame_nums, time_files):
+    r"""Predict the tracking time of sequences from their length and previous runs.
+
+    A sequence with previous time files costs its number of frames times the mean of its recorded
+    (non-zero) per-frame times, the median over its time files. The others cost
+    their number of frames times the median per-frame time of all the previous runs, or their
+    number of frames (in frames instead of seconds) when there is no previous run.
+
+    Args:
+        frame_nums (dict): Number of frames of every sequence.
+        time_files (dict): Previous time files of the sequences, as lists of paths.
+
+    Returns:
+        tuple: (costs, unit), where ``costs`` maps the sequences to their predicted cost and
+            ``unit`` is ``s`` or ``frames``.
+    """
+    measured = {}
+    frame_times = []
+    for seq_name, files in time_files.items():
+        for time_file in files:
+            times = np.loadtxt(time_file, ndmin=1)
+            # frames skipped or replaced by restarts are recorded as 0
+            times = times[times > 0]
+            if len(times) == 0:
+                continue
+            measured.setdefault(seq_name, []).append(float(times.mean()) * frame_nums[seq_name])
+            frame_times.append(times)
+
+    if len(frame_times) == 0:
+        return {seq_name: float(num) for seq_name, num in frame_nums.items()}, 'frames'
+
+    frame_time = float(np.median(np.concatenate(frame_times)))
+    costs = {}
+    for seq_name, num in frame_nums.items():
+        if seq_name in measured:
+            costs[seq_name] = float(np.median(measured[seq_name]))
+        else:
+            costs[seq_name] = num * frame_time
+    return costs, 's'
+
+
+def lpt_schedule(costs, num_workers):
+    r"""Longest processing time first schedule of the sequences on ``num_workers`` workers.
+
+    Every sequence, in decreasing order of cost, goes to the least loaded worker, which is
+    what workers pulling the sequences from a queue in this order do.
+
+    Returns:
+        tuple: (order, assignments, makespan), the sequences in decreasing order of cost, the
+            sequences of every worker and the predicted makespan.
+    """
+    order = sorted(costs, key=lambda seq_name: (-costs[seq_name], seq_name))
+    loads = [(0., w) for w in range(num_workers)]
+    assignments = [[] for _ in range(num_workers)]
+    for seq_name in order:
+        load, w = heapq.heappop(loads)
+        assignments[w].append(seq_name)
+        heapq.heappush(loads, (load + costs[seq_name], w))
+    makespan = max(load for load, _ in loads) if len(order) > 0 else 0.
+    return order, assignments, makespan
+
+
+def apply_profile(profile):
+    r"""Set the torch and OpenCV thread counts of the current process from a profile."""
+    torch.set_num_threads(profile['torch_threads'])
+    cv.setNumThreads(profile['cv_threads'])
+
+
+def load_profile(profile):
+    r"""Load a profile saved by ``autotune`` (a path, or an already loaded profile)."""
+    if isinstance(profile, dict):
+        return profile
+    with open(profile, 'r') as f:
+        return json.load(f)
+
+
+def _schedule_worker(experiment, tracker_factory, method, run_kwargs, worker, tasks, results, profile=None):
+    # pull the sequences from the queue until the sentinel
+    try:
+        if profile is not None:
+            apply_profile(profile)
+        tracker = tracker_factory()
+        while True:
+            seq_name = tasks.get()
+            if seq_name is None:
+                break
+            start = time.time()
+            experiment.run(tracker, False, False, method, seq_names=[seq_name], **run_kwargs)
+            results.put((worker, seq_name, start, time.time()))
+    except Exception:
+        results.put((worker, None, traceback.format_exc(), None))
@@ -0,0 +1,292 @@
+from __future__ import absolute_import, division, print_function
+
+import os
+import time
+import argparse
+import threading
+import traceback
+from multiprocessing.connection import Listener, Client, AuthenticationError
+
+from six.moves import queue
+
+from .benchmark import synthetic_sequence, _load_tracker
+from .scheduler import apply_profile, load_profile
+
+
+class TrackerServer(object):
+    r"""Long-lived local server keeping trackers warm for the runs of its clients.
+
+    The trackers are created (and warmed up on ``warmup`` synthetic frames) once, then the
+    clients (see ``RemoteTracker``) connect to ``address`` and send the sequences to track.
+    Every job takes a free tracker, so that at most ``num_trackers`` sequences are tracked at
+    the same time (on threads) and the others wait for a tracker. At most ``max_clients``
+    clients are connected at the same time, the others are refused. A client disconnecting
+    while its job waits for a tracker cancels the job, and the result of a job whose client
+    disconnected while it was tracked is discarded.
+
+    Args:
+        tracker_factory (callable): Function creating a tracker.
+        address (string): Path of the Unix socket (or any ``multiprocessing.connection``
+            address, e.g. a named pipe on Windows).
+        num_trackers (integer, optional): Number of trackers, i.e. of concurrent jobs.
+        max_clients (integer, optional): Maximum number of connected clients.
+        warmup (integer, optional): Number of warm-up updates of every tracker.
+        authkey (bytes, optional): Key authenticating the clients.
+    """
+    def __init__(self, tracker_factory, address, num_trackers=1, max_clients=8, warmup=10, authkey=None):
+        super(TrackerServer, self).__init__()
+        self.address = address
+        self.num_trackers = num_trackers
+        self.max_clients = max_clients
+        self.authkey = authkey
+
+        start = time.perf_counter()
+        trackers = [tracker_factory() for _ in range(num_trackers)]
+        if warmup > 0:
+            frames, box = synthetic_sequence(warmup + 1, 640, 360)
+            for tracker in trackers:
+                tracker.init(frames[0], box)
+                for frame in frames[1:]:
+                    tracker.update(frame)
+        self.name = trackers[0].name
+        self.is_deterministic = trackers[0].is_deterministic
+        print('%d %s tracker(s) ready in %.1f s' % (num_trackers, self.name, time.perf_counter() - start))
+
+        self._trackers = queue.Queue()
+        for tracker in trackers:
+            self._trackers.put(tracker)
+        self._lock = threading.Lock()
+        self._clients = 0
+        self._jobs = 0
+        self._closed = False
+        self._listener = None
+
+    def serve_forever(self):
+        r"""Accept clients until ``shutdown`` (or a ``shutdown`` request of a client, or Ctrl-C).
+
+        The running jobs are completed before returning.
+        """
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            try:
+                Client(self.address, authkey=self.authkey).close()
+            except OSError:
+                # left by a server that did not exit cleanly
+                os.remove(self.address)
+            except (EOFError, AuthenticationError):
+                # a server with another key is listening
+                raise Exception('A tracker server is already listening on {}.'.format(self.address))
+            else:
+                raise Exception('A tracker server is already listening on {}.'.format(self.address))
+
+        self._listener = Listener(self.address, authkey=self.authkey)
+        print('Tracker server %s listening on %s (%d trackers, %d clients at most)' % (
+            self.name, self.address, self.num_trackers, self.max_clients))
+        try:
+            while not self._closed:
+                try:
+                    conn = self._listener.accept()
+                except AuthenticationError:
+                    print('  Client refused, authentication failed')
+                    continue
+                except (EOFError, OSError):
+                    # the client disconnected during the handshake
+                    continue
+                if self._closed:
+                    conn.close()
+                    break
+                with self._lock:
+                    refused = self._clients >= self.max_clients
+                    if not refused:
+                        self._clients += 1
+                if refused:
+                    print('  Client refused, %d clients connected' % self.max_clients)
+                    try:
+                        conn.send(('error', 'The tracker server is busy ({} clients connected).'.format(self.max_clients)))
+                    except OSError:
+                        pass
+                    conn.close()
+                    continue
+                thread = threading.Thread(target=self._serve_client, args=(conn,))
+                thread.daemon = True
+                thread.start()
+        except KeyboardInterrupt:
+            print('Interrupted')
+        finally:
+            self._closed = True
+            self._listener.close()
+            # wait for the running jobs, which hold the trackers
+            for _ in range(self.num_trackers):
+                self._trackers.get()
+            print('Tracker server stopped after %d jobs' % self._jobs)
+
+    def shutdown(self):
+        r"""Stop accepting clients and stop ``serve_forever`` once the running jobs are completed."""
+        if self._closed:
+            return
+        self._closed = True
+        # wake up the accept of serve_forever
+        try:
+            Client(self.address, authkey=self.authkey).close()
+        except (OSError, EOFError, AuthenticationError):
+            pass
+
+    def _serve_client(self, conn):
+        try:
+            while True:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    # the client disconnected
+                    break
+                command = request[0]
+                if command == 'info':
+                    reply = ('ok', {'name': self.name, 'is_deterministic': self.is_deterministic})
+                elif command in ['track', 'track_realtime']:
+                    reply = self._run_job(conn, command, request[1])
+                    if reply is None:
+                        print('  Client disconnected, job on %s cancelled' % request[1]['seq_name'])
+                        break
+                elif command == 'shutdown':
+                    reply = ('ok', None)
+                else:
+                    reply = ('error', 'Unknown request {}.'.format(command))
+
+                try:
+                    conn.send(reply)
+                except (EOFError, OSError):
+                    if command != 'info':
+                        print('  Client disconnected, result on %s discarded' % request[1]['seq_name'])
+                    break
+                if command == 'shutdown':
+                    self.shutdown()
+                    break
+        finally:
+            conn.close()
+            with self._lock:
+                self._clients -= 1
+
+    def _run_job(self, conn, command, kwargs):
+        # track a sequence with a free tracker, None when the client disconnected in the meantime
+        if self._closed:
+            return ('error', 'The tracker server is shutting down.')
+        tracker = self._trackers.get()
+        try:
+            # the client sends nothing while waiting for its result, unless it disconnected
+            if conn.poll():
+                return None
+            start = time.perf_counter()
+            if command == 'track':
+                result = tracker.track(**kwargs)
+                reply = {
+                    'boxes': result[0],
+                    'times': result[1],
+                    'init_positions': result[2] if len(result) > 2 else None,
+                    'init_times': tracker.init_times,
+                    'frame_memory': tracker.frame_memory}
+            else:
+                boxes, times = tracker.track_realtime(**kwargs)
+                reply = {'boxes': boxes, 'times': times}
+            with self._lock:
+                self._jobs += 1
+            print('  Job %d: %s tracked in %.1f s' % (self._jobs, kwargs['seq_name'], time.perf_counter() - start))
+            return ('ok', reply)
+        except Exception:
+            return ('error', traceback.format_exc())
+        finally:
+            self._trackers.put(tracker)
+
+
+class RemoteTracker(object):
+    r"""Client of a ``TrackerServer``, used in place of a tracker by ``ExperimentBioDrone.run``.
+
+    ``track`` and ``track_realtime`` send the sequence (frame files, annotations and
+    options) to the server, which tracks it with one of its warm trackers, and return its
+    results. The frames are read by the server, so ``visualize`` and ``save_img`` also apply
+    there, and the evaluation curves of ``accumulator`` are computed by the client.
+
+    Args:
+        address (string): Address of the server.
+        authkey (bytes, optional): Key authenticating the client.
+    """
+    def __init__(self, address, authkey=None):
+        super(RemoteTracker, self).__init__()
+        self.address = address
+        self.authkey = authkey
+        self._conn = None
+        info = self._request(('info',))
+        self.name = info['name']
+        self.is_deterministic = info['is_deterministic']
+        self.init_times = None # init latencies of the last tracked sequence
+        self.frame_memory = None # torch memory allocated after every frame of the last tracked sequence
+
+    def _request(self, request):
+        if self._conn is None:
+            self._conn = Client(self.address, authkey=self.authkey)
+        try:
+            self._conn.send(request)
+            status, reply = self._conn.recv()
+        except (EOFError, OSError):
+            self.close()
+            raise Exception('The tracker server at {} closed the connection.'.format(self.address))
+        if status == 'error':
+            raise Exception('Tracker server at {}: {}'.format(self.address, reply))
+        return reply
+
+    def track(self, seq_name, img_files, anno, restart_flag, visualize, seq_result_dir, save_img, method, accumulator=None,
+              stride=1, lazy=False, checkpoint_file=None, checkpoint_interval=1000, warmup=0, record_memory=False):
+        """
+        Track the sequence on the server, see ``Tracker.track``.
+        """
+        reply = self._request(('track', {
+            'seq_name': seq_name, 'img_files': img_files, 'anno': anno, 'restart_flag': restart_flag,
+            'visualize': visualize, 'seq_result_dir': seq_result_dir, 'save_img': save_img, 'method': method,
+            'stride': stride, 'lazy': lazy, 'checkpoint_file': checkpoint_file,
+            'checkpoint_interval': checkpoint_interval, 'warmup': warmup, 'record_memory': record_memory}))
+        self.init_times = reply['init_times']
+        self.frame_memory = reply['frame_memory']
+        if accumulator is not None:
+            for box in reply['boxes']:
+                accumulator.update(box)
+
+        if method == None:
+            return reply['boxes'], reply['times']
+        elif method == 'restart':
+            return reply['boxes'], reply['times'], reply['init_positions']
+
+    def track_realtime(self, seq_name, img_files, anno, fps=30, policy='drop', latency=None):
+        """
+        Track the sequence on the server under a real-time budget, see ``Tracker.track_realtime``.
+        """
+        reply = self._request(('track_realtime', {
+            'seq_name': seq_name, 'img_files': img_files, 'anno': anno, 'fps': fps, 'policy': policy,
+            'latency': latency}))
+        return reply['boxes'], reply['times']
+
+    def shutdown_server(self):
+        r"""Ask the server to stop once its running jobs are completed."""
+        self._request(('shutdown',))
+        self.close()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve warm trackers to the runs of local clients.')
+    parser.add_argument('--tracker', type=str, help='the tracker, as module:Class', required=True)
+    parser.add_argument('--net_path', type=str, help='the weights of the tracker', default=None)
+    parser.add_argument('--address', type=str, help='the path of the Unix socket', required=True)
+    parser.add_argument('--num_trackers', type=int, help='the number of trackers, i.e. of concurrent jobs', default=1)
+    parser.add_argument('--max_clients', type=int, help='the maximum number of connected clients', default=8)
+    parser.add_argument('--warmup', type=int, help='the number of warm-up updates of every tracker', default=10)
+    parser.add_argument('--shared_weights', action='store_true', help='share the weights of the trackers')
+    parser.add_argument('--profile', type=str, help='a profile saved by autotune, for the thread counts', default=None)
+    args = parser.parse_args()
+
+    if args.profile is not None:
+        apply_profile(load_profile(args.profile))
+    server = TrackerServer(lambda: _load_tracker(args.tracker, args.net_path, args.shared_weights), args.address,
+                           args.num_trackers, args.max_clients, args.warmup)
+    server.serve_forever()
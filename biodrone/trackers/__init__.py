@@ -1,26 +1,33 @@
 from __future__ import absolute_import
 
-from typing import Union
-import torch
+import os
+import pickle
 
 import numpy as np
-import time
+import torch
 
 import cv2 as cv
 
 from ..utils.metrics import iou
+from ..utils.ioutils import load_image
+from ..utils.frames import LazyFrame
+from ..utils.timing import cuda_available, create_timer
 import concurrent.futures
 
 class Tracker(object):
-
-    def __init__(self, name, is_deterministic=False):
+    """
+    Base class of the trackers. ``timer`` is the timing backend measuring the init and update latencies
+    (see ``create_timer``), CUDA events on GPU and ``perf_counter_ns`` otherwise by default,
+    with its own overhead calibrated and subtracted.
+    """
+    def __init__(self, name, is_deterministic=False, timer=None):
         self.name = name
         self.is_deterministic = is_deterministic
         if self.is_using_cuda:
             print('Detect the CUDA devide')
-            self._timer_start = torch.cuda.Event(enable_timing=True)
-            self._timer_stop = torch.cuda.Event(enable_timing=True)
-        self._timestamp = None
+        self.timer = create_timer(timer)
+        self.init_times = None # init latencies of the last tracked sequence
+        self.frame_memory = None # torch memory allocated after every frame of the last tracked sequence
     
     def init(self, image, box):
         raise NotImplementedError()
@@ -28,46 +35,64 @@ class Tracker(object):
     def update(self, image):
         raise NotImplementedError()
 
+    def state_dict(self):
+        """
+        Return the tracking state set by ``init`` and ``update`` (not the network weights), for checkpointing.
+        """
+        raise NotImplementedError()
+
+    def load_state_dict(self, state):
+        """
+        Restore a tracking state returned by ``state_dict``.
+        """
+        raise NotImplementedError()
+
     @property
     def is_using_cuda(self):
-        self.cuda_num = torch.cuda.device_count()
-        if self.cuda_num == 0:
-            return False
-        else:
-            return True
+        # the devices are only counted once per process
+        return cuda_available()
 
-    def _start_timing(self) -> Union[float, None]:
-        if self.is_using_cuda:
-            self._timer_start.record()
-            timestamp = None
-        else:
-            timestamp = time.time()
-            self._timestamp = timestamp
-        return timestamp
+    def _start_timing(self):
+        self.timer.start()
 
     def _stop_timing(self) -> float:
-        if self.is_using_cuda:
-            self._timer_stop.record()
-            torch.cuda.synchronize()
-            # cuda event record return duration in milliseconds.
-            duration = self._timer_start.elapsed_time(
-                self._timer_stop
-            )
-            duration /= 1000.0
-        else:
-            duration = time.time() - self._timestamp
-        return duration
+        return self.timer.stop()
 
-    def track(self,seq_name, img_files, anno, restart_flag, visualize, seq_result_dir, save_img, method):
+    def track(self,seq_name, img_files, anno, restart_flag, visualize, seq_result_dir, save_img, method, accumulator=None, stride=1, lazy=False,
+              checkpoint_file=None, checkpoint_interval=1000, warmup=0, record_memory=False):
+        """
+        Track the sequence. ``accumulator`` (optional) is fed the recorded box of every frame,
+        e.g. a ``CurveAccumulator`` evaluating the sequence while tracking.
+        With ``stride`` > 1, ``update`` is only called on every ``stride``-th frame (and the last one),
+        and the boxes of the frames in between are linearly interpolated.
+        With ``lazy``, the tracker receives ``LazyFrame`` objects, decoded only at the resolution it samples.
+        With ``checkpoint_file``, the tracking state and the tracker state (see ``state_dict``) are saved every
+        ``checkpoint_interval`` frames, and tracking resumes from an existing checkpoint with the same output
+        as an uninterrupted run. The checkpoint is left for the caller to remove once the results are saved.
+        The returned times are the update latencies, the init latencies are kept in ``init_times`` (non-zero on the
+        first frame and the restart frames). The times of the first ``warmup`` updates are negated, to mark them as
+        warm-up (excluded from the speed).
+        With ``record_memory`` and a CUDA device, the torch memory allocated after every update is kept in ``frame_memory``.
+        """
         frame_num = len(img_files)
-        box = anno[0,:] # the information of the first frame 
-        boxes = np.zeros((frame_num, 4)) # save the tracking result
-        boxes[0] = box 
-        times = np.zeros(frame_num) # save time
+        state = self._new_state(seq_name, frame_num, anno)
+        if record_memory and self.is_using_cuda:
+            state['memory'] = np.zeros(frame_num)
+        boxes = state['boxes']
 
-        fail_count = 0 # fail_count records the failures in R-OPE mechanism
+        start = 0
+        if checkpoint_file is not None and os.path.isfile(checkpoint_file):
+            with open(checkpoint_file, 'rb') as f:
+                checkpoint = pickle.load(f)
+            start = checkpoint['next_frame']
+            state.update(checkpoint['state'])
+            boxes = state['boxes']
+            self.load_state_dict(checkpoint['tracker'])
+            print('  Resuming %s from frame %d' % (seq_name, start))
+            if accumulator is not None and stride == 1:
+                for f in range(start):
+                    accumulator.update(boxes[f])
 
-        init_positions = [] # save the restart locations
         if visualize:
             display_name = 'Display: ' + seq_name
             cv.namedWindow(display_name, cv.WINDOW_NORMAL | cv.WINDOW_KEEPRATIO)
@@ -77,80 +102,236 @@ class Tracker(object):
         #     executor.map(cv.imread, img_files)
 
         for f, img_file in enumerate(img_files):
+            if f < start:
+                # tracked before the checkpoint
+                continue
+            if checkpoint_file is not None and f > start and f % checkpoint_interval == 0:
+                self._save_checkpoint(checkpoint_file, state, f)
 
-            image = cv.imread(img_file)
+            if stride > 1 and f % stride != 0 and f != frame_num - 1:
+                # skipped frame, interpolated afterwards
+                continue
+
+            if lazy:
+                image = LazyFrame(img_file)
+            else:
+                image = load_image(img_file)
             height = image.shape[0]
             width = image.shape[1]
-            img_resolution = (width,height)
-                
-            # start_time = time.time() 
-            self._start_timing()
-            if f == 0: 
-                self.init(image, box)
-                times[f] = self._stop_timing()
-            if fail_count >= 10 and method == 'restart' and f in restart_flag:
-                # the tracker will be restarted when the cumulative number of failures reaches 10
-                print('init again in %s' % f)                
-                init_positions.append(f)
-                self.init(image, anno[f,:])
-                fail_count = 0
-            else:
-                frame_box = self.update(image) 
-                frame_box = np.rint(frame_box)
-                times[f] = self._stop_timing()
-
-                current_gt = anno[f,:].reshape((1,4))
-                frame_box = np.array(frame_box)
-                track_result = frame_box.reshape((1,4))
-                bound = img_resolution
-                seq_iou = iou(current_gt, track_result, bound=bound)
-                
-                # check failures
-                if method == 'restart' and (anno[f,:] != np.array([0,0,0,0])).all(): 
-                    if seq_iou < 0.5: 
-                        # failure occures in present frame
-                        fail_count += 1
-                    else: 
-                        # re-locate the target
-                        fail_count = 0
-                        
-                boxes[f, :] = frame_box
-
-                if method == 'restart':
-                    print(seq_name, self.name,' Tracking %d/%d' % (f, frame_num-1), 'time:%.2f' % times[f], 'fail count:', fail_count, frame_box)
-                else:
-                    print(seq_name, self.name,' Tracking %d/%d' % (f, frame_num-1), 'time:%.2f' % times[f], frame_box)
+
+            result = self._track_frame(state, f, image, anno, restart_flag, method)
+            if accumulator is not None and stride == 1:
+                accumulator.update(boxes[f])
+            if result is None:
+                # re-initialization
+                continue
+            frame_box, seq_iou = result
                 
-                if save_img or visualize:
-                    frame_disp = image.copy()
-                    state = [int(s) for s in frame_box]
-                    state[0] = 0 if state[0] < 0 else state[0]
-                    state[1] = 0 if state[1] < 0 else state[1]
-                    state[2] = width-state[0] if state[0]+state[2] > width else state[2]
-                    state[3] = height-state[1] if state[1]+state[3] > height else state[3] 
-                    font_face = cv.FONT_HERSHEY_SIMPLEX 
-                    cv.putText(frame_disp,'No.%06d'%(f), (50, 100), font_face, 0.8, (0, 255, 0), 2)
-                    if (anno[f,:] != np.array([0,0,0,0])).all():
-                        cv.putText(frame_disp,'seq iou: %2f'%(seq_iou), (50, 130), font_face, 0.8, (0, 255, 0), 2)
-
-                    cv.rectangle(frame_disp, (state[0], state[1]), (state[2] + state[0], state[3] + state[1]),(0, 255, 0), 5)
-                    gt = [int(s) for s in anno[f,:]]
-                    cv.rectangle(frame_disp, (gt[0], gt[1]), (gt[2] + gt[0], gt[3] + gt[1]),(0, 0, 255), 5)
-
-                if visualize:
-                    cv.imshow(display_name, frame_disp)
-                if save_img:
-                    save_path = "{}/{:>06d}.jpg".format(seq_result_dir, f)
-                    cv.imwrite(save_path, frame_disp)
-                key = cv.waitKey(1)
-                if key == ord('q'):
-                    break
+            if save_img or visualize:
+                frame_disp = np.array(image)
+                state_box = [int(s) for s in frame_box]
+                state_box[0] = 0 if state_box[0] < 0 else state_box[0]
+                state_box[1] = 0 if state_box[1] < 0 else state_box[1]
+                state_box[2] = width-state_box[0] if state_box[0]+state_box[2] > width else state_box[2]
+                state_box[3] = height-state_box[1] if state_box[1]+state_box[3] > height else state_box[3] 
+                font_face = cv.FONT_HERSHEY_SIMPLEX 
+                cv.putText(frame_disp,'No.%06d'%(f), (50, 100), font_face, 0.8, (0, 255, 0), 2)
+                if (anno[f,:] != np.array([0,0,0,0])).all():
+                    cv.putText(frame_disp,'seq iou: %2f'%(seq_iou), (50, 130), font_face, 0.8, (0, 255, 0), 2)
+
+                cv.rectangle(frame_disp, (state_box[0], state_box[1]), (state_box[2] + state_box[0], state_box[3] + state_box[1]),(0, 255, 0), 5)
+                gt = [int(s) for s in anno[f,:]]
+                cv.rectangle(frame_disp, (gt[0], gt[1]), (gt[2] + gt[0], gt[3] + gt[1]),(0, 0, 255), 5)
+
+            if visualize:
+                cv.imshow(display_name, frame_disp)
+            if save_img:
+                save_path = "{}/{:>06d}.jpg".format(seq_result_dir, f)
+                cv.imwrite(save_path, frame_disp)
+            key = cv.waitKey(1)
+            if key == ord('q'):
+                break
           
         if visualize:
             cv.destroyAllWindows()
+
+        self._finish_state(state, stride, warmup)
+        self.init_times = state['init_times']
+        self.frame_memory = state.get('memory')
+
+        if accumulator is not None:
+            # frames left after an early stop are recorded as empty boxes
+            for f in range(accumulator.frame_num, frame_num):
+                accumulator.update(boxes[f])
         
         if method == None:
-            return boxes, times
+            return state['boxes'], state['times']
         elif method == 'restart':
-            return boxes, times, init_positions
+            return state['boxes'], state['times'], state['init_positions']
+
+    def _save_checkpoint(self, checkpoint_file, state, next_frame):
+        checkpoint = {
+            'next_frame': next_frame,
+            'state': {k: state[k] for k in ['boxes', 'times', 'init_times', 'fail_count', 'init_positions', 'updated', 'memory'] if k in state},
+            'tracker': self.state_dict()}
+        # write to a temporary file first, so that a checkpoint is either complete or absent
+        with open(checkpoint_file + '.tmp', 'wb') as f:
+            pickle.dump(checkpoint, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(checkpoint_file + '.tmp', checkpoint_file)
+
+    def _new_state(self, seq_name, frame_num, anno):
+        """
+        Create the tracking state of a sequence, updated frame by frame by ``_track_frame``.
+        """
+        boxes = np.zeros((frame_num, 4)) # save the tracking result
+        boxes[0] = anno[0,:] # the information of the first frame 
+        return {
+            'seq_name': seq_name,
+            'frame_num': frame_num,
+            'boxes': boxes,
+            'times': np.zeros(frame_num), # save time
+            'init_times': np.zeros(frame_num), # save the init time on the first frame and the restart frames
+            'fail_count': 0, # fail_count records the failures in R-OPE mechanism
+            'init_positions': [], # save the restart locations
+            'updated': []} # the frames on which update is called
+
+    def _track_frame(self, state, f, image, anno, restart_flag, method):
+        """
+        Track the f-th frame of a sequence.
+        Return the recorded box and its IoU with the groundtruth, or None when the tracker is restarted.
+        """
+        boxes = state['boxes']
+        times = state['times']
+        height = image.shape[0]
+        width = image.shape[1]
+        img_resolution = (width,height)
+
+        if f == 0: 
+            self._start_timing()
+            self.init(image, anno[0,:])
+            state['init_times'][f] = self._stop_timing()
+        if state['fail_count'] >= 10 and method == 'restart' and f in restart_flag:
+            # the tracker will be restarted when the cumulative number of failures reaches 10
+            print('init again in %s' % f)                
+            state['init_positions'].append(f)
+            self._start_timing()
+            self.init(image, anno[f,:])
+            state['init_times'][f] = self._stop_timing()
+            state['fail_count'] = 0
+            return None
+
+        self._start_timing()
+        frame_box = self.update(image) 
+        frame_box = np.rint(frame_box)
+        times[f] = self._stop_timing()
+        if 'memory' in state:
+            state['memory'][f] = torch.cuda.memory_allocated()
+
+        current_gt = anno[f,:].reshape((1,4))
+        frame_box = np.array(frame_box)
+        track_result = frame_box.reshape((1,4))
+        bound = img_resolution
+        seq_iou = iou(current_gt, track_result, bound=bound)
+        
+        # check failures
+        if method == 'restart' and (anno[f,:] != np.array([0,0,0,0])).all(): 
+            if seq_iou < 0.5: 
+                # failure occures in present frame
+                state['fail_count'] += 1
+            else: 
+                # re-locate the target
+                state['fail_count'] = 0
+                
+        boxes[f, :] = frame_box
+        state['updated'].append(f)
+
+        if method == 'restart':
+            print(state['seq_name'], self.name,' Tracking %d/%d' % (f, state['frame_num']-1), 'time:%.2f' % times[f], 'fail count:', state['fail_count'], frame_box)
+        else:
+            print(state['seq_name'], self.name,' Tracking %d/%d' % (f, state['frame_num']-1), 'time:%.2f' % times[f], frame_box)
+
+        return frame_box, seq_iou
+
+    def _finish_state(self, state, stride=1, warmup=0):
+        """
+        Interpolate the boxes of the frames skipped with ``stride``, and mark the times of the first ``warmup`` updates.
+        """
+        updated = state['updated']
+        if warmup > 0:
+            state['times'][updated[:warmup]] *= -1
+        if stride > 1 and len(updated) > 0:
+            # linear interpolation of the skipped frames
+            boxes = state['boxes']
+            skipped = np.setdiff1d(np.arange(updated[0], state['frame_num']), updated + state['init_positions'])
+            for i in range(4):
+                boxes[skipped, i] = np.rint(np.interp(skipped, updated, boxes[updated, i]))
+
+    def track_realtime(self, seq_name, img_files, anno, fps=30, policy='drop', latency=None):
+        r"""Track the sequence under a real-time budget.
+
+        Frames are released on a clock at ``fps`` frames per second. The tracker processes one
+        frame at a time, and the frames released while it is busy are either skipped in favour of
+        the latest one (``policy='drop'``) or processed in order later (``policy='queue'``).
+        Every frame is scored with the latest output available when it is released (the
+        initialization box before the first output).
+
+        Args:
+            fps (float): Frame rate at which frames are released.
+            policy (string): ``drop`` or ``queue``.
+            latency (float or numpy.ndarray, optional): Simulated latency in seconds of every
+                frame (a scalar, or one value per frame, e.g. the times of a previous run). The
+                durations measured by ``_stop_timing`` are used when ``None``.
+
+        Returns:
+            tuple: (boxes, times), where ``times`` holds the (measured or simulated) latency
+                of the processed frames and 0 for the skipped ones.
+        """
+        assert policy in ['drop', 'queue'], 'Unknown policy %s' % policy
+        frame_num = len(img_files)
+        boxes = np.zeros((frame_num, 4)) # save the scored result
+        times = np.zeros(frame_num) # save the latency of the processed frames
+
+        def frame_latency(f, duration):
+            if latency is None:
+                return duration
+            if np.isscalar(latency):
+                return float(latency)
+            return float(latency[f])
+
+        image = load_image(img_files[0])
+        self._start_timing()
+        self.init(image, anno[0,:])
+        times[0] = frame_latency(0, self._stop_timing())
+
+        clock = times[0] # the time at which the tracker is free again
+        outputs = [] # (time the output is available, box)
+        last = 0 # the last processed frame
+        while last < frame_num - 1:
+            released = int(np.floor(clock * fps + 1e-9)) # the latest released frame
+            if policy == 'drop' and released > last:
+                # frames released while busy are dropped
+                f = min(released, frame_num - 1)
+            else:
+                f = last + 1
+            clock = max(clock, f / fps)
+
+            image = load_image(img_files[f])
+            self._start_timing()
+            frame_box = np.rint(self.update(image))
+            times[f] = frame_latency(f, self._stop_timing())
+            clock += times[f]
+            outputs.append((clock, np.array(frame_box)))
+            last = f
+            print(seq_name, self.name,' Tracking %d/%d' % (f, frame_num-1), 'time:%.2f' % times[f], 'ready:%.2f' % clock, frame_box)
+
+        # score the latest available output for every frame
+        box = anno[0,:]
+        k = 0
+        for f in range(frame_num):
+            while k < len(outputs) and outputs[k][0] <= f / fps:
+                box = outputs[k][1]
+                k += 1
+            boxes[f, :] = box
+
+        return boxes, times
     
@@ -0,0 +1,118 @@
+from __future__ import absolute_import, division
+
+import io
+import numpy as np
+import cv2 as cv
+import six
+from PIL import Image
+
+
+# OpenCV flags decoding a JPEG at 1/2, 1/4 and 1/8 of its resolution (libjpeg DCT scaling)
+_REDUCED_FLAGS = {
+    1: cv.IMREAD_COLOR,
+    2: cv.IMREAD_REDUCED_COLOR_2,
+    4: cv.IMREAD_REDUCED_COLOR_4,
+    8: cv.IMREAD_REDUCED_COLOR_8}
+
+
+class LazyFrame(object):
+    r"""A frame decoded on demand, at the resolution the tracker actually needs.
+
+    Trackers can receive a ``LazyFrame`` instead of a decoded image. ``shape`` is read from
+    the JPEG header without decoding, ``numpy.asarray(frame)`` decodes the full-resolution
+    image, and ``crop_and_resize`` samples a search region given in full-resolution
+    coordinates from a frame decoded at 1/2, 1/4 or 1/8 scale when the region is
+    downsampled by at least that factor anyway. JPEGs are always decoded as a whole (at the
+    chosen scale), while already decoded sources (e.g. frames of a ``FrameCache``) are
+    cropped in place, reading only the pages of the region.
+
+    Args:
+        source (string or numpy.ndarray): Path of the frame, its encoded bytes as a 1-D
+            uint8 array, or an already decoded image.
+    """
+    def __init__(self, source):
+        super(LazyFrame, self).__init__()
+        self.source = source
+        self._decoded = {} # decoded images by scale
+        self._shape = None
+        if isinstance(source, np.ndarray) and source.ndim == 3:
+            self._decoded[1] = source
+
+    @property
+    def shape(self):
+        if self._shape is None:
+            if 1 in self._decoded:
+                self._shape = self._decoded[1].shape
+            else:
+                if isinstance(self.source, six.string_types):
+                    width, height = Image.open(self.source).size
+                else:
+                    width, height = Image.open(io.BytesIO(self.source.tobytes())).size
+                self._shape = (height, width, 3)
+        return self._shape
+
+    def decode(self, scale=1):
+        r"""Decode the frame at ``1 / scale`` of its resolution (``scale`` in 1, 2, 4, 8)."""
+        if not scale in self._decoded:
+            if 1 in self._decoded:
+                # already decoded, downscaling would not save anything
+                return self._decoded[1]
+            flag = _REDUCED_FLAGS[scale]
+            if isinstance(self.source, six.string_types):
+                self._decoded[scale] = cv.imread(self.source, flag)
+            else:
+                self._decoded[scale] = cv.imdecode(self.source, flag)
+        return self._decoded[scale]
+
+    def __array__(self, dtype=None, copy=None):
+        image = self.decode(1)
+        return image if dtype is None else image.astype(dtype)
+
+    def crop_and_resize(self, center, size, out_size, pad_color):
+        r"""Crop a square region and resize it, as ``_crop_and_resize`` of the Siamese trackers.
+
+        Args:
+            center (numpy.ndarray): Center (y, x) of the region in full-resolution pixels.
+            size (float): Side of the region in full-resolution pixels.
+            out_size (int): Side of the output patch.
+            pad_color (numpy.ndarray): Color of the padding outside the frame.
+        """
+        # the largest decoding scale that does not go below the output resolution
+        scale = 1
+        if not 1 in self._decoded:
+            for s in [8, 4, 2]:
+                if size / out_size >= s:
+                    scale = s
+                    break
+        image = self.decode(scale)
+        if image is self._decoded.get(1):
+            scale = 1
+
+        # map the region to the decoded resolution
+        center = (np.asarray(center, dtype=float) + 0.5) / scale - 0.5
+        size = size / scale
+
+        # convert box to corners (0-indexed)
+        size = round(size)
+        corners = np.concatenate((
+            np.round(center - (size - 1) / 2),
+            np.round(center - (size - 1) / 2) + size))
+        corners = np.round(corners).astype(int)
+
+        # pad image if necessary
+        pads = np.concatenate((
+            -corners[:2], corners[2:] - image.shape[:2]))
+        npad = max(0, int(pads.max()))
+        if npad > 0:
+            image = cv.copyMakeBorder(
+                image, npad, npad, npad, npad,
+                cv.BORDER_CONSTANT, value=pad_color)
+
+        # crop image patch
+        corners = (corners + npad).astype(int)
+        patch = image[corners[0]:corners[2], corners[1]:corners[3]]
+
+        # resize to out_size
+        patch = cv.resize(patch, (out_size, out_size))
+
+        return patch
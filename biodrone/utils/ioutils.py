@@ -4,6 +4,8 @@ import wget
 import os
 import shutil
 import zipfile
+import numpy as np
+import cv2 as cv
 
 
 def download(url, filename):
@@ -16,18 +18,28 @@ def download(url, filename):
     return wget.download(url, out=filename)
 
 
-def extract(filename, extract_dir):
+def extract(filename, extract_dir, resume=False):
     r"""Extract zip file.
     
     Args:
         filename (string): Path of the zip file.
         extract_dir (string): Directory to store the extracted results.
+        resume (boolean): Skip the members already extracted with their full size,
+            e.g. after an interrupted extraction.
     """
     if os.path.splitext(filename)[1] == '.zip':
         if not os.path.isdir(extract_dir):
             os.makedirs(extract_dir)
         with zipfile.ZipFile(filename) as z:
-            z.extractall(extract_dir)
+            if not resume:
+                z.extractall(extract_dir)
+                return
+            for member in z.infolist():
+                path = os.path.join(extract_dir, member.filename)
+                if not member.is_dir() and os.path.isfile(path) and \
+                        os.path.getsize(path) == member.file_size:
+                    continue
+                z.extract(member, extract_dir)
     else:
         raise Exception('Unsupport extension {} of the compressed file {}.'.format(
             os.path.splitext(filename)[1]), filename)
@@ -41,3 +53,17 @@ def compress(dirname, save_file):
         save_file {string} -- Path to store the zip file.
     """
     shutil.make_archive(save_file, 'zip', dirname)
+
+
+def load_image(img_file):
+    r"""Load a frame as a BGR image.
+
+    Args:
+        img_file (string or numpy.ndarray): Path of the frame, its encoded bytes as a 1-D
+            uint8 array (e.g. an item of a ``PackedSequence``) or an already decoded image.
+    """
+    if isinstance(img_file, np.ndarray):
+        if img_file.ndim == 1:
+            return cv.imdecode(img_file, cv.IMREAD_COLOR)
+        return img_file
+    return cv.imread(img_file)
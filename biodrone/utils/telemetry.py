@@ -0,0 +1,184 @@
+from __future__ import absolute_import, division
+
+import os
+import sys
+import time
+import threading
+import numpy as np
+import torch
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from .timing import cuda_available
+
+
+def _proc_stats():
+    # /proc fallback of psutil on Linux
+    with open('/proc/self/stat', 'r') as f:
+        # the fields after the command name, which may contain spaces, start with the state (field 3)
+        fields = f.read().rsplit(')', 1)[1].split()
+    stats = {
+        'cpu': (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK'),
+        'threads': int(fields[17]),
+        'rss': int(fields[21]) * os.sysconf('SC_PAGE_SIZE'),
+        'read_bytes': None}
+    try:
+        with open('/proc/self/io', 'r') as f:
+            for line in f:
+                if line.startswith('read_bytes:'):
+                    stats['read_bytes'] = int(line.split()[1])
+    except (IOError, OSError):
+        pass
+    return stats
+
+
+def process_stats():
+    r"""Return the CPU time (s), RSS (bytes), thread count and disk read bytes of the process.
+
+    They are read with ``psutil`` when installed, from ``/proc`` otherwise, and are ``None``
+    when not available on the platform.
+    """
+    if psutil is not None:
+        process = psutil.Process()
+        cpu_times = process.cpu_times()
+        stats = {
+            'cpu': cpu_times.user + cpu_times.system,
+            'threads': process.num_threads(),
+            'rss': process.memory_info().rss,
+            'read_bytes': None}
+        try:
+            stats['read_bytes'] = process.io_counters().read_bytes
+        except (AttributeError, psutil.Error):
+            pass
+        return stats
+    if os.path.isfile('/proc/self/stat'):
+        return _proc_stats()
+    stats = {'cpu': None, 'threads': threading.active_count(), 'rss': None, 'read_bytes': None}
+    if resource is not None:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        stats['cpu'] = usage.ru_utime + usage.ru_stime
+    return stats
+
+
+def memory_stats():
+    r"""Return the resident (RSS), proportional (PSS) and unique (USS) memory of the process in bytes.
+
+    The PSS splits the pages shared with other processes (e.g. memory-mapped weights) between
+    them, so that the PSS of the processes of a node add up to their memory use, and the USS
+    only counts the pages of the process alone. They are read with ``psutil`` when installed,
+    from ``/proc/self/smaps_rollup`` otherwise, and are ``None`` when not available.
+    """
+    if psutil is not None:
+        try:
+            info = psutil.Process().memory_full_info()
+            return {'rss': info.rss, 'pss': getattr(info, 'pss', None), 'uss': getattr(info, 'uss', None)}
+        except (AttributeError, psutil.Error):
+            pass
+    stats = {'rss': None, 'pss': None, 'uss': None}
+    try:
+        with open('/proc/self/smaps_rollup', 'r') as f:
+            fields = dict((line.split()[0].rstrip(':'), int(line.split()[1]) * 1024)
+                          for line in f if line.endswith('kB\n'))
+        stats['rss'], stats['pss'] = fields.get('Rss'), fields.get('Pss')
+        if 'Private_Clean' in fields:
+            stats['uss'] = fields['Private_Clean'] + fields['Private_Dirty']
+    except (IOError, OSError):
+        pass
+    return stats
+
+
+class ResourceMonitor(object):
+    r"""Sample the resource usage of the process in a background thread.
+
+    Between ``start`` and ``stop``, the CPU utilization, RSS, thread count and disk read
+    bytes of the process are sampled every ``interval`` seconds (see ``process_stats``), as
+    well as the torch memory allocated on the CUDA device when available.
+
+    Args:
+        interval (float): Seconds between two samples.
+    """
+    def __init__(self, interval=0.5):
+        super(ResourceMonitor, self).__init__()
+        self.interval = interval
+        self._thread = None
+
+    def start(self):
+        self._samples = []
+        if cuda_available():
+            torch.cuda.reset_peak_memory_stats()
+        self._sample()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self):
+        stats = process_stats()
+        stats['time'] = time.perf_counter()
+        if cuda_available():
+            stats['torch_allocated'] = torch.cuda.memory_allocated()
+        self._samples.append(stats)
+
+    def stop(self):
+        r"""Stop sampling and summarize the samples.
+
+        Returns:
+            dict: The ``duration`` (s), the mean and max ``cpu_percent`` (100 per busy core),
+                the mean and peak RSS in MB over the samples, the max thread count, the disk
+                ``read_mb``, the ``torch_peak_mb`` allocated on the CUDA device, the peak RSS
+                of the process since it started, and the ``samples``. Unavailable values are
+                ``None``.
+        """
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        samples = self._samples
+
+        def series(key):
+            values = [s[key] for s in samples]
+            return None if any([v is None for v in values]) else np.array(values, dtype=float)
+
+        times = series('time') - samples[0]['time']
+        cpu, rss, threads, read_bytes = series('cpu'), series('rss'), series('threads'), series('read_bytes')
+        duration = times[-1]
+        cpu_percent, cpu_percent_max = None, None
+        if cpu is not None and duration > 0:
+            cpu_percent = 100 * np.diff(cpu) / np.maximum(np.diff(times), 1e-9)
+            # the CPU time is accounted in ticks, too coarse for the last (shorter) interval
+            full = np.diff(times) >= self.interval / 2
+            cpu_percent_max = float(cpu_percent[full].max()) if np.any(full) else float(100 * (cpu[-1] - cpu[0]) / duration)
+
+        summary = {
+            'backend': 'psutil' if psutil is not None else ('proc' if os.path.isfile('/proc/self/stat') else None),
+            'duration': float(duration),
+            'cpu_percent': float(100 * (cpu[-1] - cpu[0]) / duration) if cpu_percent is not None else None,
+            'cpu_percent_max': cpu_percent_max,
+            'rss_mb': float(rss.mean()) / 2. ** 20 if rss is not None else None,
+            'peak_rss_mb': float(rss.max()) / 2. ** 20 if rss is not None else None,
+            'threads': int(threads.max()) if threads is not None else None,
+            'read_mb': float(read_bytes[-1] - read_bytes[0]) / 2. ** 20 if read_bytes is not None else None,
+            'torch_peak_mb': torch.cuda.max_memory_allocated() / 2. ** 20 if cuda_available() else None,
+            'process_peak_rss_mb': None,
+            'samples': {
+                'time': times.tolist(),
+                'cpu_percent': [0.] + cpu_percent.tolist() if cpu_percent is not None else None,
+                'rss_mb': (rss / 2. ** 20).tolist() if rss is not None else None,
+                'threads': threads.tolist() if threads is not None else None,
+                'torch_allocated_mb': (series('torch_allocated') / 2. ** 20).tolist() if cuda_available() else None}}
+        if resource is not None:
+            # kilobytes on Linux, bytes on macOS
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            summary['process_peak_rss_mb'] = rss / 2. ** 20 if sys.platform == 'darwin' else rss / 2. ** 10
+        return summary
@@ -0,0 +1,102 @@
+from __future__ import absolute_import, division
+
+import time
+import numpy as np
+import torch
+
+
+_cuda_available = None
+
+
+def cuda_available():
+    r"""Whether a CUDA device is available, detected once per process."""
+    global _cuda_available
+    if _cuda_available is None:
+        _cuda_available = torch.cuda.device_count() > 0
+    return _cuda_available
+
+
+class Timer(object):
+    r"""Measure the duration of the code between ``start`` and ``stop``.
+
+    ``calibrate`` measures the duration of an empty ``start``/``stop`` pair, which is then
+    subtracted from every measured duration (which stays non-negative).
+    """
+    def __init__(self):
+        super(Timer, self).__init__()
+        self.overhead = 0.
+
+    def start(self):
+        raise NotImplementedError()
+
+    def _elapsed(self):
+        raise NotImplementedError()
+
+    def stop(self):
+        r"""Return the seconds elapsed since ``start``, minus the calibrated overhead."""
+        return max(0., self._elapsed() - self.overhead)
+
+    def calibrate(self, num=1000):
+        r"""Set the overhead to the median duration of ``num`` empty measures."""
+        durations = np.zeros(num)
+        for i in range(num):
+            self.start()
+            durations[i] = self._elapsed()
+        self.overhead = float(np.median(durations))
+        return self.overhead
+
+
+class PerfCounterTimer(Timer):
+    r"""Monotonic high-resolution wall-clock timer (``time.perf_counter_ns``)."""
+    def start(self):
+        self._start = time.perf_counter_ns()
+
+    def _elapsed(self):
+        return (time.perf_counter_ns() - self._start) * 1e-9
+
+
+class CudaTimer(Timer):
+    r"""Timer of the work queued on the current CUDA device, with CUDA events.
+
+    ``stop`` synchronizes the device, so that the asynchronous kernels launched between
+    ``start`` and ``stop`` are measured.
+    """
+    def __init__(self):
+        super(CudaTimer, self).__init__()
+        self._start_event = torch.cuda.Event(enable_timing=True)
+        self._stop_event = torch.cuda.Event(enable_timing=True)
+
+    def start(self):
+        self._start_event.record()
+
+    def _elapsed(self):
+        self._stop_event.record()
+        torch.cuda.synchronize()
+        # CUDA events measure milliseconds
+        return self._start_event.elapsed_time(self._stop_event) / 1000.
+
+
+TIMERS = {
+    'perf_counter': PerfCounterTimer,
+    'cuda': CudaTimer}
+
+
+def create_timer(timer=None, calibrate=True):
+    r"""Create a timer.
+
+    Args:
+        timer (string or Timer, optional): Name of the timer in ``TIMERS``, or a ``Timer``
+            instance, which is returned as is. ``cuda`` when a CUDA device is available and
+            ``perf_counter`` otherwise when ``None``.
+        calibrate (boolean, optional): Calibrate the overhead of a created timer.
+    """
+    if isinstance(timer, Timer):
+        return timer
+    if timer is None:
+        timer = 'cuda' if cuda_available() else 'perf_counter'
+    if not timer in TIMERS:
+        raise Exception('Unknown timer {}, expected one of {}.'.format(timer, sorted(TIMERS.keys())))
+    timer = TIMERS[timer]()
+    if calibrate:
+        timer.calibrate(100 if isinstance(timer, CudaTimer) else 1000)
+    return timer
@@ -0,0 +1,89 @@
+from __future__ import absolute_import
+
+import os
+import zipfile
+import tempfile
+import torch
+
+
+# weights loaded in this process, by real path: (modification time, state dict)
+_weights = {}
+
+
+def _check_torch():
+    # memory-mapped loading and load_state_dict(assign=True) need torch >= 2.1
+    version = tuple(int(v) for v in torch.__version__.split('+')[0].split('.')[:2])
+    if version < (2, 1):
+        raise Exception('Shared weights need torch >= 2.1, found torch {}.'.format(torch.__version__))
+
+
+def mmap_file(net_path, cache_dir=None):
+    r"""Return a weight file that ``torch.load`` can memory-map.
+
+    Files saved in the zip format of ``torch.save`` (the default since torch 1.6) are returned
+    as is. Files saved in the legacy format are converted once to ``{name}.mmap.pth`` in
+    ``cache_dir`` (the directory of the weights, or the temporary directory when it is not
+    writable), and converted again when the weights are newer.
+
+    Args:
+        net_path (string): The weights.
+        cache_dir (string, optional): Directory of the converted weights.
+    """
+    if zipfile.is_zipfile(net_path):
+        return net_path
+    if cache_dir is None:
+        cache_dir = os.path.dirname(os.path.realpath(net_path))
+        if not os.access(cache_dir, os.W_OK):
+            cache_dir = tempfile.gettempdir()
+    mmap_path = os.path.join(cache_dir, os.path.basename(net_path) + '.mmap.pth')
+    if not os.path.isfile(mmap_path) or os.path.getmtime(mmap_path) < os.path.getmtime(net_path):
+        state_dict = torch.load(net_path, map_location=lambda storage, loc: storage)
+        # written under a temporary name, so that concurrent workers never read a partial file
+        tmp_path = '{}.{}.tmp'.format(mmap_path, os.getpid())
+        torch.save(state_dict, tmp_path)
+        os.replace(tmp_path, mmap_path)
+    return mmap_path
+
+
+def load_weights(net_path, shared=True, cache_dir=None):
+    r"""Load the state dict of a network on the CPU.
+
+    With ``shared``, the weights are memory-mapped read-only from the file (see ``mmap_file``)
+    instead of being read into private memory, and loaded once per process. The pages of the
+    file are then shared by all the processes of the node through the page cache, and
+    processes forked after ``share_weights`` do not even map them again. Load them into a
+    network with ``load_state_dict(state_dict, assign=True)`` to keep them shared: the
+    networks loaded from the same weights in a process then share their parameters, and must
+    not be trained.
+
+    Args:
+        net_path (string): The weights.
+        shared (boolean, optional): Memory-map the weights (torch >= 2.1), ``torch.load`` them otherwise.
+        cache_dir (string, optional): Directory of the weights converted for memory-mapping.
+    """
+    if not shared:
+        return torch.load(net_path, map_location=lambda storage, loc: storage)
+    _check_torch()
+    key = os.path.realpath(net_path)
+    mtime = os.path.getmtime(key)
+    if not key in _weights or _weights[key][0] != mtime:
+        state_dict = torch.load(mmap_file(net_path, cache_dir), map_location='cpu', mmap=True)
+        _weights[key] = (mtime, state_dict)
+    return _weights[key][1]
+
+
+def share_weights(net_paths, cache_dir=None):
+    r"""Load weights once in the parent process before starting the workers.
+
+    The weights in legacy format are converted once (instead of by every worker), and the
+    memory-mapped weights are inherited by the forked workers. Spawned workers map the same
+    file, whose pages are shared through the page cache.
+
+    Args:
+        net_paths (string or list): The weights.
+        cache_dir (string, optional): Directory of the weights converted for memory-mapping.
+    """
+    if isinstance(net_paths, str):
+        net_paths = [net_paths]
+    for net_path in net_paths:
+        load_weights(net_path, True, cache_dir)
@@ -0,0 +1,137 @@
+from __future__ import absolute_import, division
+
+import os
+import json
+import errno
+import socket
+import threading
+
+
+class WorkQueue(object):
+    r"""Work queue shared by several nodes through lease files on a shared file system.
+
+    A work item is claimed by creating its lock file ``{queue_dir}/{item}.lock`` with
+    ``O_CREAT | O_EXCL``, which only one node can do. The holder refreshes the modification
+    time of the lock in a background thread (heartbeat), and a lock that has not been refreshed
+    for ``lease_timeout`` seconds is considered stale (its holder crashed or lost the file
+    system) and can be claimed again. Times are compared with the clock of the file server.
+
+    Args:
+        queue_dir (string): Directory of the lock files, on the shared file system.
+        lease_timeout (float): Seconds after which a lease that was not refreshed is stale.
+        heartbeat (float): Seconds between two refreshes of a held lease.
+        worker_id (string, optional): Name of this worker, ``{hostname}_{pid}`` when ``None``.
+    """
+    def __init__(self, queue_dir, lease_timeout=600, heartbeat=60, worker_id=None):
+        super(WorkQueue, self).__init__()
+        assert heartbeat < lease_timeout, 'The heartbeat must be shorter than the lease timeout'
+        self.queue_dir = queue_dir
+        self.lease_timeout = lease_timeout
+        self.heartbeat = heartbeat
+        self.worker_id = worker_id if worker_id is not None else '{}_{}'.format(socket.gethostname(), os.getpid())
+        if not os.path.isdir(queue_dir):
+            os.makedirs(queue_dir)
+
+    def _lock_file(self, item):
+        return os.path.join(self.queue_dir, '{}.lock'.format(item))
+
+    def _now(self):
+        # current time of the file server, read from a touched file
+        clock_file = os.path.join(self.queue_dir, '.clock_{}'.format(socket.gethostname()))
+        with open(clock_file, 'a'):
+            os.utime(clock_file, None)
+        return os.path.getmtime(clock_file)
+
+    def _is_stale(self, path):
+        try:
+            return self._now() - os.path.getmtime(path) > self.lease_timeout
+        except OSError:
+            return False
+
+    def claim(self, item):
+        r"""Claim a work item.
+
+        Returns:
+            Lease: The lease of the item, to ``release`` once the item is done, or ``None``
+                if the item is held by another worker.
+        """
+        lock_file = self._lock_file(item)
+        for _ in range(2):
+            try:
+                fd = os.open(lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+                if not self._is_stale(lock_file) or not self._break(lock_file):
+                    return None
+                # the stale lease was broken, claim the item again
+                continue
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'worker': self.worker_id, 'item': item}, f)
+            return Lease(self, item, lock_file)
+        return None
+
+    def _break(self, lock_file):
+        # move the stale lock away atomically, so that only one worker breaks it
+        stale_file = '{}.stale_{}'.format(lock_file, self.worker_id)
+        try:
+            os.rename(lock_file, stale_file)
+        except OSError:
+            return False
+        if not self._is_stale(stale_file):
+            # the lock was claimed again in the meantime, put it back
+            try:
+                os.link(stale_file, lock_file)
+            except OSError:
+                pass
+            os.remove(stale_file)
+            return False
+        os.remove(stale_file)
+        return True
+
+    def holder(self, item):
+        r"""Return the worker holding a work item, ``None`` if it is not claimed."""
+        try:
+            with open(self._lock_file(item), 'r') as f:
+                return json.load(f)['worker']
+        except (IOError, OSError, ValueError):
+            return None
+
+
+class Lease(object):
+    r"""A claimed work item of a ``WorkQueue``, kept alive by a heartbeat thread until released."""
+    def __init__(self, queue, item, lock_file):
+        super(Lease, self).__init__()
+        self.queue = queue
+        self.item = item
+        self.lock_file = lock_file
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._beat)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _beat(self):
+        while not self._stop.wait(self.queue.heartbeat):
+            try:
+                os.utime(self.lock_file, None)
+            except OSError:
+                break
+
+    @property
+    def lost(self):
+        r"""Whether the lease was broken by another worker (e.g. after a long stall)."""
+        return self.queue.holder(self.item) != self.queue.worker_id
+
+    def release(self):
+        r"""Stop the heartbeat and remove the lock file, if it is still held."""
+        self._stop.set()
+        self._thread.join()
+        if not self.lost:
+            os.remove(self.lock_file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.release()
@@ -11,12 +11,14 @@ parser = argparse.ArgumentParser()
 parser.add_argument('--gpu_number', type=str, help='the number of GPU you would like to use', default="1")
 parser.add_argument('--tracker_name', type=str, help='the name of selected tracker', default='SiamFC')
 parser.add_argument('--subset', type=str, help='the name of selected tracker', default='train')
+parser.add_argument('--root_dir', type=str, help='the path of data folder (e.g. a synthetic dataset)', default="/mnt/second/hushiyu/UAV/BioDrone")
+parser.add_argument('--server', type=str, help='the socket of a running tracker server (biodrone.experiments.server) to track with', default=None)
 args = parser.parse_args()
 
 if __name__ == '__main__':
     os.environ["CUDA_VISIBLE_DEVICES"] = args.gpu_number
     # the path of data folder
-    root_dir = "/mnt/second/hushiyu/UAV/BioDrone"
+    root_dir = args.root_dir
 
     # the path to save the experiment result
     save_dir = os.path.join(root_dir, 'result')
@@ -34,7 +36,11 @@ if __name__ == '__main__':
     """ 
     tracker_name = args.tracker_name
 
-    if tracker_name == 'SiamFC':
+    if args.server is not None:
+        # the warm trackers of the server
+        from biodrone.experiments.server import RemoteTracker
+        tracker = RemoteTracker(args.server)
+    elif tracker_name == 'SiamFC':
         net_path = os.path.join(os.path.split(os.path.realpath(__file__))[0],'pretrained', 'siamfc','model.pth')
         tracker = TrackerSiamFC(net_path=net_path)
     elif tracker_name == 'SiamRPN':
@@ -5,12 +5,15 @@ import torch.nn as nn
 import torch.nn.init as init
 import torch.nn.functional as F
 import torch.optim as optim
+import copy
 import numpy as np
 import cv2 as cv
 from collections import namedtuple
 from torch.optim.lr_scheduler import ExponentialLR
 
 from biodrone.trackers import Tracker
+from biodrone.utils.frames import LazyFrame
+from biodrone.utils.weights import load_weights
 
 
 class SiamFC(nn.Module):
@@ -67,8 +70,8 @@ class SiamFC(nn.Module):
 
 class TrackerSiamFC(Tracker):
 
-    def __init__(self, net_path=None, **kargs): 
-        super(TrackerSiamFC, self).__init__(name='SiamFC', is_deterministic=True)
+    def __init__(self, net_path=None, timer=None, shared_weights=False, **kargs): 
+        super(TrackerSiamFC, self).__init__(name='SiamFC', is_deterministic=True, timer=timer)
         self.cfg = self.parse_args(**kargs)
 
         # setup GPU device if available
@@ -77,11 +80,19 @@ class TrackerSiamFC(Tracker):
 
         # setup model
         self.net = SiamFC()
-        if net_path is not None:
+        # with shared_weights, the parameters are memory-mapped and shared by the processes (see load_weights)
+        self.shared_weights = shared_weights and net_path is not None
+        if self.shared_weights:
+            self.net.load_state_dict(load_weights(net_path), assign=True)
+        elif net_path is not None:
             self.net.load_state_dict(torch.load(
                 net_path, map_location=lambda storage, loc: storage))
         self.net = self.net.to(self.device)
 
+        # the shared weights are not trained, and the optimizer (slow to import) is not needed
+        if self.shared_weights:
+            return
+
         # setup optimizer
         self.optimizer = optim.SGD(
             self.net.parameters(),
@@ -165,7 +176,9 @@ class TrackerSiamFC(Tracker):
             self.kernel = self.net.feature(exemplar_image)
 
     def update(self, image):
-        image = np.asarray(image)
+        if not isinstance(image, LazyFrame):
+            # lazy frames are only decoded around the search region
+            image = np.asarray(image)
         height = image.shape[0]
         width = image.shape[1]
         # search images
@@ -233,7 +246,23 @@ class TrackerSiamFC(Tracker):
             box = np.array([0,0,0,0])
         return box
 
+    def state_dict(self):
+        # tracking state set by init and update
+        state = copy.deepcopy({k: getattr(self, k) for k in [
+            'center', 'target_sz', 'upscale_sz', 'hann_window', 'scale_factors',
+            'z_sz', 'x_sz', 'avg_color']})
+        state['kernel'] = self.kernel.cpu()
+        return state
+
+    def load_state_dict(self, state):
+        state = copy.deepcopy(state)
+        self.kernel = state.pop('kernel').to(self.device)
+        for k, v in state.items():
+            setattr(self, k, v)
+
     def step(self, batch, backward=True, update_lr=False):
+        if backward and self.shared_weights:
+            raise Exception('The shared weights are read-only, create the tracker with shared_weights=False to train it.')
         if backward:
             self.net.train()
             if update_lr:
@@ -258,6 +287,9 @@ class TrackerSiamFC(Tracker):
         return loss.item()
 
     def _crop_and_resize(self, image, center, size, out_size, pad_color):
+        if isinstance(image, LazyFrame):
+            return image.crop_and_resize(center, size, out_size, pad_color)
+
         # convert box to corners (0-indexed)
         size = round(size)
         corners = np.concatenate((
@@ -3,10 +3,13 @@ from __future__ import absolute_import, division
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
+import copy
 import numpy as np
 import cv2 as cv
 from collections import namedtuple
 from biodrone.trackers import Tracker
+from biodrone.utils.frames import LazyFrame
+from biodrone.utils.weights import load_weights
 
 
 class SiamRPN(nn.Module):
@@ -70,8 +73,8 @@ class SiamRPN(nn.Module):
 
 class TrackerSiamRPN(Tracker):
 
-    def __init__(self, net_path=None, **kargs):
-        super(TrackerSiamRPN, self).__init__(name='SiamRPN', is_deterministic=True)
+    def __init__(self, net_path=None, timer=None, shared_weights=False, **kargs):
+        super(TrackerSiamRPN, self).__init__(name='SiamRPN', is_deterministic=True, timer=timer)
         self.parse_args(**kargs)
 
         # setup GPU device if available
@@ -87,7 +90,11 @@ class TrackerSiamRPN(Tracker):
 
         # setup model
         self.net = SiamRPN()
-        if net_path is not None:
+        # with shared_weights, the parameters are memory-mapped and shared by the processes (see load_weights)
+        self.shared_weights = shared_weights and net_path is not None
+        if self.shared_weights:
+            self.net.load_state_dict(load_weights(net_path), assign=True)
+        elif net_path is not None:
             self.net.load_state_dict(torch.load(
                 net_path, map_location=lambda storage, loc: storage))
         self.net = self.net.to(self.device)
@@ -155,7 +162,9 @@ class TrackerSiamRPN(Tracker):
             self.kernel_reg, self.kernel_cls = self.net.learn(exemplar_image)
 
     def update(self, image):
-        image = np.asarray(image)
+        if not isinstance(image, LazyFrame):
+            # lazy frames are only decoded around the search region
+            image = np.asarray(image)
         
         # search image
         instance_image = self._crop_and_resize(
@@ -215,6 +224,24 @@ class TrackerSiamRPN(Tracker):
 
         return box
 
+    def state_dict(self):
+        # tracking state set by init and update, with the search size chosen by init
+        state = copy.deepcopy({k: getattr(self, k) for k in [
+            'center', 'target_sz', 'response_sz', 'anchors', 'hann_window',
+            'z_sz', 'x_sz', 'avg_color']})
+        state['cfg'] = self.cfg._asdict()
+        state['kernel_reg'] = self.kernel_reg.cpu()
+        state['kernel_cls'] = self.kernel_cls.cpu()
+        return state
+
+    def load_state_dict(self, state):
+        state = copy.deepcopy(state)
+        self.cfg = self.cfg._replace(**state.pop('cfg'))
+        self.kernel_reg = state.pop('kernel_reg').to(self.device)
+        self.kernel_cls = state.pop('kernel_cls').to(self.device)
+        for k, v in state.items():
+            setattr(self, k, v)
+
     def _create_anchors(self, response_sz):
         anchor_num = len(self.cfg.ratios) * len(self.cfg.scales)
         anchors = np.zeros((anchor_num, 4), dtype=np.float32)
@@ -267,6 +294,9 @@ class TrackerSiamRPN(Tracker):
         return penalty
 
     def _crop_and_resize(self, image, center, size, out_size, pad_color):
+        if isinstance(image, LazyFrame):
+            return image.crop_and_resize(center, size, out_size, pad_color)
+
         # convert box to corners (0-indexed)
         size = round(size)
         corners = np.concatenate((